@@ -0,0 +1,7 @@
+"""Run the FORAI command line interface with ``python -m forai``."""
+
+import sys
+
+from forai.cli import main
+
+sys.exit(main())
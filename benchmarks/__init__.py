@@ -0,0 +1,4 @@
+from forai.benchmarks.synthetic_repo import generate_repo
+from forai.benchmarks.suite import BenchmarkSuite, compare_results, run_benchmarks
+
+__all__ = ["generate_repo", "BenchmarkSuite", "compare_results", "run_benchmarks"]
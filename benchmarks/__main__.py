@@ -0,0 +1,7 @@
+"""Run the FORAI benchmarks with ``python -m forai.benchmarks``."""
+
+import sys
+
+from forai.benchmarks.suite import main
+
+sys.exit(main())
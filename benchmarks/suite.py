@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+FORAI Benchmarks
+
+Times the analysis, registry, header and query pipeline on a synthetic repository
+and compares the results with a baseline.
+"""
+
+import argparse
+import ast
+import gc
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import forai
+from forai.benchmarks.synthetic_repo import generate_repo, symbol_names
+from forai.dependency_tracker import DependencyTracker
+from forai.query import FORAIQueryEngine, run_batch, run_query
+from forai.static_analyzer import StaticAnalyzer
+from forai.symbol_registry import JSONRegistryStorage, SQLiteRegistryStorage, SymbolRegistry
+from forai.utils.ast_utils import SymbolExtractor, parse_python_file
+from forai.utils.scanner import scan_files
+from forai.workspace_updater import WorkspaceUpdater
+
+logger = logging.getLogger(__name__)
+
+# Version of the results format
+RESULTS_VERSION = 1
+
+# A benchmark whose median time grows by more than this fraction of the baseline is a regression
+DEFAULT_THRESHOLD = 0.2
+
+# Benchmarks faster than this (in seconds) in both runs are too noisy to compare
+DEFAULT_MIN_TIME = 0.001
+
+# Number of symbols looked up by the query benchmarks
+QUERY_SAMPLE = 200
+
+
+def _measure(run: Callable[[Any], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> List[float]:
+    """Time a function, calling a setup function (not timed) before each run.
+
+    Args:
+        run: The function to time; it gets the setup function's result
+        repeat: Number of runs
+        setup: Function preparing the state of each run, or None
+
+    Returns:
+        The run times in seconds
+    """
+    times = []
+    for _ in range(repeat):
+        state = setup() if setup is not None else None
+        gc.collect()
+        start = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _summary(times: List[float], items: int) -> Dict[str, Any]:
+    """Summarize the run times of a benchmark processing a number of items per run."""
+    median = statistics.median(times)
+    return {
+        'runs': len(times),
+        'min': round(min(times), 6),
+        'median': round(median, 6),
+        'max': round(max(times), 6),
+        'items': items,
+        'items_per_s': round(items / median, 1) if median > 0 else None
+    }
+
+
+class BenchmarkSuite:
+    """The FORAI benchmarks, run against one synthetic repository.
+
+    The repository is generated once into a template directory. Benchmarks that write
+    (headers, the registry, caches) work on fresh copies of it, made outside the timed
+    sections.
+    """
+
+    def __init__(self, work_dir: str, files: int = 200, symbols: int = 10, fan_out: int = 3,
+                 cycles: int = 5, seed: int = 0, repeat: int = 5):
+        """Generate the synthetic repository.
+
+        Args:
+            work_dir: Directory for the template repository and its copies
+            files: Number of files
+            symbols: Number of symbols defined per file
+            fan_out: Number of files each file imports from
+            cycles: Number of import cycles
+            seed: Seed of the generator
+            repeat: Number of runs of each benchmark
+        """
+        self.work_dir = work_dir
+        self.repeat = repeat
+        self.params = {'files': files, 'symbols': symbols, 'fan_out': fan_out, 'cycles': cycles,
+                       'seed': seed, 'repeat': repeat}
+        self.template = os.path.join(work_dir, 'template')
+        self.repo = generate_repo(self.template, files, symbols, fan_out, cycles, seed)
+        self.file_paths = sorted(scan_files(self.template))
+        self.parse_results = [parse_python_file(file_path) for file_path in self.file_paths]
+        self.trees = []
+        for file_path in self.file_paths:
+            with open(file_path, encoding='utf-8') as f:
+                self.trees.append(ast.parse(f.read(), filename=file_path))
+        self._copies = 0
+
+        # Workspace with up-to-date headers, registry and dependency index for the read benchmarks
+        self.updated = self.copy()
+        registry = SymbolRegistry(self.updated)
+        with registry.batch():
+            WorkspaceUpdater(registry).update_all()
+
+        names = [name for i in range(files) for name, _ in symbol_names(i, symbols)[1:]]
+        step = max(1, len(names) // QUERY_SAMPLE)
+        self.query_names = names[::step][:QUERY_SAMPLE] or ['setup']
+
+    def copy(self) -> str:
+        """Copy the template repository into a new directory."""
+        self._copies += 1
+        path = os.path.join(self.work_dir, f"copy{self._copies}")
+        shutil.copytree(self.template, path)
+        return path
+
+    def benchmarks(self) -> Dict[str, Callable[[], Dict[str, Any]]]:
+        """Get the benchmarks by name, in the order they run."""
+        return {
+            'parse_python_file': self.bench_parse,
+            'extract_symbols': lambda: self.bench_extract(SymbolExtractor),
+            'extract_symbols_full_walk': self.bench_extract_full_walk,
+            'analyze_file': self.bench_analyze,
+            'registry_allocate_flush': self.bench_registry_allocate,
+            'registry_save_json': lambda: self.bench_registry_save(JSONRegistryStorage),
+            'registry_save_sqlite': lambda: self.bench_registry_save(SQLiteRegistryStorage),
+            'resolve_import': self.bench_resolve_import,
+            'build_dependency_graph': self.bench_dependency_graph,
+            'update_all_cold': lambda: self.bench_update_all(warm=False),
+            'update_all_warm': lambda: self.bench_update_all(warm=True),
+            'query_find': lambda: self.bench_query('find'),
+            'query_find_prefix': lambda: self.bench_query('find', match='prefix'),
+            'query_find_fuzzy': lambda: self.bench_query('find', match='fuzzy'),
+            'query_usages': lambda: self.bench_query('usages'),
+            'query_list': self.bench_query_list,
+            'query_batch': self.bench_query_batch,
+            'query_cli_find': self.bench_query_cli
+        }
+
+    def bench_parse(self) -> Dict[str, Any]:
+        """Parse every file."""
+        times = _measure(lambda _: [parse_python_file(file_path) for file_path in self.file_paths], self.repeat)
+        return _summary(times, len(self.file_paths))
+
+    def bench_extract(self, extractor_class: type) -> Dict[str, Any]:
+        """Extract the symbols of every parsed file with an extractor class."""
+        def run(_) -> None:
+            for tree in self.trees:
+                extractor_class().extract(tree)
+
+        return _summary(_measure(run, self.repeat), len(self.trees))
+
+    def bench_extract_full_walk(self) -> Dict[str, Any]:
+        """Extract the symbols of every parsed file with the full-tree visitors SymbolExtractor replaced."""
+        # Imported here, so that running the symbol_extraction module with -m does not find it imported
+        from forai.benchmarks.symbol_extraction import FullWalkExtractor
+        return self.bench_extract(FullWalkExtractor)
+
+    def _fresh_registry(self) -> SymbolRegistry:
+        """Create an empty registry in a new copy of the repository."""
+        return SymbolRegistry(self.copy(), storage='json')
+
+    def bench_analyze(self) -> Dict[str, Any]:
+        """Analyze every file with a new registry, as one batch."""
+        def run(registry: SymbolRegistry) -> None:
+            analyzer = StaticAnalyzer(registry)
+            with registry.batch():
+                for file_path in self._paths_in(registry):
+                    analyzer.analyze_file(file_path)
+
+        times = _measure(run, self.repeat, self._fresh_registry)
+        return _summary(times, len(self.file_paths))
+
+    def _paths_in(self, registry: SymbolRegistry) -> List[str]:
+        """Get the paths of the repository's files in the copy a registry belongs to."""
+        return [os.path.join(registry.workspace_path, os.path.relpath(file_path, self.template))
+                for file_path in self.file_paths]
+
+    def bench_registry_allocate(self) -> Dict[str, Any]:
+        """Allocate the file and symbol IDs of every definition in a new registry as one batch.
+
+        The batch is flushed to the JSON backend at the end, as in a CLI run; the save
+        benchmarks time saving alone.
+        """
+        def run(registry: SymbolRegistry) -> None:
+            with registry.batch():
+                for file_path, parse_result in zip(self._paths_in(registry), self.parse_results):
+                    file_id = registry.get_file_id(file_path)
+                    for defn in parse_result['definitions']:
+                        registry.get_symbol_id(file_id, defn['name'], defn['type'])
+
+        symbols = sum(len(parse_result['definitions']) for parse_result in self.parse_results)
+        times = _measure(run, self.repeat, self._fresh_registry)
+        return _summary(times, symbols)
+
+    def bench_registry_save(self, storage_class: type) -> Dict[str, Any]:
+        """Save the whole registry of the updated repository with a storage backend."""
+        registry = SymbolRegistry(self.updated).registry
+
+        def setup():
+            storage = storage_class(tempfile.mkdtemp(dir=self.work_dir))
+            if isinstance(storage, SQLiteRegistryStorage):
+                storage.conn  # Create the database outside the timed section
+            return storage
+
+        times = _measure(lambda storage: storage.save(registry), self.repeat, setup)
+        return _summary(times, len(registry['files']))
+
+    def bench_resolve_import(self) -> Dict[str, Any]:
+        """Resolve every import of every file, including building the module index."""
+        imports = [(imp['module'], imp['symbol']) for parse_result in self.parse_results
+                   for imp in parse_result['imports']]
+
+        def run(registry: SymbolRegistry) -> None:
+            for module, symbol in imports:
+                registry.resolve_import(module, symbol)
+
+        times = _measure(run, self.repeat, lambda: SymbolRegistry(self.updated))
+        return _summary(times, len(imports))
+
+    def bench_dependency_graph(self) -> Dict[str, Any]:
+        """Load the dependency index and build the dependency graph."""
+        registry = SymbolRegistry(self.updated)
+        times = _measure(lambda tracker: tracker.build_dependency_graph(), self.repeat,
+                         lambda: DependencyTracker(registry))
+        return _summary(times, len(self.file_paths))
+
+    def bench_update_all(self, warm: bool) -> Dict[str, Any]:
+        """Run update-all on a new copy of the repository, or again on an updated one."""
+        def setup() -> SymbolRegistry:
+            path = self.copy()
+            if warm:
+                registry = SymbolRegistry(path)
+                with registry.batch():
+                    WorkspaceUpdater(registry).update_all()
+            return SymbolRegistry(path)
+
+        def run(registry: SymbolRegistry) -> None:
+            with registry.batch():
+                WorkspaceUpdater(registry).update_all()
+
+        times = _measure(run, self.repeat, setup)
+        return _summary(times, len(self.file_paths))
+
+    def bench_query(self, command: str, match: str = 'exact') -> Dict[str, Any]:
+        """Answer a query command for each sampled symbol with a loaded engine."""
+        engine = FORAIQueryEngine(self.updated)
+        run_query(engine, command, symbol=self.query_names[0], match=match)  # Load the registry and index
+
+        def run(_) -> None:
+            for name in self.query_names:
+                run_query(engine, command, symbol=name, match=match)
+
+        times = _measure(run, self.repeat)
+        return _summary(times, len(self.query_names))
+
+    def bench_query_list(self) -> Dict[str, Any]:
+        """List all definitions with a new engine, including loading the registry."""
+        times = _measure(lambda engine: run_query(engine, 'list', all_definitions=True), self.repeat,
+                         lambda: FORAIQueryEngine(self.updated))
+        return _summary(times, self.repo['symbols'])
+
+    def bench_query_batch(self) -> Dict[str, Any]:
+        """Answer the sampled find queries as one batch with a new engine."""
+        lines = [json.dumps({'command': 'find', 'symbol': name}) for name in self.query_names]
+        times = _measure(lambda engine: run_batch(engine, lines, lambda answer: None), self.repeat,
+                         lambda: FORAIQueryEngine(self.updated))
+        return _summary(times, len(lines))
+
+    def bench_query_cli(self) -> Dict[str, Any]:
+        """Run ``forai-query find`` in a new interpreter, as an agent invocation would."""
+        env = dict(os.environ)
+        package_parent = os.path.dirname(os.path.dirname(os.path.abspath(forai.__file__)))
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [package_parent, env.get('PYTHONPATH')]))
+        command = [sys.executable, '-m', 'forai.query', '--workspace', self.updated, 'find', self.query_names[0]]
+        times = _measure(lambda _: subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                                  env=env, check=True), self.repeat)
+        return _summary(times, 1)
+
+    def run(self, only: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Run the benchmarks.
+
+        Args:
+            only: Names of the benchmarks to run, or None for all
+
+        Returns:
+            The summary of each benchmark by name
+        """
+        benchmarks = self.benchmarks()
+        if only:
+            unknown = set(only) - set(benchmarks)
+            if unknown:
+                raise ValueError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+            benchmarks = {name: bench for name, bench in benchmarks.items() if name in only}
+
+        results = {}
+        for name, bench in benchmarks.items():
+            logger.info(f"Running {name}")
+            results[name] = bench()
+        return results
+
+
+def _git_commit() -> Optional[str]:
+    """Get the commit of the FORAI source tree, if it is a git checkout."""
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(forai.__file__)),
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def run_benchmarks(files: int = 200, symbols: int = 10, fan_out: int = 3, cycles: int = 5, seed: int = 0,
+                   repeat: int = 5, only: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Run the benchmark suite on a synthetic repository in a temporary directory.
+
+    Args:
+        files: Number of files of the repository
+        symbols: Number of symbols defined per file
+        fan_out: Number of files each file imports from
+        cycles: Number of import cycles
+        seed: Seed of the generator
+        repeat: Number of runs of each benchmark
+        only: Names of the benchmarks to run, or None for all
+
+    Returns:
+        The results: format version, commit, environment, parameters, the generated
+        repository's statistics and, per benchmark, the number of runs, the min,
+        median and max time in seconds, the items processed per run and the items
+        per second at the median time
+    """
+    work_dir = tempfile.mkdtemp(prefix='forai-bench-')
+    try:
+        suite = BenchmarkSuite(work_dir, files, symbols, fan_out, cycles, seed, repeat)
+        benchmarks = suite.run(only)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'version': RESULTS_VERSION,
+        'commit': _git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': suite.params,
+        'repo': suite.repo,
+        'benchmarks': benchmarks
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD,
+                    min_time: float = DEFAULT_MIN_TIME) -> Dict[str, Any]:
+    """Compare benchmark results with a baseline.
+
+    Median times are compared for the benchmarks present in both results.
+
+    Args:
+        baseline: The baseline results
+        current: The current results
+        threshold: Fraction by which a median time may grow before it is a regression
+        min_time: Benchmarks with median times below this (in seconds) in both results are skipped
+
+    Returns:
+        A dictionary with the threshold, whether the parameters match, and lists of
+        regressions and improvements (name, baseline and current median, ratio)
+    """
+    regressions = []
+    improvements = []
+    for name, result in current.get('benchmarks', {}).items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if previous is None or not previous.get('median'):
+            continue
+        if previous['median'] < min_time and result['median'] < min_time:
+            continue
+        ratio = result['median'] / previous['median']
+        change = {'name': name, 'baseline': previous['median'], 'current': result['median'],
+                  'ratio': round(ratio, 3)}
+        if ratio > 1 + threshold:
+            regressions.append(change)
+        elif ratio < 1 / (1 + threshold):
+            improvements.append(change)
+
+    comparable_params = {key: value for key, value in current.get('params', {}).items() if key != 'repeat'}
+    return {
+        'baseline_commit': baseline.get('commit'),
+        'threshold': threshold,
+        'params_match': comparable_params == {key: value for key, value in baseline.get('params', {}).items()
+                                              if key != 'repeat'},
+        'regressions': regressions,
+        'improvements': improvements
+    }
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Benchmark the FORAI pipeline on a synthetic repository')
+    parser.add_argument('--files', type=int, default=200, help='Number of files (default: 200)')
+    parser.add_argument('--symbols', type=int, default=10, help='Number of symbols per file (default: 10)')
+    parser.add_argument('--fan-out', type=int, default=3,
+                        help='Number of files each file imports from (default: 3)')
+    parser.add_argument('--cycles', type=int, default=5, help='Number of import cycles (default: 5)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the repository generator (default: 0)')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of runs of each benchmark (default: 5)')
+    parser.add_argument('--only', type=lambda value: [name for name in value.split(',') if name], default=None,
+                        help='Comma-separated names of the benchmarks to run')
+    parser.add_argument('--output', '-o', help='Also write the results to this file')
+    parser.add_argument('--baseline', help='Results file to compare with; regressions make the exit code 1')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Allowed growth of a median time over the baseline (default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--min-time', type=float, default=DEFAULT_MIN_TIME,
+                        help=f'Skip comparing benchmarks faster than this many seconds (default: {DEFAULT_MIN_TIME})')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
+    if args.files < 1 or args.repeat < 1:
+        logger.error("--files and --repeat must be at least 1")
+        return 1
+
+    try:
+        results = run_benchmarks(args.files, args.symbols, args.fan_out, args.cycles, args.seed,
+                                 args.repeat, args.only)
+    except ValueError as e:
+        logger.error(str(e))
+        return 1
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        results['comparison'] = compare_results(baseline, results, args.threshold, args.min_time)
+        if not results['comparison']['params_match']:
+            logger.warning("The baseline was run with different parameters")
+        for change in results['comparison']['regressions']:
+            logger.error(f"Regression in {change['name']}: {change['baseline']:.6f}s -> "
+                         f"{change['current']:.6f}s ({change['ratio']:.2f}x)")
+        if results['comparison']['regressions']:
+            exit_code = 1
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
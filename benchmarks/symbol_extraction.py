@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+FORAI Symbol Extraction Benchmark
+
+Compares ``SymbolExtractor`` with ``FullWalkExtractor``, which reproduces how symbols
+were extracted before it: a pass that links every node to its parent, then one
+``ast.NodeVisitor`` for imports and one for definitions, each visiting the whole tree
+including expressions.
+
+Run it with ``python -m forai.benchmarks.symbol_extraction PATH...``.
+"""
+
+import argparse
+import ast
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+from forai.utils.ast_utils import SymbolExtractor
+
+
+class _ImportVisitor(ast.NodeVisitor):
+    """Collects imports from the whole tree."""
+
+    def __init__(self):
+        self.imports: List[Dict[str, Any]] = []
+
+    def visit_Import(self, node):
+        for name in node.names:
+            self.imports.append({'module': name.name, 'symbol': '*', 'alias': name.asname})
+        self.generic_visit(node)
+
+    def visit_ImportFrom(self, node):
+        if node.module is None:
+            return
+        for name in node.names:
+            self.imports.append({'module': node.module, 'symbol': name.name,
+                                 'alias': None if name.name == '*' else name.asname})
+        self.generic_visit(node)
+
+
+class _DefinitionVisitor(ast.NodeVisitor):
+    """Collects definitions and exports from the whole tree, including nested functions."""
+
+    def __init__(self):
+        self.definitions: List[Dict[str, Any]] = []
+        self.exports = set()
+
+    def visit_ClassDef(self, node):
+        bases = [base.id for base in node.bases if isinstance(base, ast.Name)]
+        self.definitions.append({'name': node.name, 'type': 'class', 'bases': bases,
+                                 'docstring': ast.get_docstring(node)})
+        if not node.name.startswith('_'):
+            self.exports.add(node.name)
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node):
+        self.definitions.append({'name': node.name, 'type': 'function', 'docstring': ast.get_docstring(node)})
+        if not node.name.startswith('_'):
+            self.exports.add(node.name)
+        self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Assign(self, node):
+        if not isinstance(getattr(node, 'parent', None), ast.Module):
+            return
+        for target in node.targets:
+            if isinstance(target, ast.Name) and not target.id.startswith('_'):
+                self.definitions.append({'name': target.id, 'type': 'variable'})
+                self.exports.add(target.id)
+        self.generic_visit(node)
+
+
+class FullWalkExtractor:
+    """Extracts symbols by visiting every node of a module AST."""
+
+    def __init__(self):
+        self.imports: List[Dict[str, Any]] = []
+        self.definitions: List[Dict[str, Any]] = []
+        self.exports = set()
+
+    def extract(self, tree: ast.Module) -> None:
+        """Extract symbols from a parsed module.
+
+        Args:
+            tree: The module AST; every node gets a ``parent`` attribute
+        """
+        for node in ast.walk(tree):
+            for child in ast.iter_child_nodes(node):
+                child.parent = node
+
+        import_visitor = _ImportVisitor()
+        import_visitor.visit(tree)
+        definition_visitor = _DefinitionVisitor()
+        definition_visitor.visit(tree)
+
+        self.imports = import_visitor.imports
+        self.definitions = definition_visitor.definitions
+        self.exports = definition_visitor.exports
+
+
+def find_python_files(paths: List[str]) -> List[str]:
+    """Get the Python files among and below a list of paths, skipping hidden directories."""
+    file_paths = []
+    for path in paths:
+        if os.path.isfile(path):
+            file_paths.append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d != '__pycache__')
+            file_paths.extend(os.path.join(root, name) for name in sorted(files) if name.endswith('.py'))
+    return file_paths
+
+
+def compare_extractors(file_paths: List[str], repeat: int = 5) -> Dict[str, Any]:
+    """Time both extractors on the same parsed files.
+
+    Args:
+        file_paths: The Python files
+        repeat: Number of runs; the best run is reported
+
+    Returns:
+        A dictionary with the number of files and the best times in seconds of parsing,
+        of each extractor and of the speedup of ``SymbolExtractor``
+    """
+    trees = []
+    parse_times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        trees = []
+        for file_path in file_paths:
+            with open(file_path, encoding='utf-8') as f:
+                try:
+                    trees.append(ast.parse(f.read(), filename=file_path))
+                except (SyntaxError, ValueError):
+                    continue
+        parse_times.append(time.perf_counter() - started)
+
+    results: Dict[str, Any] = {'files': len(trees), 'parse': round(min(parse_times), 6)}
+    for name, extractor_class in (('symbol_extractor', SymbolExtractor), ('full_walk', FullWalkExtractor)):
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for tree in trees:
+                extractor_class().extract(tree)
+            times.append(time.perf_counter() - started)
+        results[name] = round(min(times), 6)
+    if results['symbol_extractor']:
+        results['speedup'] = round(results['full_walk'] / results['symbol_extractor'], 1)
+    return results
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Compare SymbolExtractor with the full-tree visitors')
+    parser.add_argument('paths', nargs='+', help='Python files or directories to extract symbols from')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of runs (default: 5)')
+    args = parser.parse_args()
+
+    print(json.dumps(compare_extractors(find_python_files(args.paths), args.repeat), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+import os
+import random
+import logging
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Modules per generated package
+MODULES_PER_PACKAGE = 100
+
+
+def module_name(index: int) -> str:
+    """Get the dotted module name of a generated file."""
+    return f"pkg{index // MODULES_PER_PACKAGE}.mod{index}"
+
+
+def symbol_names(index: int, symbols: int) -> List[Tuple[str, str]]:
+    """Get the (name, type) pairs of the symbols defined by a generated file.
+
+    A third of the symbols are classes; every file also defines a ``setup`` function,
+    so that some names have many definitions.
+    """
+    names = [('setup', 'function')]
+    for k in range(max(0, symbols - 1)):
+        if k % 3 == 0:
+            names.append((f"Model{index}x{k}", 'class'))
+        else:
+            names.append((f"handle_{index}_{k}", 'function'))
+    return names
+
+
+def _plan_imports(files: int, fan_out: int, cycles: int, rng: random.Random) -> Dict[int, List[int]]:
+    """Choose the files each file imports from.
+
+    Files import from files with a lower index, so the import graph is acyclic, except
+    for ``cycles`` back edges, each of which closes a cycle of two files.
+    """
+    targets: Dict[int, List[int]] = {}
+    for i in range(files):
+        candidates = range(i)
+        targets[i] = sorted(rng.sample(candidates, min(fan_out, i)))
+
+    edges = [(i, j) for i in range(files) for j in targets[i]]
+    for i, j in rng.sample(edges, min(cycles, len(edges))):
+        targets[j].append(i)
+    return targets
+
+
+def _render_file(index: int, symbols: int, imports: List[int]) -> str:
+    """Render the source of a generated file."""
+    lines = [f'"""Generated module {module_name(index)}."""', '', 'import os', '']
+    imported_classes = []
+    for target in imports:
+        target_symbols = symbol_names(target, symbols)
+        imported = [name for name, _ in target_symbols[1:3]] or ['setup']
+        lines.append(f"from {module_name(target)} import {', '.join(imported)}")
+        imported_classes.extend(name for name, symbol_type in target_symbols[1:3] if symbol_type == 'class')
+    lines.append('')
+
+    for k, (name, symbol_type) in enumerate(symbol_names(index, symbols)):
+        lines.append('')
+        if symbol_type == 'class':
+            base = f"({imported_classes[k % len(imported_classes)]})" if imported_classes else ''
+            lines.extend([
+                f"class {name}{base}:",
+                f'    """Generated class {name}."""',
+                '',
+                '    def __init__(self, value=None):',
+                '        self.value = value',
+                '',
+                '    def describe(self):',
+                '        return f"{type(self).__name__}({self.value})"',
+                ''
+            ])
+        else:
+            lines.extend([
+                f"def {name}(items=None):",
+                f'    """Generated function {name}."""',
+                '    total = 0',
+                '    for item in items or ():',
+                '        total += len(str(item))',
+                '    return os.path.join(str(total), __name__)',
+                ''
+            ])
+
+    lines.append('')
+    lines.append(f"__all__ = [{', '.join(repr(name) for name, _ in symbol_names(index, symbols))}]")
+    return '\n'.join(lines) + '\n'
+
+
+def generate_repo(path: str, files: int = 200, symbols: int = 10, fan_out: int = 3,
+                  cycles: int = 5, seed: int = 0) -> Dict[str, int]:
+    """Generate a synthetic Python repository.
+
+    Files are spread over packages of ``MODULES_PER_PACKAGE`` modules. Each file
+    defines ``symbols`` classes and functions and imports two symbols from each of
+    ``fan_out`` other files; its first class subclasses an imported class. The same
+    arguments always generate the same repository.
+
+    Args:
+        path: Directory to generate the repository in; it is created if needed
+        files: Number of files
+        symbols: Number of symbols defined per file
+        fan_out: Number of files each file imports from (fewer for the first files)
+        cycles: Number of import cycles
+        seed: Seed of the random choices
+
+    Returns:
+        A dictionary with the numbers of files, symbols, imports and cycles generated
+    """
+    rng = random.Random(seed)
+    plan = _plan_imports(files, fan_out, cycles, rng)
+
+    for package in range((files + MODULES_PER_PACKAGE - 1) // MODULES_PER_PACKAGE):
+        package_dir = os.path.join(path, f"pkg{package}")
+        os.makedirs(package_dir, exist_ok=True)
+        with open(os.path.join(package_dir, '__init__.py'), 'w') as f:
+            f.write('')
+
+    for i in range(files):
+        file_path = os.path.join(path, *module_name(i).split('.')) + '.py'
+        with open(file_path, 'w') as f:
+            f.write(_render_file(i, symbols, plan[i]))
+
+    stats = {
+        'files': files,
+        'symbols': files * max(1, symbols),
+        'imports': sum(len(targets) for targets in plan.values()),
+        'cycles': min(cycles, sum(min(fan_out, i) for i in range(files)))
+    }
+    logger.info(f"Generated {stats['files']} files with {stats['symbols']} symbols in {path}")
+    return stats
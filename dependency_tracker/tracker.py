@@ -1,20 +1,32 @@
 import os
-import re
+import json
 import logging
-from typing import Dict, List, Set, Any, Optional
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Set, Any, Optional, Union
 
 from forai.symbol_registry import SymbolRegistry
-from forai.static_analyzer import StaticAnalyzer
-from forai.header_generator import HeaderGenerator
+from forai.header_reader import read_header
+from forai.utils.file_utils import atomic_write_text
+
+if TYPE_CHECKING:
+    # Passed in by the callers that update headers; dependency queries do not need them
+    from forai.static_analyzer import StaticAnalyzer
+    from forai.header_generator import HeaderGenerator
 
 logger = logging.getLogger(__name__)
 
 class DependencyTracker:
     """Tracks dependencies between Python files.
     
-    Builds a dependency graph from FORAI headers and updates affected files when dependencies change.
+    Keeps a forward index (file ID -> import references from its IMP header section)
+    and a reverse index (file ID -> IDs of the files importing from it). The forward
+    index is persisted in ``.forai/dependencies.json`` and the reverse index is derived
+    from it on load. Both are updated incrementally as headers are written, so finding
+    the dependents of a file does not read any headers. If the index file is missing
+    it is rebuilt from the headers once.
     """
     
+    INDEX_VERSION = 1
+    
     def __init__(self, symbol_registry: SymbolRegistry):
         """Initialize the dependency tracker.
         
@@ -22,16 +34,127 @@ class DependencyTracker:
             symbol_registry: The symbol registry
         """
         self.registry = symbol_registry
+        self.index_path = os.path.join(symbol_registry.workspace_path, '.forai', 'dependencies.json')
+        self._forward: Optional[Dict[str, List[str]]] = None
+        self._reverse: Dict[str, Set[str]] = {}
+        self._index_dirty = False
         
-    def build_dependency_graph(self) -> Dict[str, List[str]]:
-        """Build a dependency graph for the entire workspace.
+    def _ensure_index(self) -> None:
+        """Load the dependency index, rebuilding it from the headers if it is missing or unreadable."""
+        if self._forward is not None:
+            return
+            
+        forward = None
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r') as f:
+                    data = json.load(f)
+                if data.get('version') == self.INDEX_VERSION:
+                    forward = data.get('imports', {})
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Failed to load dependency index {self.index_path}: {e}")
+                
+        if forward is None:
+            self.rebuild_index()
+            return
+            
+        self._forward = {}
+        self._reverse = {}
+        for file_id, imports in forward.items():
+            self._set_imports(file_id, imports)
+            
+    def _set_imports(self, file_id: str, imports: Iterable[str]) -> bool:
+        """Replace the import references of a file in the forward and reverse index.
+        
+        Returns:
+            True if the file's imports changed
+        """
+        imports = sorted(set(imports))
+        previous = self._forward.get(file_id)
+        if previous == imports:
+            return False
+            
+        for dep_file_id in self._dependency_ids(file_id, previous or []):
+            dependents = self._reverse.get(dep_file_id)
+            if dependents is not None:
+                dependents.discard(file_id)
+                if not dependents:
+                    del self._reverse[dep_file_id]
+                    
+        self._forward[file_id] = imports
+        for dep_file_id in self._dependency_ids(file_id, imports):
+            self._reverse.setdefault(dep_file_id, set()).add(file_id)
+        return True
+        
+    def _dependency_ids(self, file_id: str, imports: Iterable[str]) -> Set[str]:
+        """Get the IDs of the files referenced by import references, excluding the file itself."""
+        dep_file_ids = set()
+        for imp in imports:
+            if ':' in imp:
+                dep_file_id = imp.split(':', 1)[0]
+                if dep_file_id and dep_file_id != file_id:  # Skip self-references
+                    dep_file_ids.add(dep_file_id)
+        return dep_file_ids
+        
+    def set_file_imports(self, file_id: str, imports: Iterable[str]) -> bool:
+        """Record the import references written to a file's header.
         
+        Args:
+            file_id: The file ID
+            imports: The import references (e.g., "F101:C1")
+            
         Returns:
-            A dictionary mapping file IDs to lists of dependent file IDs
+            True if the file's imports changed
         """
-        logger.info("Building dependency graph")
+        self._ensure_index()
+        changed = self._set_imports(file_id, imports)
+        if changed:
+            self._index_dirty = True
+        return changed
+        
+    def retain_files(self, file_ids: Iterable[str]) -> None:
+        """Drop all files except the given ones from the dependency index.
         
-        graph = {}
+        Args:
+            file_ids: The IDs of the files that still exist
+        """
+        self._ensure_index()
+        keep = set(file_ids)
+        self.remove_files([file_id for file_id in self._forward if file_id not in keep])
+            
+    def remove_files(self, file_ids: Iterable[str]) -> None:
+        """Drop files from the dependency index.
+        
+        Args:
+            file_ids: The IDs of the removed files
+        """
+        self._ensure_index()
+        for file_id in file_ids:
+            if file_id in self._forward:
+                self._set_imports(file_id, [])
+                del self._forward[file_id]
+                self._index_dirty = True
+                
+    def get_file_imports(self, file_id: str) -> List[str]:
+        """Get the import references of a file from the dependency index.
+        
+        Args:
+            file_id: The file ID
+            
+        Returns:
+            The import references recorded for the file
+        """
+        self._ensure_index()
+        return list(self._forward.get(file_id, []))
+        
+    def rebuild_index(self) -> Dict[str, int]:
+        """Rebuild the dependency index from the headers of all registered files.
+        
+        Returns:
+            A dictionary with the number of indexed files and dependency edges
+        """
+        self._forward = {}
+        self._reverse = {}
         for file_id, file_info in self.registry.registry['files'].items():
             file_path = os.path.join(self.registry.workspace_path, file_info['path'])
             
@@ -39,20 +162,43 @@ class DependencyTracker:
             if not os.path.exists(file_path):
                 continue
                 
-            # Parse header to get dependencies
-            header_imports = self._get_header_imports(file_path)
+            self._set_imports(file_id, self._get_header_imports(file_path))
             
-            # Add dependencies to graph
-            dependent_files = []
-            for imp in header_imports:
-                if ':' in imp:
-                    dep_file_id = imp.split(':', 1)[0]
-                    if dep_file_id and dep_file_id != file_id:  # Skip self-references
-                        dependent_files.append(dep_file_id)
-            
-            graph[file_id] = dependent_files
+        self._index_dirty = True
+        self.save_index()
+        
+        return {
+            'files': len(self._forward),
+            'edges': sum(len(dependents) for dependents in self._reverse.values())
+        }
+        
+    def save_index(self) -> bool:
+        """Write the dependency index to disk if it changed.
+        
+        Returns:
+            True if the index was written
+        """
+        if not self._index_dirty:
+            return False
             
-        return graph
+        atomic_write_text(self.index_path, json.dumps({
+            'version': self.INDEX_VERSION,
+            'imports': self._forward
+        }))
+        self._index_dirty = False
+        return True
+        
+    def build_dependency_graph(self) -> Dict[str, List[str]]:
+        """Build a dependency graph for the entire workspace.
+        
+        Returns:
+            A dictionary mapping file IDs to lists of the file IDs they import from
+        """
+        self._ensure_index()
+        return {
+            file_id: sorted(self._dependency_ids(file_id, imports))
+            for file_id, imports in self._forward.items()
+        }
     
     def get_affected_files(self, changed_file_id: str) -> List[str]:
         """Get files that depend on the changed file.
@@ -65,45 +211,208 @@ class DependencyTracker:
         """
         logger.info(f"Getting affected files for {changed_file_id}")
         
-        graph = self.build_dependency_graph()
-        affected = []
+        self._ensure_index()
+        return sorted(self._reverse.get(changed_file_id, ()))
+    
+    def get_affected_components(self, changed_file_ids: Union[str, Iterable[str]]) -> List[List[str]]:
+        """Get all files that depend on the changed files, directly or transitively.
+        
+        Import cycles among the affected files are collapsed into strongly connected
+        components (Tarjan's algorithm), which are returned in topological order: every
+        component comes after the components it imports from.
+        
+        Args:
+            changed_file_ids: The file ID of the changed file, or the IDs of several changed files
+            
+        Returns:
+            The affected components in topological order, each a sorted list of file IDs.
+            A changed file is only included if it is part of an import cycle or depends
+            on another changed file.
+        """
+        roots = self._as_file_ids(changed_file_ids)
+        logger.info(f"Getting transitively affected files for {', '.join(roots)}")
+        
+        self._ensure_index()
+        
+        def dependents(file_id: str) -> List[str]:
+            return sorted(self._reverse.get(file_id, ()))
         
-        # Find all files that directly import from the changed file
-        for file_id, dependencies in graph.items():
-            if changed_file_id in dependencies:
-                affected.append(file_id)
+        # Iterative Tarjan over the dependents reachable from the changed files
+        index: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        stack: List[str] = []
+        on_stack: Set[str] = set()
+        reached: Set[str] = set()
+        components: List[List[str]] = []
+        
+        for root in roots:
+            if root in index:
+                continue
                 
-        return affected
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(dependents(root)))]
+            while work:
+                file_id, children = work[-1]
+                child = next(children, None)
+                if child is not None:
+                    reached.add(child)
+                    if child not in index:
+                        index[child] = lowlink[child] = len(index)
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(dependents(child))))
+                    elif child in on_stack:
+                        lowlink[file_id] = min(lowlink[file_id], index[child])
+                    continue
+                    
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[file_id])
+                if lowlink[file_id] == index[file_id]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == file_id:
+                            break
+                    components.append(sorted(component))
+                    
+        # Tarjan emits components with the dependents first
+        components.reverse()
+        return [component for component in components
+                if len(component) > 1 or component[0] in reached]
     
-    def update_dependent_headers(self, changed_file_id: str, analyzer: StaticAnalyzer, 
-                              header_generator: HeaderGenerator, enable_runtime: bool = False) -> None:
-        """Update headers in files that depend on the changed file.
+    def update_dependent_headers(self, changed_file_ids: Union[str, Iterable[str]], analyzer: 'StaticAnalyzer', 
+                              header_generator: 'HeaderGenerator',
+                              build_file_data: Optional[Callable[[str], Dict[str, Any]]] = None,
+                              transitive: bool = False, skip_file_ids: Iterable[str] = ()) -> List[str]:
+        """Update headers in files that depend on the changed files.
+        
+        By default only the direct importers of the changed files are updated, each
+        once. In transitive mode the affected files are visited in topological order
+        and a file is only re-analyzed if one of the files it imports from changed, so
+        propagation stops at files whose regenerated header did not change. Files in
+        an import cycle are revisited until none of their headers change.
         
         Args:
-            changed_file_id: The file ID of the changed file
+            changed_file_ids: The file ID of the changed file, or the IDs of several changed files
             analyzer: The static analyzer
             header_generator: The header generator
-            enable_runtime: Whether to use runtime introspection
+            build_file_data: Function analyzing a dependent file, such as
+                ``WorkspaceUpdater.build_file_data`` to merge runtime introspection
+                results, or None for the static analyzer only
+            transitive: Whether to follow dependents of dependents
+            skip_file_ids: IDs of files whose headers are already up to date and are not re-analyzed
+            
+        Returns:
+            The file IDs of the files whose header was modified
         """
-        logger.info(f"Updating dependent headers for {changed_file_id}")
+        roots = self._as_file_ids(changed_file_ids)
+        skip = set(skip_file_ids)
+        if build_file_data is None:
+            build_file_data = analyzer.analyze_file
+        logger.info(f"Updating dependent headers for {', '.join(roots)}")
         
-        affected_files = self.get_affected_files(changed_file_id)
-        for file_id in affected_files:
-            file_info = self.registry.registry['files'].get(file_id)
-            if not file_info:
-                continue
-                
-            file_path = os.path.join(self.registry.workspace_path, file_info['path'])
+        modified = []
+        if not transitive:
+            self._ensure_index()
+            affected = set()
+            for file_id in roots:
+                affected.update(self._reverse.get(file_id, ()))
+            for file_id in sorted(affected - skip):
+                if self._update_header(file_id, build_file_data, header_generator):
+                    modified.append(file_id)
+            self.save_index()
+            return modified
             
-            if os.path.exists(file_path):
-                logger.info(f"Updating header for {file_path}")
-                
-                # Re-analyze the file
-                file_data = analyzer.analyze_file(file_path)
-                
-                # Generate and update header
-                header = header_generator.generate_header(file_data)
-                header_generator.update_file_header(file_path, header)
+        changed = set(roots)
+        for component in self.get_affected_components(roots):
+            members = set(component)
+            pending = [file_id for file_id in component
+                       if file_id not in skip and self._imports_from(file_id, changed)]
+            
+            # Bound the number of visits in case the headers of a cycle never settle
+            budget = len(component) * len(component)
+            while pending and budget > 0:
+                file_id = pending.pop(0)
+                budget -= 1
+                if not self._update_header(file_id, build_file_data, header_generator):
+                    continue
+                    
+                if file_id not in modified:
+                    modified.append(file_id)
+                changed.add(file_id)
+                for dependent in sorted(self._reverse.get(file_id, ())):
+                    if dependent in members and dependent not in skip and dependent not in pending:
+                        pending.append(dependent)
+                        
+        self.save_index()
+        return modified
+    
+    @staticmethod
+    def _as_file_ids(file_ids: Union[str, Iterable[str]]) -> List[str]:
+        """Normalize a file ID or an iterable of file IDs to a de-duplicated list."""
+        if isinstance(file_ids, str):
+            return [file_ids]
+        return list(dict.fromkeys(file_ids))
+    
+    def _imports_from(self, file_id: str, file_ids: Set[str]) -> bool:
+        """Check whether a file imports from any of the given files."""
+        return not file_ids.isdisjoint(self._dependency_ids(file_id, self._forward.get(file_id, [])))
+    
+    def _update_header(self, file_id: str, build_file_data: Callable[[str], Dict[str, Any]],
+                       header_generator: 'HeaderGenerator') -> bool:
+        """Re-analyze a registered file and update its header and dependency index entry.
+        
+        Args:
+            file_id: The file ID
+            build_file_data: Function analyzing the file
+            header_generator: The header generator
+            
+        Returns:
+            True if the file's header was modified
+        """
+        file_info = self.registry.registry['files'].get(file_id)
+        if not file_info:
+            return False
+            
+        file_path = os.path.join(self.registry.workspace_path, file_info['path'])
+        if not os.path.exists(file_path):
+            return False
+            
+        logger.info(f"Updating header for {file_path}")
+        
+        # Re-analyze the file
+        file_data = build_file_data(file_path)
+        
+        # Generate and update header
+        header = header_generator.generate_header(file_data)
+        modified = header_generator.update_file_header(file_path, header)
+        self.set_file_imports(file_id, self.header_imports(file_data))
+        self.registry.record_header(file_data)
+        return modified
+    
+    @staticmethod
+    def header_imports(file_data: Dict[str, Any]) -> Set[str]:
+        """Get the import references that the header of analyzed file data contains.
+        
+        Args:
+            file_data: A dictionary with file_id and imports, as returned by the analyzer
+            
+        Returns:
+            The import references (e.g., "F101:C1")
+        """
+        imports = set()
+        for imp in file_data.get('imports', []):
+            file_id = imp.get('file_id', '')
+            symbol_id = imp.get('symbol_id', '*')
+            if file_id:
+                imports.add(f"{file_id}:{symbol_id}")
+        return imports
     
     def _get_header_imports(self, file_path: str) -> List[str]:
         """Extract imports from a FORAI header.
@@ -114,27 +423,5 @@ class DependencyTracker:
         Returns:
             A list of import references (e.g., "F101:C1")
         """
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read(2000)  # Read first 2000 characters to find header
-        except Exception as e:
-            logger.error(f"Failed to read file {file_path}: {e}")
-            return []
-            
-        # Look for header
-        header_match = re.search(r'//FORAI:(.*?)//', content)
-        if not header_match:
-            return []
-            
-        header = header_match.group(1)
-        
-        # Extract imports
-        imp_match = re.search(r'IMP\[(.*?)\]', header)
-        if not imp_match:
-            return []
-            
-        imports_str = imp_match.group(1)
-        if not imports_str:
-            return []
-            
-        return [imp.strip() for imp in imports_str.split(',')]
\ No newline at end of file
+        header = read_header(file_path)
+        return header.import_refs() if header is not None else []
\ No newline at end of file
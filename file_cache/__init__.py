@@ -0,0 +1,3 @@
+from forai.file_cache.cache import FileCache, hash_file
+
+__all__ = ["FileCache", "hash_file"]
\ No newline at end of file
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import logging
+from typing import Dict, Iterable, Optional, Any, Tuple
+
+from forai.utils.file_utils import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+# Lookup results
+STAT_HIT = 'stat'
+HASH_HIT = 'hash'
+MISS = 'miss'
+
+
+def hash_file(file_path: str) -> str:
+    """Compute the content hash of a file.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        The hex digest of the file content
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileCache:
+    """Per-file analysis cache stored in ``.forai/cache.json``.
+
+    Entries are keyed by workspace-relative path and hold the file's mtime, size and
+    content hash together with its last ``parse_python_file`` result and the header
+    written for it. A file whose mtime and size are unchanged is a hit without being
+    opened; otherwise its content hash is compared before it has to be parsed again.
+    """
+
+    VERSION = 2
+
+    def __init__(self, workspace_path: str):
+        """Initialize the file cache.
+
+        Args:
+            workspace_path: Path to the workspace root directory
+        """
+        self.workspace_path = workspace_path
+        self.cache_path = os.path.join(workspace_path, '.forai', 'cache.json')
+        self.entries: Dict[str, Dict[str, Any]] = self._load()
+        self.stats = {'stat_hits': 0, 'hash_hits': 0, 'misses': 0}
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Load the cache from disk, discarding it if it is unreadable or outdated."""
+        if not os.path.exists(self.cache_path):
+            return {}
+
+        try:
+            with open(self.cache_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Failed to load cache file {self.cache_path}: {e}")
+            return {}
+
+        if data.get('version') != self.VERSION:
+            return {}
+        return data.get('files', {})
+
+    def save(self) -> bool:
+        """Write the cache to disk if it changed.
+
+        Returns:
+            True if the cache was written
+        """
+        if not self._dirty:
+            return False
+
+        atomic_write_text(self.cache_path, json.dumps({'version': self.VERSION, 'files': self.entries}))
+        self._dirty = False
+        return True
+
+    def _key(self, file_path: str) -> str:
+        """Get the cache key of a file."""
+        return os.path.relpath(file_path, self.workspace_path)
+
+    def lookup(self, file_path: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Look up a file in the cache.
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            A (result, entry) pair where result is STAT_HIT, HASH_HIT or MISS and entry
+            is the cached entry for hits and None for misses
+        """
+        entry = self.entries.get(self._key(file_path))
+        if entry is not None:
+            try:
+                st = os.stat(file_path)
+                if st.st_mtime_ns == entry['mtime_ns'] and st.st_size == entry['size']:
+                    self.stats['stat_hits'] += 1
+                    return STAT_HIT, entry
+
+                if st.st_size == entry['size'] and hash_file(file_path) == entry['hash']:
+                    # Same content with a new mtime; remember the new stat data
+                    entry['mtime_ns'] = st.st_mtime_ns
+                    self._dirty = True
+                    self.stats['hash_hits'] += 1
+                    return HASH_HIT, entry
+            except OSError:
+                pass
+
+        self.stats['misses'] += 1
+        return MISS, None
+
+    def record(self, file_path: str, parse_result: Dict[str, Any], header: str) -> None:
+        """Record the current state of a file after its header has been updated.
+
+        Args:
+            file_path: Path to the file
+            parse_result: The ``parse_python_file`` result for the file
+            header: The FORAI header of the file
+        """
+        try:
+            st = os.stat(file_path)
+            content_hash = hash_file(file_path)
+        except OSError as e:
+            logger.debug(f"Failed to cache {file_path}: {e}")
+            self.entries.pop(self._key(file_path), None)
+            return
+
+        self.entries[self._key(file_path)] = {
+            'mtime_ns': st.st_mtime_ns,
+            'size': st.st_size,
+            'hash': content_hash,
+            'parse': parse_result,
+            'header': header
+        }
+        self._dirty = True
+
+    def prune(self, file_paths: Iterable[str]) -> None:
+        """Drop entries of files that are no longer present.
+
+        Args:
+            file_paths: Paths of all files that still exist
+        """
+        keep = {self._key(file_path) for file_path in file_paths}
+        stale = [key for key in self.entries if key not in keep]
+        for key in stale:
+            del self.entries[key]
+        if stale:
+            self._dirty = True
@@ -0,0 +1,4 @@
+from forai.file_watcher.watcher import Watcher
+from forai.file_watcher.backends import InotifyBackend, PollingBackend, open_backend
+
+__all__ = ["Watcher", "InotifyBackend", "PollingBackend", "open_backend"]
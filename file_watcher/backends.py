@@ -0,0 +1,335 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from forai.utils.scanner import IGNORE_FILES, IgnoreMatcher, scan_entries, scan_files, walk
+
+logger = logging.getLogger(__name__)
+
+# Event kinds reported by the backends
+CHANGED = 'changed'
+DELETED = 'deleted'
+MOVED = 'moved'
+DELETED_DIR = 'deleted_dir'
+RESCAN = 'rescan'
+
+# An event is (kind, path, new_path); new_path is only set for MOVED
+Event = Tuple[str, str, Optional[str]]
+
+class WatchBackend:
+    """Source of file system events for the Python files in a workspace.
+
+    Paths ignored by the workspace scanner (see ``forai.utils.scanner``) are not reported.
+    """
+
+    def __init__(self, workspace_path: str):
+        """Initialize the backend.
+
+        Args:
+            workspace_path: Path to the workspace root directory
+        """
+        self.workspace_path = os.path.abspath(workspace_path)
+        self.matcher = IgnoreMatcher(self.workspace_path)
+
+    def walk_python_files(self, root: str) -> List[str]:
+        """Find the Python files below a directory of the workspace that are not ignored."""
+        return list(scan_files(root, matcher=self.matcher))
+
+    def read(self, timeout: Optional[float]) -> List[Event]:
+        """Wait for events.
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait until events arrive
+
+        Returns:
+            The events, or an empty list if the timeout expired
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release the resources of the backend."""
+
+
+class PollingBackend(WatchBackend):
+    """Detects changes by comparing periodic snapshots of the workspace.
+
+    A snapshot maps each Python file to its inode, mtime and size. A deleted path and
+    a created path with the same inode and size between two snapshots are reported
+    as a rename.
+    """
+
+    name = 'polling'
+
+    def __init__(self, workspace_path: str, interval: float = 1.0):
+        """Initialize the polling backend.
+
+        Args:
+            workspace_path: Path to the workspace root directory
+            interval: Seconds between snapshots
+        """
+        super().__init__(workspace_path)
+        self.interval = interval
+        self._snapshot = self._take_snapshot()
+        self._next_poll = time.monotonic() + interval
+
+    def _take_snapshot(self) -> Dict[str, Tuple[int, int, int]]:
+        """Stat every Python file in the workspace."""
+        # Ignore files may have been edited since the last snapshot
+        self.matcher = IgnoreMatcher(self.workspace_path)
+        snapshot = {}
+        for entry in scan_entries(self.workspace_path, matcher=self.matcher):
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            snapshot[entry.path] = (st.st_ino, st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def read(self, timeout: Optional[float]) -> List[Event]:
+        wait = self._next_poll - time.monotonic()
+        if timeout is not None and timeout < wait:
+            time.sleep(max(0.0, timeout))
+            return []
+        if wait > 0:
+            time.sleep(wait)
+        self._next_poll = time.monotonic() + self.interval
+
+        snapshot = self._take_snapshot()
+        previous, self._snapshot = self._snapshot, snapshot
+
+        created = {path: stat for path, stat in snapshot.items() if path not in previous}
+        deleted = {path: stat for path, stat in previous.items() if path not in snapshot}
+
+        events: List[Event] = []
+        by_inode = {(stat[0], stat[2]): path for path, stat in created.items()}
+        for old_path, stat in deleted.items():
+            new_path = by_inode.pop((stat[0], stat[2]), None)
+            if new_path is not None:
+                events.append((MOVED, old_path, new_path))
+                del created[new_path]
+            else:
+                events.append((DELETED, old_path, None))
+
+        events.extend((CHANGED, path, None) for path in created)
+        events.extend((CHANGED, path, None) for path, stat in snapshot.items()
+                      if path in previous and previous[path] != stat)
+        return events
+
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+_WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+               | IN_DELETE_SELF | IN_ONLYDIR)
+_IGNORE_FILE_MASK = IN_CLOSE_WRITE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+_EVENT_HEADER = struct.Struct('iIII')
+_READ_SIZE = 1024 * 1024
+
+
+class InotifyBackend(WatchBackend):
+    """Linux inotify backend using one watch per workspace directory.
+
+    Moves within the workspace are paired by their inotify cookie. If the kernel event
+    queue overflows, a RESCAN event is reported because events were lost.
+    """
+
+    name = 'inotify'
+
+    def __init__(self, workspace_path: str):
+        """Initialize the inotify backend.
+
+        Args:
+            workspace_path: Path to the workspace root directory
+
+        Raises:
+            OSError: If inotify is not available or the watch limit is reached
+        """
+        super().__init__(workspace_path)
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._libc.inotify_init1.argtypes = [ctypes.c_int]
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+
+        self._paths: Dict[int, str] = {}
+        # Unpaired IN_MOVED_FROM events by cookie
+        self._moved_from: Dict[int, Tuple[str, bool]] = {}
+        try:
+            self._add_tree(self.workspace_path)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, directory: str) -> None:
+        """Watch a single directory."""
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise OSError(err, f"Cannot watch {directory}: {os.strerror(err)}")
+        self._paths[wd] = directory
+
+    def _add_tree(self, root: str) -> None:
+        """Watch a directory and all its subdirectories that are not ignored."""
+        if self.matcher.is_ignored(root, is_dir=True):
+            return
+        for directory, _ in walk(root, self.matcher):
+            self._add_watch(directory)
+
+    def _rename_tree(self, old_root: str, new_root: str) -> None:
+        """Update the watched paths of a directory tree that was moved."""
+        prefix = old_root + os.sep
+        for wd, path in self._paths.items():
+            if path == old_root:
+                self._paths[wd] = new_root
+            elif path.startswith(prefix):
+                self._paths[wd] = new_root + path[len(old_root):]
+
+    def read(self, timeout: Optional[float]) -> List[Event]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return self._flush_moves()
+
+        events: List[Event] = []
+        while True:
+            try:
+                data = os.read(self._fd, _READ_SIZE)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            self._decode(data, events)
+
+        # A move whose other half has not arrived yet is paired on the next read
+        if not self._moved_from:
+            return events
+        return events + self._flush_moves(wait=True)
+
+    def _flush_moves(self, wait: bool = False) -> List[Event]:
+        """Report moves out of the workspace whose IN_MOVED_TO never arrived."""
+        if wait and select.select([self._fd], [], [], 0.01)[0]:
+            return []
+
+        events: List[Event] = []
+        for path, is_dir in self._moved_from.values():
+            if is_dir:
+                events.append((DELETED_DIR, path, None))
+            elif path.endswith('.py'):
+                events.append((DELETED, path, None))
+        self._moved_from.clear()
+        return events
+
+    def _decode(self, data: bytes, events: List[Event]) -> None:
+        """Decode raw inotify events into watcher events."""
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                logger.warning("inotify event queue overflowed; rescanning the workspace")
+                events.append((RESCAN, self.workspace_path, None))
+                self._add_tree(self.workspace_path)
+                continue
+            if mask & IN_IGNORED:
+                self._paths.pop(wd, None)
+                continue
+
+            directory = self._paths.get(wd)
+            if directory is None or mask & IN_DELETE_SELF:
+                continue
+
+            path = os.path.join(directory, name)
+            is_dir = bool(mask & IN_ISDIR)
+            if not is_dir and name in IGNORE_FILES and mask & _IGNORE_FILE_MASK:
+                # The set of ignored paths changed; rescan with the new rules
+                logger.info(f"{path} changed; rescanning the workspace")
+                self.matcher = IgnoreMatcher(self.workspace_path)
+                self._add_tree(self.workspace_path)
+                events.append((RESCAN, self.workspace_path, None))
+                continue
+            if self.matcher.is_ignored(path, is_dir):
+                continue
+            if not is_dir and not name.endswith('.py'):
+                # Temporary files that are renamed over a Python file surface as a change of the target
+                if mask & IN_MOVED_FROM:
+                    self._moved_from[cookie] = (path, False)
+                continue
+
+            if mask & IN_MOVED_FROM:
+                self._moved_from[cookie] = (path, is_dir)
+            elif mask & IN_MOVED_TO:
+                source = self._moved_from.pop(cookie, None)
+                if source is not None and source[0].endswith('.py') and not is_dir:
+                    events.append((MOVED, source[0], path))
+                elif source is not None and is_dir:
+                    self._rename_tree(source[0], path)
+                    for file_path in self.walk_python_files(path):
+                        events.append((MOVED, source[0] + file_path[len(path):], file_path))
+                elif is_dir:
+                    self._add_tree(path)
+                    events.extend((CHANGED, file_path, None) for file_path in self.walk_python_files(path))
+                else:
+                    events.append((CHANGED, path, None))
+            elif mask & IN_CREATE:
+                if is_dir:
+                    # Files created before the watch was added would otherwise be missed
+                    self._add_tree(path)
+                    events.extend((CHANGED, file_path, None) for file_path in self.walk_python_files(path))
+            elif mask & IN_CLOSE_WRITE:
+                events.append((CHANGED, path, None))
+            elif mask & IN_DELETE and not is_dir:
+                events.append((DELETED, path, None))
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def open_backend(workspace_path: str, backend: Optional[str] = None, interval: float = 1.0) -> WatchBackend:
+    """Open a watch backend for a workspace.
+
+    Args:
+        workspace_path: Path to the workspace root directory
+        backend: 'inotify', 'polling' or None to use inotify where available
+        interval: Seconds between snapshots of the polling backend
+
+    Returns:
+        The watch backend
+    """
+    if backend in (None, InotifyBackend.name) and sys.platform.startswith('linux'):
+        try:
+            return InotifyBackend(workspace_path)
+        except (OSError, AttributeError) as e:
+            if backend == InotifyBackend.name:
+                raise
+            logger.warning(f"inotify is not available ({e}); falling back to polling")
+    elif backend == InotifyBackend.name:
+        raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+
+    return PollingBackend(workspace_path, interval)
@@ -0,0 +1,203 @@
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+from forai.workspace_updater import WorkspaceUpdater
+from forai.file_watcher.backends import (
+    CHANGED, DELETED, MOVED, DELETED_DIR, RESCAN, Event, WatchBackend, open_backend
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Watcher:
+    """Keeps the FORAI headers of a workspace current as files change.
+
+    Events are collected until none has arrived for ``debounce`` seconds (or the
+    batch is ``max_delay`` seconds old) and are then coalesced: repeated changes to a
+    file count once, a file created and deleted in the same batch is ignored, and
+    chained renames collapse to one. The batch is applied with
+    ``WorkspaceUpdater.apply_changes``, so renames keep their file ID and deletions
+    are removed from the registry.
+
+    Files whose header the watcher itself rewrote are remembered with their mtime and
+    size, and the events caused by those writes are dropped, so header updates do
+    not trigger further updates.
+    """
+
+    def __init__(self, updater: WorkspaceUpdater, backend: Optional[WatchBackend] = None,
+                 debounce: float = 0.2, max_delay: float = 2.0, transitive: bool = False):
+        """Initialize the watcher.
+
+        Args:
+            updater: The workspace updater used to apply changes
+            backend: The event source, or None to use inotify where available and polling otherwise
+            debounce: Seconds without events after which a batch is applied
+            max_delay: Maximum age in seconds of a batch before it is applied
+            transitive: Whether to also update dependents of dependents whose header changed
+        """
+        self.updater = updater
+        self.registry = updater.registry
+        self.backend = backend if backend is not None else open_backend(self.registry.workspace_path)
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.transitive = transitive
+        self._own_writes: Dict[str, Tuple[int, int]] = {}
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        """Stop ``run`` after the current batch."""
+        self._stop.set()
+
+    def run(self, on_batch: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+        """Watch the workspace until ``stop`` is called.
+
+        Args:
+            on_batch: Called with the result of every applied batch
+        """
+        logger.info(f"Watching {self.registry.workspace_path} with the {self.backend.name} backend")
+        events: List[Event] = []
+        first_event = last_event = 0.0
+        try:
+            while not self._stop.is_set():
+                timeout = 0.5
+                if events:
+                    now = time.monotonic()
+                    timeout = max(0.0, min(last_event + self.debounce, first_event + self.max_delay) - now)
+
+                new_events = self.backend.read(timeout)
+                now = time.monotonic()
+                if new_events:
+                    if not events:
+                        first_event = now
+                    last_event = now
+                    events.extend(new_events)
+                    if now < first_event + self.max_delay:
+                        continue
+
+                if events and (now >= last_event + self.debounce or now >= first_event + self.max_delay):
+                    result = self.process_events(events)
+                    events = []
+                    if result is not None and on_batch is not None:
+                        on_batch(result)
+        finally:
+            self.backend.close()
+
+    def update_all(self) -> Dict[str, Any]:
+        """Bring the headers of all files up to date, e.g. before watching or after lost events.
+
+        Returns:
+            The ``update_all`` result
+        """
+        def on_file(record: Dict[str, Any]) -> None:
+            # Remember each header write as it happens; files edited meanwhile by the
+            # user but not rewritten here still trigger events
+            if record.get('modified'):
+                self._remember_writes([record['file_path']])
+
+        with self.registry.batch():
+            return self.updater.update_all(on_file=on_file)
+
+    def process_events(self, events: List[Event]) -> Optional[Dict[str, Any]]:
+        """Coalesce a batch of events and apply it.
+
+        Args:
+            events: The events of the batch, in the order they occurred
+
+        Returns:
+            The ``apply_changes`` result (or the ``update_all`` result after a rescan),
+            or None if nothing needed to be done
+        """
+        if any(kind == RESCAN for kind, _, _ in events):
+            result = self.update_all()
+            result['rescan'] = True
+            return result
+
+        changed, renamed, deleted = self._coalesce(events)
+        if not (changed or renamed or deleted):
+            return None
+
+        logger.info(f"Applying {len(changed)} changed, {len(renamed)} renamed and {len(deleted)} deleted files")
+        with self.registry.batch():
+            result = self.updater.apply_changes(changed, renamed, deleted, transitive=self.transitive)
+        self._remember_writes(result['written'])
+        return result
+
+    def _coalesce(self, events: List[Event]) -> Tuple[List[str], List[Tuple[str, str]], List[str]]:
+        """Reduce a batch of events to the changed, renamed and deleted files it leaves behind."""
+        changed: Dict[str, None] = {}
+        renames: Dict[str, str] = {}  # new path -> original path
+        deleted: Dict[str, None] = {}
+
+        for kind, path, new_path in events:
+            if kind == CHANGED:
+                if not self._is_own_write(path):
+                    changed[path] = None
+                deleted.pop(path, None)
+            elif kind == DELETED:
+                changed.pop(path, None)
+                deleted[path] = None
+                if path in renames:
+                    deleted[renames.pop(path)] = None
+                    del deleted[path]
+            elif kind == DELETED_DIR:
+                prefix = os.path.relpath(path, self.registry.workspace_path) + os.sep
+                for rel_path in self.registry.registry['file_paths']:
+                    if rel_path.startswith(prefix):
+                        deleted[os.path.join(self.registry.workspace_path, rel_path)] = None
+            elif kind == MOVED:
+                original = renames.pop(path, path)
+                if path in changed and original == path and not self._is_registered(path):
+                    # A file created in this batch and then moved is simply a new file
+                    del changed[path]
+                    changed[new_path] = None
+                else:
+                    changed.pop(path, None)
+                    renames[new_path] = original
+                deleted.pop(new_path, None)
+
+        # Check the batch against the final state of the file system
+        renamed = []
+        for new_path, old_path in renames.items():
+            if old_path == new_path:
+                changed[new_path] = None
+            elif os.path.exists(new_path):
+                renamed.append((old_path, new_path))
+            else:
+                deleted[old_path] = None
+        for path in list(changed):
+            if not os.path.exists(path):
+                del changed[path]
+                deleted[path] = None
+        deleted_paths = [path for path in deleted if not os.path.exists(path) and self._is_registered(path)]
+
+        return list(changed), renamed, deleted_paths
+
+    def _is_registered(self, file_path: str) -> bool:
+        """Check whether a file has an entry in the registry."""
+        return os.path.relpath(file_path, self.registry.workspace_path) in self.registry.registry['file_paths']
+
+    def _remember_writes(self, file_paths: List[str]) -> None:
+        """Record the state of the files the watcher itself wrote."""
+        for file_path in file_paths:
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            self._own_writes[file_path] = (st.st_mtime_ns, st.st_size)
+
+    def _is_own_write(self, file_path: str) -> bool:
+        """Check whether an event for a file was caused by the watcher's own header update."""
+        expected = self._own_writes.get(file_path)
+        if expected is None:
+            return False
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            st = None
+        if st is not None and (st.st_mtime_ns, st.st_size) == expected:
+            return True
+        del self._own_writes[file_path]
+        return False
@@ -1,11 +1,17 @@
 import re
+import shutil
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 
 from forai.symbol_registry import SymbolRegistry
+from forai.header_reader import HEADER_REGION_SIZE, invalidate_header, read_header_region
+from forai.utils.file_utils import atomic_replace
 
 logger = logging.getLogger(__name__)
 
+# Buffer size used to stream the rest of a file after its header has changed length
+_COPY_BUFFER_SIZE = 1024 * 1024
+
 class HeaderGenerator:
     """Generates FORAI headers for Python files."""
     
@@ -74,59 +80,114 @@ class HeaderGenerator:
         if exp_parts:
             header += f"EXP[{','.join(exp_parts)}]//"
         else:
-            header += "EXP[]//"`
+            header += "EXP[]//"
         
         return header
     
-    def update_file_header(self, file_path: str, header: str) -> None:
+    def update_file_header(self, file_path: str, header: str) -> bool:
         """Update the FORAI header in a file.
         
+        Only the header region at the start of the file (``HEADER_REGION_SIZE`` bytes)
+        is read and searched, so FORAI markers further down the file are never touched
+        and memory use does not depend on the file size. A header of the same length is
+        patched in place; otherwise the rest of the file is streamed into a temporary
+        file that atomically replaces the original, keeping its permissions.
+        
+        The file is only written if its content actually changes. An inserted header
+        uses the file's existing newline style.
+        
         Args:
             file_path: Path to the file
             header: The FORAI header to add or update
+            
+        Returns:
+            True if the file was modified, False if it already had the header
+            or could not be updated
         """
+        header_bytes = header.encode('utf-8')
+        
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            with open(file_path, 'rb') as f:
+                region, match = read_header_region(f)
         except Exception as e:
             logger.error(f"Failed to read file {file_path}: {e}")
-            return
+            return False
         
-        # Check if header already exists
-        header_pattern = r'//FORAI:.*?//'
-        if re.search(header_pattern, content):
-            # Replace existing header
-            updated_content = re.sub(header_pattern, header, content)
-        else:
-            # Add header at the top, preserving any shebang line or encoding declaration
-            lines = content.splitlines()
-            insert_pos = 0
-            
-            # Skip shebang line
-            if lines and lines[0].startswith('#!'):
-                insert_pos = 1
-                
-            # Skip encoding declaration
-            if len(lines) > insert_pos and re.match(r'#.*coding[:=]', lines[insert_pos]):
-                insert_pos += 1
-                
-            # Skip any initial empty lines
-            while len(lines) > insert_pos and not lines[insert_pos].strip():
-                insert_pos += 1
-                
-            # Insert header
-            lines.insert(insert_pos, header)
-            
-            # Add blank line after header if there isn't one already
-            if len(lines) > insert_pos + 1 and lines[insert_pos + 1].strip():
-                lines.insert(insert_pos + 1, '')
-                
-            updated_content = '\n'.join(lines)
-        
-        # Write back to file
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(updated_content)
+            if match:
+                # Replace existing header
+                if match.group(0) == header_bytes:
+                    return False
+                    
+                if len(match.group(0)) == len(header_bytes):
+                    with open(file_path, 'r+b') as f:
+                        f.seek(match.start())
+                        f.write(header_bytes)
+                    # The patch may leave the mtime and size seen by cached readers unchanged
+                    invalidate_header(file_path)
+                    return True
+                    
+                self._splice(file_path, region, match.start(), match.end(), header_bytes)
+            else:
+                # Add header at the top, preserving any shebang line or encoding declaration
+                insert_pos, insertion = self._header_insertion(region, header_bytes)
+                self._splice(file_path, region, insert_pos, insert_pos, insertion)
         except Exception as e:
             logger.error(f"Failed to write file {file_path}: {e}")
-            return
\ No newline at end of file
+            return False
+        
+        return True
+    
+    def _header_insertion(self, region: bytes, header: bytes) -> Tuple[int, bytes]:
+        """Find where a new header goes in the header region and the bytes to insert there.
+        
+        Args:
+            region: The header region of the file
+            header: The encoded FORAI header
+            
+        Returns:
+            A (byte offset, bytes to insert) pair
+        """
+        newline = b'\r\n' if b'\r\n' in region else b'\n'
+        lines = region.splitlines(keepends=True)
+        insert_pos = 0
+        
+        # Skip shebang line
+        if lines and lines[0].startswith(b'#!'):
+            insert_pos = 1
+            
+        # Skip encoding declaration
+        if len(lines) > insert_pos and re.match(rb'#.*coding[:=]', lines[insert_pos]):
+            insert_pos += 1
+            
+        # Skip any initial empty lines
+        while len(lines) > insert_pos and not lines[insert_pos].strip():
+            insert_pos += 1
+            
+        # Insert header, terminating a preceding last line that has no newline
+        insertion = header + newline
+        if insert_pos > 0 and not lines[insert_pos - 1].endswith((b'\n', b'\r')):
+            insertion = newline + insertion
+            
+        # Add blank line after header if there isn't one already
+        if len(lines) > insert_pos and lines[insert_pos].strip():
+            insertion += newline
+            
+        return sum(len(line) for line in lines[:insert_pos]), insertion
+    
+    def _splice(self, file_path: str, region: bytes, start: int, end: int, replacement: bytes) -> None:
+        """Replace ``region[start:end]`` with new bytes and stream the rest of the file after it.
+        
+        Args:
+            file_path: Path to the file
+            region: The header region read from the start of the file
+            start: Start offset of the replaced bytes
+            end: End offset of the replaced bytes
+            replacement: The bytes to write instead
+        """
+        with open(file_path, 'rb') as src, atomic_replace(file_path) as dst:
+            dst.write(region[:start])
+            dst.write(replacement)
+            dst.write(region[end:])
+            src.seek(len(region))
+            shutil.copyfileobj(src, dst, _COPY_BUFFER_SIZE)
@@ -0,0 +1,7 @@
+from forai.header_reader.reader import (
+    HEADER_REGION_SIZE, ForaiHeader, HeaderDefinition, invalidate_header, parse_header, read_header, read_header_region,
+    strip_header
+)
+
+__all__ = ["HEADER_REGION_SIZE", "ForaiHeader", "HeaderDefinition", "invalidate_header", "parse_header", "read_header",
+           "read_header_region", "strip_header"]
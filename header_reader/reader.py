@@ -0,0 +1,257 @@
+import os
+import re
+import logging
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Number of bytes at the start of a file searched for a header. Headers normally sit
+# on the first lines, but may follow a long module docstring or license block.
+HEADER_REGION_SIZE = 64 * 1024
+
+# A header is a whole line: ``//FORAI:`` at the start of a line, up to the closing ``//``
+# at its end (trailing whitespace allowed). Markers inside code, such as string literals,
+# docstrings or regular expressions, are not headers. The match ends at the closing ``//``,
+# so replacing it keeps the rest of the line (e.g. a ``\r`` line ending) intact.
+HEADER_PATTERN = re.compile(rb'^//FORAI:([^\n]*?)//(?=[ \t]*\r?$)', re.MULTILINE)
+_HEADER_TEXT_PATTERN = re.compile(r'^//FORAI:([^\n]*?)//(?=[ \t]*\r?$)', re.MULTILINE)
+_HEADER_MARKER = b'//FORAI:'
+_HEADER_LINE_START = re.compile(rb'^//FORAI:', re.MULTILINE)
+
+# Maximum number of files whose parsed header is cached
+HEADER_CACHE_SIZE = 16384
+
+
+class HeaderDefinition:
+    """A ``DEF`` entry of a FORAI header."""
+
+    __slots__ = ('symbol_id', 'name', 'parents')
+
+    def __init__(self, symbol_id: str, name: str, parents: Tuple[str, ...] = ()):
+        self.symbol_id = symbol_id
+        self.name = name
+        self.parents = parents
+
+    def __repr__(self) -> str:
+        return f"HeaderDefinition({self.symbol_id!r}, {self.name!r}, {self.parents!r})"
+
+
+class ForaiHeader:
+    """A parsed FORAI header.
+
+    Attributes:
+        text: The complete header, from ``//FORAI:`` to the closing ``//``
+        offset: Byte offset of the header in the file (character offset for parsed strings)
+        file_id: The file ID
+        definitions: The ``DEF`` entries
+        imports: (file ID, symbol ID) pairs of the ``IMP`` entries; the symbol ID is
+            ``*`` for whole-module imports
+        exports: The ``EXP`` entries (symbol IDs of the exported definitions)
+        language: The ``LANG`` value, or None if the header has none
+    """
+
+    __slots__ = ('text', 'offset', 'file_id', 'definitions', 'imports', 'exports', 'language')
+
+    def __init__(self, text: str, offset: int, file_id: str, definitions: Tuple[HeaderDefinition, ...],
+                 imports: Tuple[Tuple[str, str], ...], exports: Tuple[str, ...], language: Optional[str]):
+        self.text = text
+        self.offset = offset
+        self.file_id = file_id
+        self.definitions = definitions
+        self.imports = imports
+        self.exports = exports
+        self.language = language
+
+    def import_refs(self) -> List[str]:
+        """Get the imports as references such as ``F101:C1``."""
+        return [f"{file_id}:{symbol_id}" for file_id, symbol_id in self.imports]
+
+    def imports_symbol(self, file_id: str, symbol_id: str) -> bool:
+        """Check whether the header imports a symbol, directly or through its whole module."""
+        return (file_id, symbol_id) in self.imports or (file_id, '*') in self.imports
+
+    def __repr__(self) -> str:
+        return f"ForaiHeader({self.text!r})"
+
+
+def _split_outside_brackets(text: str) -> List[str]:
+    """Split a comma-separated list, keeping commas inside ``<...>`` parent lists."""
+    if '<' not in text:
+        return text.split(',')
+
+    parts = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(text):
+        if char == '<':
+            depth += 1
+        elif char == '>':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _parse_body(text: str, body: str, offset: int) -> ForaiHeader:
+    """Parse the part of a header between ``//FORAI:`` and the closing ``//``."""
+    components = body.split(';')
+    definitions: List[HeaderDefinition] = []
+    imports: List[Tuple[str, str]] = []
+    exports: Tuple[str, ...] = ()
+    language = None
+
+    for component in components[1:]:
+        bracket = component.find('[')
+        if bracket == -1 or not component.endswith(']'):
+            continue
+        key = component[:bracket]
+        value = component[bracket + 1:-1]
+        if not value:
+            continue
+
+        if key == 'DEF':
+            for part in _split_outside_brackets(value):
+                parents: Tuple[str, ...] = ()
+                angle = part.find('<')
+                if angle != -1:
+                    parents = tuple(part[angle + 1:].rstrip('>').split(','))
+                    part = part[:angle]
+                symbol_id, _, name = part.partition(':')
+                if name:
+                    definitions.append(HeaderDefinition(symbol_id, name, parents))
+        elif key == 'IMP':
+            for part in value.split(','):
+                file_id, _, symbol_id = part.strip().partition(':')
+                if file_id:
+                    imports.append((file_id, symbol_id or '*'))
+        elif key == 'EXP':
+            exports = tuple(value.split(','))
+        elif key == 'LANG':
+            language = value
+
+    return ForaiHeader(text, offset, components[0].strip(), tuple(definitions), tuple(imports), exports, language)
+
+
+def parse_header(content: str) -> Optional[ForaiHeader]:
+    """Parse the first FORAI header found in a string.
+
+    Args:
+        content: A header, or file content containing one
+
+    Returns:
+        The parsed header, or None if the string contains no header
+    """
+    match = _HEADER_TEXT_PATTERN.search(content)
+    if match is None:
+        return None
+    return _parse_body(match.group(0), match.group(1), match.start())
+
+
+def read_header_region(f: BinaryIO) -> Tuple[bytes, Optional[re.Match]]:
+    """Read the header region of a file opened in binary mode and find its header.
+
+    The first ``HEADER_REGION_SIZE`` bytes are searched. If they end inside a line
+    that starts like a header, reading continues until that line is complete.
+
+    Args:
+        f: The file, positioned at its start
+
+    Returns:
+        A (region, match) pair; match is None if the region contains no header
+    """
+    region = f.read(HEADER_REGION_SIZE)
+    while True:
+        last_line = region[region.rfind(b'\n') + 1:]
+        if not last_line or not (last_line.startswith(_HEADER_MARKER) or _HEADER_MARKER.startswith(last_line)):
+            break
+        chunk = f.read(HEADER_REGION_SIZE)
+        if not chunk:
+            break
+        region += chunk
+    return region, HEADER_PATTERN.search(region)
+
+
+def strip_header(content: bytes) -> bytes:
+    """Remove the FORAI header from file content.
+
+    Only the header at the start of the content (within ``HEADER_REGION_SIZE`` bytes)
+    is removed. The line it was on is kept, so line numbers do not change.
+
+    Args:
+        content: The file content
+
+    Returns:
+        The content without its header
+    """
+    start = _HEADER_LINE_START.search(content, 0, HEADER_REGION_SIZE)
+    while start is not None:
+        match = HEADER_PATTERN.match(content, start.start())
+        if match is not None:
+            return content[:match.start()] + content[match.end():]
+        start = _HEADER_LINE_START.search(content, start.end(), HEADER_REGION_SIZE)
+    return content
+
+
+_cache: 'OrderedDict[str, Tuple[int, int, Optional[ForaiHeader]]]' = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def read_header(file_path: str) -> Optional[ForaiHeader]:
+    """Read and parse the FORAI header of a file.
+
+    Only the header region at the start of the file is read (see
+    ``read_header_region``). Results are cached by path, mtime and size, so
+    repeated reads of an unchanged file cost a single ``stat`` call.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        The parsed header, or None if the file has no header or cannot be read
+    """
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+
+    with _cache_lock:
+        cached = _cache.get(file_path)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            _cache.move_to_end(file_path)
+            return cached[2]
+
+    try:
+        with open(file_path, 'rb') as f:
+            _, match = read_header_region(f)
+    except OSError as e:
+        logger.error(f"Failed to read file {file_path}: {e}")
+        return None
+
+    header = None
+    if match is not None:
+        header = _parse_body(match.group(0).decode('utf-8', 'replace'),
+                             match.group(1).decode('utf-8', 'replace'), match.start())
+
+    with _cache_lock:
+        _cache[file_path] = (st.st_mtime_ns, st.st_size, header)
+        _cache.move_to_end(file_path)
+        if len(_cache) > HEADER_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return header
+
+
+def invalidate_header(file_path: Optional[str] = None) -> None:
+    """Drop cached headers, e.g. after a file was rewritten within the mtime resolution.
+
+    Args:
+        file_path: The file whose header is dropped, or None to clear the whole cache
+    """
+    with _cache_lock:
+        if file_path is None:
+            _cache.clear()
+        else:
+            _cache.pop(file_path, None)
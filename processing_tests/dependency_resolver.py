@@ -12,6 +12,12 @@ import json
 import logging
 from pathlib import Path
 
+from forai_path import ensure_forai_importable
+
+ensure_forai_importable(__file__)
+from forai.header_reader import HEADER_REGION_SIZE, read_header
+from forai.utils.scanner import scan_files
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -32,11 +38,8 @@ class DependencyResolver:
         
     def scan_headers(self):
         """Scan all files for FORAI headers and build dependency maps."""
-        for root, _, files in os.walk(self.base_dir):
-            for file in files:
-                if file.endswith(('.php', '.js')):
-                    file_path = os.path.join(root, file)
-                    self._process_header(file_path)
+        for file_path in scan_files(self.base_dir, extensions=('.php', '.js')):
+            self._process_header(file_path)
                     
     def _process_header(self, file_path):
         """Process a FORAI header in a file.
@@ -45,71 +48,58 @@ class DependencyResolver:
             file_path: Path to the file
         """
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read(2000)  # Read first 2000 chars to find header
-                
-            header_match = re.search(r'//FORAI:(.*?)//', content)
-            if not header_match:
+            header = read_header(file_path)
+            if header is None or not header.file_id:
                 return
                 
-            header = header_match.group(0)
-            
-            # Extract file ID
-            file_id_match = re.search(r'//FORAI:([^;]+);', header)
-            if not file_id_match:
-                return
-                
-            file_id = file_id_match.group(1)
+            file_id = header.file_id
             self.file_map[file_path] = file_id
             
-            # Extract exports
-            export_match = re.search(r'EXP\[(.*?)\]', header)
-            if export_match and export_match.group(1):
-                exports = export_match.group(1).split(',')
+            # Map the names of exported definitions to their symbol_ids
+            for defn in header.definitions:
+                symbol_id, symbol_name = defn.symbol_id, defn.name
                 
-                # Extract definitions to map symbol_ids to names
-                def_match = re.search(r'DEF\[(.*?)\]', header)
-                if def_match and def_match.group(1):
-                    def_parts = def_match.group(1).split(',')
-                    for part in def_parts:
-                        # Handle definitions with parents
-                        if '<' in part:
-                            symbol_info = part.split('<')[0]
-                        else:
-                            symbol_info = part
-                            
-                        if ':' in symbol_info:
-                            symbol_id, symbol_name = symbol_info.split(':', 1)
-                            
-                            # Add to exports map if this symbol is exported
-                            if symbol_id in exports:
-                                rel_path = os.path.relpath(file_path, self.base_dir)
-                                self.exports_map[(file_id, symbol_name)] = symbol_id
-                                
-                                # Add to import map for future resolution
-                                if file_path.endswith('.js'):
-                                    # For JS, use the module name convention
-                                    module_name = os.path.splitext(rel_path)[0].replace('/', '.')
-                                    self.import_map[module_name] = file_path
-                                    
-                                    # Also map views/x to views/x/index
-                                    if '/views/' in module_name:
-                                        base_name = module_name.split('.')[-1]
-                                        parent_module = module_name.rsplit('.', 1)[0]
-                                        self.import_map[f"{parent_module}.{base_name}.index"] = file_path
-                                    
-                                elif file_path.endswith('.php'):
-                                    # For PHP, extract namespace + class
-                                    namespace_match = re.search(r'namespace\s+([^;]+)', content)
-                                    if namespace_match:
-                                        namespace = namespace_match.group(1).strip()
-                                        if symbol_name != namespace:
-                                            full_path = f"{namespace}\\{symbol_name}"
-                                            self.import_map[full_path] = file_path
+                # Add to exports map if this symbol is exported
+                if symbol_id in header.exports:
+                    rel_path = os.path.relpath(file_path, self.base_dir)
+                    self.exports_map[(file_id, symbol_name)] = symbol_id
+                    
+                    # Add to import map for future resolution
+                    if file_path.endswith('.js'):
+                        # For JS, use the module name convention
+                        module_name = os.path.splitext(rel_path)[0].replace('/', '.')
+                        self.import_map[module_name] = file_path
+                        
+                        # Also map views/x to views/x/index
+                        if '/views/' in module_name:
+                            base_name = module_name.split('.')[-1]
+                            parent_module = module_name.rsplit('.', 1)[0]
+                            self.import_map[f"{parent_module}.{base_name}.index"] = file_path
+                        
+                    elif file_path.endswith('.php'):
+                        # For PHP, extract namespace + class
+                        namespace = self._read_namespace(file_path)
+                        if namespace and symbol_name != namespace:
+                            full_path = f"{namespace}\\{symbol_name}"
+                            self.import_map[full_path] = file_path
             
         except Exception as e:
             logger.error(f"Error processing header in {file_path}: {e}")
             
+    def _read_namespace(self, file_path):
+        """Read the namespace declared near the top of a PHP file.
+        
+        Args:
+            file_path: Path to the file
+            
+        Returns:
+            The namespace, or None if the file declares none
+        """
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read(HEADER_REGION_SIZE)
+        namespace_match = re.search(r'namespace\s+([^;]+)', content)
+        return namespace_match.group(1).strip() if namespace_match else None
+            
     def update_imports(self):
         """Update import references in all FORAI headers."""
         updated_files = 0
@@ -119,7 +109,7 @@ class DependencyResolver:
                 with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                     content = f.read()
                     
-                header_match = re.search(r'//FORAI:(.*?)//', content)
+                header_match = re.search(r'(?m)^//FORAI:[^\n]*?//(?=[ \t]*\r?$)', content)
                 if not header_match:
                     continue
                     
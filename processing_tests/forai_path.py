@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+FORAI Path
+
+Makes the forai package importable when the processing scripts are run from a
+source checkout, where the package is not installed.
+"""
+
+import os
+import sys
+
+
+def ensure_forai_importable(script_path):
+    """Add the directory containing the forai checkout to sys.path if needed.
+
+    Args:
+        script_path: The ``__file__`` of the calling script in ``processing_tests``
+    """
+    try:
+        import forai  # noqa: F401
+    except ImportError:
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(script_path)))))
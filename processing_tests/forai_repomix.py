@@ -16,35 +16,50 @@ import argparse
 from typing import Dict, List, Any, Optional, Set, Tuple
 from pathlib import Path
 
-# Try to import tiktoken, but provide a fallback if not available
-try:
-    import tiktoken
-except ImportError:
-    logging.warning("tiktoken not found, using a simple word-based token counter")
-    # Provide a simple fallback for token counting
-    class SimpleTiktoken:
-        def __init__(self, *args, **kwargs):
-            pass
+from forai_path import ensure_forai_importable
 
-        def encode(self, text):
-            # Simple approx: split by whitespace and punctuation, count words
-            # This is obviously not accurate but serves as a fallback
-            import re
-            tokens = re.findall(r'\b\w+\b', text)
-            return tokens
+ensure_forai_importable(__file__)
+from forai.header_reader import read_header
+from forai.utils.scanner import scan_files
 
-        def decode(self, tokens):
-            # Join tokens with spaces (not accurate but simple fallback)
-            if isinstance(tokens, list):
-                return ' '.join(tokens)
-            return str(tokens)
+class SimpleTiktoken:
+    """Word-based token counter used when tiktoken is not installed."""
+    
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def encode(self, text):
+        # Simple approx: split by whitespace and punctuation, count words
+        # This is obviously not accurate but serves as a fallback
+        tokens = re.findall(r'\b\w+\b', text)
+        return tokens
 
-        def get_encoding(self, _):
-            return self
+    def decode(self, tokens):
+        # Join tokens with spaces (not accurate but simple fallback)
+        if isinstance(tokens, list):
+            return ' '.join(tokens)
+        return str(tokens)
 
-    # Create a mock tiktoken module
-    tiktoken = SimpleTiktoken()
-    tiktoken.get_encoding = lambda _: SimpleTiktoken()
+    def get_encoding(self, _):
+        return self
+
+def get_encoding(encoding_name: str):
+    """Get a tiktoken encoding, or a word-based fallback if tiktoken is not available.
+    
+    tiktoken is only imported here, when the first tokens are counted, as importing it is slow.
+    
+    Args:
+        encoding_name: The name of the tokenizer encoding
+        
+    Returns:
+        An object with encode and decode methods
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        logging.warning("tiktoken not found, using a simple word-based token counter")
+        return SimpleTiktoken()
+    return tiktoken.get_encoding(encoding_name)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -53,10 +68,6 @@ logger = logging.getLogger(__name__)
 class ForaiHeaderReader:
     """Read and parse FORAI headers from files."""
     
-    def __init__(self):
-        """Initialize the header reader."""
-        self.header_pattern = re.compile(r'//FORAI:(.*?)//')
-        
     def extract_header(self, file_path: str) -> Optional[Dict[str, Any]]:
         """Extract FORAI header from a file.
         
@@ -66,88 +77,25 @@ class ForaiHeaderReader:
         Returns:
             Dictionary with header data, or None if no header found
         """
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read(2000)  # Read first 2000 chars to find header
-                
-            header_match = self.header_pattern.search(content)
-            if not header_match:
-                return None
-                
-            header_text = header_match.group(1)
-            
-            # Parse header components
-            components = header_text.split(';')
-            
-            # Extract file ID
-            file_id = components[0].strip()
-            
-            # Extract definitions
-            definitions = []
-            for component in components:
-                if component.startswith('DEF['):
-                    def_text = component[4:-1]  # Remove DEF[ and ]
-                    if def_text:
-                        def_parts = def_text.split(',')
-                        for part in def_parts:
-                            # Handle parent classes
-                            if '<' in part:
-                                symbol_info, parent_info = part.split('<', 1)
-                                if ':' in symbol_info:
-                                    symbol_id, symbol_name = symbol_info.split(':', 1)
-                                    definitions.append({
-                                        'id': symbol_id,
-                                        'name': symbol_name,
-                                        'parent': parent_info
-                                    })
-                            elif ':' in part:
-                                symbol_id, symbol_name = part.split(':', 1)
-                                definitions.append({
-                                    'id': symbol_id,
-                                    'name': symbol_name
-                                })
-            
-            # Extract imports
-            imports = []
-            for component in components:
-                if component.startswith('IMP['):
-                    imp_text = component[4:-1]  # Remove IMP[ and ]
-                    if imp_text:
-                        imp_parts = imp_text.split(',')
-                        for part in imp_parts:
-                            if ':' in part:
-                                file_ref, symbol_ref = part.split(':', 1)
-                                imports.append({
-                                    'file_id': file_ref,
-                                    'symbol_id': symbol_ref
-                                })
-            
-            # Extract exports
-            exports = []
-            for component in components:
-                if component.startswith('EXP['):
-                    exp_text = component[4:-1]  # Remove EXP[ and ]
-                    if exp_text:
-                        exports = exp_text.split(',')
-            
-            # Extract language
-            language = 'unknown'
-            for component in components:
-                if component.startswith('LANG['):
-                    language = component[5:-1]  # Remove LANG[ and ]
-            
-            return {
-                'file_id': file_id,
-                'file_path': file_path,
-                'definitions': definitions,
-                'imports': imports,
-                'exports': exports,
-                'language': language
-            }
-        
-        except Exception as e:
-            logger.error(f"Error extracting header from {file_path}: {e}")
+        header = read_header(file_path)
+        if header is None:
             return None
+        
+        definitions = []
+        for defn in header.definitions:
+            definition = {'id': defn.symbol_id, 'name': defn.name}
+            if defn.parents:
+                definition['parent'] = ','.join(defn.parents)
+            definitions.append(definition)
+        
+        return {
+            'file_id': header.file_id,
+            'file_path': file_path,
+            'definitions': definitions,
+            'imports': [{'file_id': file_ref, 'symbol_id': symbol_ref} for file_ref, symbol_ref in header.imports],
+            'exports': list(header.exports),
+            'language': header.language or 'unknown'
+        }
 
 class ForaiRepomiX:
     """Generate a RepomiX-like file from FORAI headers."""
@@ -161,7 +109,15 @@ class ForaiRepomiX:
         self.header_reader = ForaiHeaderReader()
         self.file_data = {}
         self.file_ids = {}
-        self.encoding = tiktoken.get_encoding(encoding_name)
+        self.encoding_name = encoding_name
+        self._encoding = None
+    
+    @property
+    def encoding(self):
+        """The tokenizer encoding, loaded when tokens are first counted."""
+        if self._encoding is None:
+            self._encoding = get_encoding(self.encoding_name)
+        return self._encoding
         
     def scan_directory(self, directory: str) -> Dict[str, Any]:
         """Scan a directory for files with FORAI headers.
@@ -176,21 +132,20 @@ class ForaiRepomiX:
         header_count = 0
         languages = {}
         
-        for root, _, files in os.walk(directory):
-            for file in files:
-                file_path = os.path.join(root, file)
-                file_count += 1
+        # Skips .git, dependency and build directories and .gitignore/.foraiignore matches
+        for file_path in scan_files(directory, extensions=None):
+            file_count += 1
+            
+            # Extract header
+            header_data = self.header_reader.extract_header(file_path)
+            if header_data:
+                self.file_data[file_path] = header_data
+                self.file_ids[header_data['file_id']] = file_path
+                header_count += 1
                 
-                # Extract header
-                header_data = self.header_reader.extract_header(file_path)
-                if header_data:
-                    self.file_data[file_path] = header_data
-                    self.file_ids[header_data['file_id']] = file_path
-                    header_count += 1
-                    
-                    # Track languages
-                    language = header_data['language']
-                    languages[language] = languages.get(language, 0) + 1
+                # Track languages
+                language = header_data['language']
+                languages[language] = languages.get(language, 0) + 1
         
         return {
             'total_files': file_count,
@@ -13,6 +13,11 @@ import logging
 from pathlib import Path
 import argparse
 
+from forai_path import ensure_forai_importable
+
+ensure_forai_importable(__file__)
+from forai.header_reader import read_header
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -122,19 +127,8 @@ def extract_language(header):
 
 def get_header_from_file(file_path):
     """Extract FORAI header from a file."""
-    try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read(2000)  # Read first 2000 characters
-        
-        # Look for header
-        header_match = re.search(r'//FORAI:(.*?)//', content)
-        if not header_match:
-            return None
-            
-        return header_match.group(0)
-    except Exception as e:
-        logger.error(f"Error reading file {file_path}: {e}")
-        return None
+    header = read_header(file_path)
+    return header.text if header is not None else None
 
 def parse_header(header):
     """Parse a FORAI header and extract all components."""
@@ -10,51 +10,25 @@ import logging
 import os
 import sys
 import json
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, List
 
-from forai.symbol_registry import SymbolRegistry
-from forai.static_analyzer import StaticAnalyzer
-from forai.runtime_introspector import RuntimeIntrospector
-from forai.header_generator import HeaderGenerator
-from forai.dependency_tracker import DependencyTracker
+# Only what every command needs is imported here; commands import the rest when they
+# run, so that short-lived invocations (per-save updates, list-deps) start quickly
+if TYPE_CHECKING:
+    from forai.symbol_registry import SymbolRegistry
+    from forai.workspace_updater import WorkspaceUpdater
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
-def merge_static_and_runtime(static_data: Dict[str, Any], runtime_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Merge static and runtime analysis results.
-    
-    Args:
-        static_data: The static analysis data
-        runtime_data: The runtime introspection data
-        
-    Returns:
-        The merged data
-    """
-    # Start with the static data
-    merged = dict(static_data)
-    
-    # Get runtime symbols
-    runtime_symbols = runtime_data.get('runtime_symbols', {})
-    
-    # Update definitions with runtime information
-    if 'definitions' in merged:
-        for i, defn in enumerate(merged['definitions']):
-            name = defn.get('name')
-            if name in runtime_symbols:
-                # Add or update information from runtime analysis
-                runtime_info = runtime_symbols[name]
-                
-                # For classes, merge parent information
-                if defn.get('type') == 'class' and 'bases' in runtime_info:
-                    # For now, just log the additional information
-                    # In a real implementation, you would merge the parent information
-                    logger.debug(f"Runtime found additional parents for {name}: {runtime_info['bases']}")
-    
-    return merged
+# Commands that only read the registry and the dependency index
+REGISTRY_COMMANDS = ('list-deps', 'rebuild', 'export-registry')
+
+# Number of modules listed by --profile-startup
+PROFILE_LIMIT = 25
 
-def update_file_header(file_path: str, registry: SymbolRegistry, enable_runtime: bool) -> bool:
+def update_file_header(file_path: str, registry: 'SymbolRegistry', enable_runtime: bool) -> bool:
     """Update the FORAI header in a file.
     
     Args:
@@ -65,57 +39,130 @@ def update_file_header(file_path: str, registry: SymbolRegistry, enable_runtime:
     Returns:
         True if the imports changed, False otherwise
     """
-    # Initialize components
-    analyzer = StaticAnalyzer(registry)
-    header_generator = HeaderGenerator(registry)
+    from forai.workspace_updater import WorkspaceUpdater
     
-    # Get previous header imports
-    previous_imports = set()
-    try:
-        dependency_tracker = DependencyTracker(registry)
-        previous_imports = set(dependency_tracker._get_header_imports(file_path))
-    except Exception as e:
-        logger.debug(f"Failed to get previous imports: {e}")
+    return WorkspaceUpdater(registry, enable_runtime).update_file(file_path)['imports_changed']
+
+def runtime_pool(args: argparse.Namespace):
+    """Create the introspection worker pool configured on the command line, if runtime introspection is enabled."""
+    if not args.runtime:
+        return None
+    from forai.runtime_introspector import IntrospectionPool
     
-    # Analyze file
-    file_data = analyzer.analyze_file(file_path)
+    return IntrospectionPool(workers=args.runtime_workers, timeout=args.runtime_timeout,
+                             memory_limit_mb=args.runtime_memory or None)
+
+def parse_import_times(lines: List[str]) -> List[Dict[str, int]]:
+    """Parse the report written to stderr by ``python -X importtime``.
     
-    # Add runtime information if requested
-    if enable_runtime:
-        runtime_introspector = RuntimeIntrospector()
-        runtime_data = runtime_introspector.introspect(file_path)
-        file_data = merge_static_and_runtime(file_data, runtime_data)
+    Args:
+        lines: The lines of the report; other lines are skipped
+        
+    Returns:
+        Dictionaries with module, self_us, cumulative_us and depth, in import order
+    """
+    modules = []
+    for line in lines:
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # The column titles
+        name = fields[2].rstrip()
+        modules.append({
+            'module': name.strip(),
+            'self_us': int(fields[0]),
+            'cumulative_us': int(fields[1]),
+            'depth': (len(name) - len(name.lstrip())) // 2
+        })
+    return modules
+
+def profile_startup(argv: List[str]) -> int:
+    """Run a command in a child interpreter with ``-X importtime`` and report its imports.
     
-    # Generate header
-    header = header_generator.generate_header(file_data)
+    The command's output is passed through. A report of the total run time and of the
+    modules with the most cumulative import time is written to stderr.
+    
+    Args:
+        argv: The command line arguments, without ``--profile-startup``
+        
+    Returns:
+        The command's exit code
+    """
+    import subprocess
+    import time
     
-    # Update file
-    header_generator.update_file_header(file_path, header)
+    command = [sys.executable, '-X', 'importtime', '-c',
+               'import sys; from forai.cli import main; sys.exit(main())'] + argv
+    start = time.perf_counter()
+    process = subprocess.run(command, stderr=subprocess.PIPE, universal_newlines=True)
+    elapsed = time.perf_counter() - start
     
-    # Check if imports changed
-    current_imports = set()
-    for imp in file_data.get('imports', []):
-        file_id = imp.get('file_id', '')
-        symbol_id = imp.get('symbol_id', '*')
-        if file_id:
-            current_imports.add(f"{file_id}:{symbol_id}")
+    lines = process.stderr.splitlines()
+    for line in lines:
+        if not line.startswith('import time:'):
+            sys.stderr.write(line + '\n')
     
-    return previous_imports != current_imports
+    modules = parse_import_times(lines)
+    imports_us = sum(module['cumulative_us'] for module in modules if module['depth'] == 0)
+    forai_us = sum(module['self_us'] for module in modules if module['module'].split('.')[0] == 'forai')
+    sys.stderr.write(f"Run time: {elapsed * 1000:.1f} ms, imports: {imports_us / 1000:.1f} ms "
+                     f"({len(modules)} modules, {forai_us / 1000:.1f} ms in forai modules)\n")
+    sys.stderr.write(f"{'cumulative ms':>14} {'self ms':>8}  module\n")
+    for module in sorted(modules, key=lambda module: -module['cumulative_us'])[:PROFILE_LIMIT]:
+        sys.stderr.write(f"{module['cumulative_us'] / 1000:>14.1f} {module['self_us'] / 1000:>8.1f}  "
+                         f"{'  ' * module['depth']}{module['module']}\n")
+    return process.returncode
 
 def main():
     """Main entry point."""
+    argv = sys.argv[1:]
+    if '--profile-startup' in argv:
+        return profile_startup([arg for arg in argv if arg != '--profile-startup'])
+    
     parser = argparse.ArgumentParser(description='FORAI Header Tool')
     parser.add_argument('--workspace', '-w', required=True, help='Path to workspace root')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Run the command with -X importtime and report the slowest imports on stderr')
     parser.add_argument('--runtime', '-r', action='store_true', help='Enable runtime introspection')
+    parser.add_argument('--runtime-workers', type=int, default=None,
+                        help='Number of introspection worker processes (default: min(4, CPU count))')
+    parser.add_argument('--runtime-timeout', type=float, default=None,
+                        help='Seconds a module may take to import during introspection (default: 30)')
+    parser.add_argument('--runtime-memory', type=int, default=None,
+                        help='Address space limit of each introspection worker in MiB, 0 for none '
+                             '(default: none); leave room for the virtual memory that heavy libraries reserve')
+    parser.add_argument('--transitive', '-t', action='store_true',
+                        help='Follow dependents of dependents until headers stop changing')
+    parser.add_argument('--flush-interval', type=int, default=None,
+                        help='Write the registry every N changes instead of once per run')
+    parser.add_argument('--storage', choices=['json', 'sqlite'], default=None,
+                        help='Registry storage backend (default: sqlite if .forai/registry.db exists, else json)')
     
     subparsers = parser.add_subparsers(dest='command', help='Command to run')
     
     # Update a single file
-    update_parser = subparsers.add_parser('update', help='Update a single file')
-    update_parser.add_argument('file', help='Path to file')
+    update_parser = subparsers.add_parser('update', help='Update one or more changed files')
+    update_parser.add_argument('files', nargs='+', help='Paths to files')
     
     # Update all Python files
     update_all_parser = subparsers.add_parser('update-all', help='Update all Python files')
+    update_all_parser.add_argument('--jobs', '-j', type=int, default=1,
+                                   help='Number of worker processes used for parsing')
+    update_all_parser.add_argument('--writers', type=int, default=None,
+                                   help='Number of header writer threads (default: min(8, 2 * jobs))')
+    update_all_parser.add_argument('--no-cache', action='store_true',
+                                   help='Re-read and re-parse every file instead of using .forai/cache.json')
+    update_all_parser.add_argument('--format', choices=['json', 'jsonl'], default='json',
+                                   help='Print the summary only, or stream one JSON line per file '
+                                        'followed by the summary (default: json)')
+    update_all_parser.add_argument('--fields', type=lambda value: [field for field in value.split(',') if field],
+                                   default=None, help='Comma-separated per-file fields to keep with --format jsonl')
+    
+    # Update the files changed since a git revision
+    changed_parser = subparsers.add_parser('update-changed', help='Update files changed since a git revision')
+    changed_parser.add_argument('--since', default='HEAD',
+                                help='Git revision to compare the working tree against (default: HEAD)')
     
     # Rename a file
     rename_parser = subparsers.add_parser('rename', help='Handle file rename')
@@ -130,6 +177,30 @@ def main():
     list_deps_parser = subparsers.add_parser('list-deps', help='List dependencies')
     list_deps_parser.add_argument('file', help='Path to file')
     
+    # Rebuild the dependency index
+    subparsers.add_parser('rebuild', help='Rebuild the dependency index from the FORAI headers')
+    
+    # Serve requests from a long-lived process
+    serve_parser = subparsers.add_parser('serve', help='Serve line-delimited JSON-RPC requests')
+    serve_parser.add_argument('--socket', help='Listen on this Unix socket instead of stdin/stdout')
+    serve_parser.add_argument('--debounce', type=float, default=200,
+                              help='Milliseconds to wait for more update requests before processing a batch (0 disables)')
+    
+    # Watch the workspace for changes
+    watch_parser = subparsers.add_parser('watch', help='Keep headers current as files change')
+    watch_parser.add_argument('--backend', choices=['inotify', 'polling'], default=None,
+                              help='Event source (default: inotify where available, else polling)')
+    watch_parser.add_argument('--interval', type=float, default=1.0,
+                              help='Seconds between scans of the polling backend')
+    watch_parser.add_argument('--debounce', type=float, default=200,
+                              help='Milliseconds without events after which a batch is applied')
+    watch_parser.add_argument('--skip-initial', action='store_true',
+                              help='Do not bring all headers up to date before watching')
+    
+    # Export the registry as JSON
+    export_parser = subparsers.add_parser('export-registry', help='Export the registry in registry.json format')
+    export_parser.add_argument('--output', '-o', help='Output path (default: .forai/registry.json)')
+    
     args = parser.parse_args()
     
     # Validate workspace path
@@ -138,151 +209,283 @@ def main():
         logger.error(f"Workspace path does not exist: {workspace_path}")
         return 1
     
-    # Initialize registry
-    registry = SymbolRegistry(workspace_path)
+    if args.command == 'serve':
+        return serve(args, workspace_path)
+    if args.command == 'watch':
+        return watch(args, workspace_path)
+    
+    from forai.symbol_registry import SymbolRegistry
+    
+    # Initialize registry; changes are persisted once at the end of the command
+    registry = SymbolRegistry(workspace_path, flush_interval=args.flush_interval, storage=args.storage)
     
     try:
-        if args.command == 'update':
-            # Validate file path
-            file_path = os.path.abspath(args.file)
-            if not os.path.isfile(file_path):
-                logger.error(f"File does not exist: {file_path}")
-                return 1
-                
-            # Update file header
-            imports_changed = update_file_header(file_path, registry, args.runtime)
-            
-            # If imports changed, update dependent files
-            if imports_changed:
-                file_id = registry.get_file_id(file_path)
-                analyzer = StaticAnalyzer(registry)
-                header_generator = HeaderGenerator(registry)
-                dependency_tracker = DependencyTracker(registry)
-                dependency_tracker.update_dependent_headers(file_id, analyzer, header_generator, args.runtime)
-                
-            logger.info(f"Updated FORAI header for {file_path}")
-            
-            # Return success with JSON
-            print(json.dumps({
-                'success': True,
-                'imports_changed': imports_changed
-            }))
-            
-        elif args.command == 'update-all':
-            # Find all Python files
-            python_files = []
-            for root, _, files in os.walk(workspace_path):
-                for file in files:
-                    if file.endswith('.py'):
-                        python_files.append(os.path.join(root, file))
-            
-            # Update each file
-            updated = 0
-            for file_path in python_files:
-                try:
-                    update_file_header(file_path, registry, args.runtime)
-                    updated += 1
-                except Exception as e:
-                    logger.error(f"Failed to update {file_path}: {e}")
-            
-            logger.info(f"Updated FORAI headers for {updated} files")
-            
-            # Return success with JSON
-            print(json.dumps({
-                'success': True,
-                'updated': updated,
-                'total': len(python_files)
-            }))
-            
-        elif args.command == 'rename':
-            # Validate file paths
-            old_path = os.path.abspath(args.old_path)
-            new_path = os.path.abspath(args.new_path)
-            
-            if not os.path.isfile(new_path):
-                logger.error(f"New file does not exist: {new_path}")
-                return 1
-                
-            # Update registry
-            file_id = registry.update_file_path(old_path, new_path)
-            
-            # Update header in the new file
-            imports_changed = update_file_header(new_path, registry, args.runtime)
-            
-            # Update dependent files
-            analyzer = StaticAnalyzer(registry)
-            header_generator = HeaderGenerator(registry)
-            dependency_tracker = DependencyTracker(registry)
-            dependency_tracker.update_dependent_headers(file_id, analyzer, header_generator, args.runtime)
-            
-            logger.info(f"Updated FORAI header for renamed file {new_path}")
-            
-            # Return success with JSON
-            print(json.dumps({
-                'success': True,
-                'imports_changed': imports_changed
-            }))
-            
-        elif args.command == 'update-deps':
-            # Validate file path
-            file_path = os.path.abspath(args.file)
-            if not os.path.isfile(file_path):
-                logger.error(f"File does not exist: {file_path}")
-                return 1
-                
-            # Update dependent files
-            file_id = registry.get_file_id(file_path)
-            analyzer = StaticAnalyzer(registry)
-            header_generator = HeaderGenerator(registry)
-            dependency_tracker = DependencyTracker(registry)
-            dependency_tracker.update_dependent_headers(file_id, analyzer, header_generator, args.runtime)
-            
-            logger.info(f"Updated FORAI headers for files depending on {file_path}")
-            
-            # Return success with JSON
-            print(json.dumps({
-                'success': True
-            }))
+        with registry.batch():
+            return run_command(args, parser, registry, workspace_path)
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        print(json.dumps({
+            'success': False,
+            'error': str(e)
+        }))
+        return 1
+
+def serve(args: argparse.Namespace, workspace_path: str) -> int:
+    """Run the FORAI server until its input closes or it is shut down.
+    
+    Args:
+        args: The parsed command line arguments
+        workspace_path: Absolute path to the workspace root
+        
+    Returns:
+        The process exit code
+    """
+    from forai.server import FORAIServer, serve_stdio, serve_unix
+    
+    server = FORAIServer(workspace_path, enable_runtime=args.runtime, storage=args.storage,
+                         flush_interval=args.flush_interval, debounce=args.debounce / 1000,
+                         runtime_pool=runtime_pool(args))
+    try:
+        if args.socket:
+            serve_unix(server, os.path.abspath(args.socket))
+        else:
+            serve_stdio(server, sys.stdin, sys.stdout)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.registry.flush()
+        server.updater.close()
+    return 0
+
+def watch(args: argparse.Namespace, workspace_path: str) -> int:
+    """Watch the workspace and update headers until interrupted.
+    
+    Prints one JSON line per applied batch of changes.
+    
+    Args:
+        args: The parsed command line arguments
+        workspace_path: Absolute path to the workspace root
+        
+    Returns:
+        The process exit code
+    """
+    from forai.file_watcher import Watcher, open_backend
+    from forai.symbol_registry import SymbolRegistry
+    from forai.workspace_updater import WorkspaceUpdater
+    
+    registry = SymbolRegistry(workspace_path, flush_interval=args.flush_interval, storage=args.storage)
+    updater = WorkspaceUpdater(registry, args.runtime, runtime_pool(args))
+    
+    # Start watching before the initial update so that no change falls in between
+    backend = open_backend(workspace_path, args.backend, args.interval)
+    watcher = Watcher(updater, backend, debounce=args.debounce / 1000, transitive=args.transitive)
+    
+    if not args.skip_initial:
+        result = watcher.update_all()
+        logger.info(f"Updated FORAI headers for {result['updated']} files")
+    
+    def report(result):
+        result = {key: value for key, value in result.items() if key != 'written'}
+        print(json.dumps(dict(success=True, **result)), flush=True)
+    
+    try:
+        watcher.run(on_batch=report)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        registry.flush()
+        updater.close()
+    return 0
+
+def run_command(args: argparse.Namespace, parser: argparse.ArgumentParser,
+                registry: 'SymbolRegistry', workspace_path: str) -> int:
+    """Run a parsed CLI command.
+    
+    Args:
+        args: The parsed command line arguments
+        parser: The argument parser, used to print help for unknown commands
+        registry: The symbol registry
+        workspace_path: Absolute path to the workspace root
+        
+    Returns:
+        The process exit code
+    """
+    if args.command in REGISTRY_COMMANDS:
+        return _run_registry_command(args, registry, workspace_path)
+    
+    from forai.workspace_updater import WorkspaceUpdater
+    
+    updater = WorkspaceUpdater(registry, args.runtime, runtime_pool(args))
+    try:
+        return _run_updater_command(args, parser, registry, updater, workspace_path)
+    finally:
+        updater.close()
+
+def _run_registry_command(args: argparse.Namespace, registry: 'SymbolRegistry', workspace_path: str) -> int:
+    """Run a CLI command that needs neither analysis nor header writing (see ``run_command``)."""
+    from forai.dependency_tracker import DependencyTracker
+    
+    if args.command == 'list-deps':
+        # Validate file path
+        file_path = os.path.abspath(args.file)
+        if not os.path.isfile(file_path):
+            logger.error(f"File does not exist: {file_path}")
+            return 1
             
-        elif args.command == 'list-deps':
-            # Validate file path
-            file_path = os.path.abspath(args.file)
+        # Get file ID
+        file_id = registry.get_file_id(file_path)
+        
+        # Get affected files
+        tracker = DependencyTracker(registry)
+        if args.transitive:
+            affected_files = [affected_id
+                              for component in tracker.get_affected_components(file_id)
+                              for affected_id in component]
+        else:
+            affected_files = tracker.get_affected_files(file_id)
+        
+        # Convert file IDs to paths
+        affected_paths = []
+        for affected_id in affected_files:
+            file_info = registry.registry['files'].get(affected_id)
+            if file_info:
+                affected_paths.append(os.path.join(workspace_path, file_info['path']))
+        
+        # Return results
+        print(json.dumps({
+            'success': True,
+            'file_id': file_id,
+            'dependencies': affected_paths
+        }))
+        
+    elif args.command == 'rebuild':
+        result = DependencyTracker(registry).rebuild_index()
+        
+        logger.info(f"Rebuilt dependency index for {result['files']} files")
+        
+        print(json.dumps(dict(success=True, **result)))
+        
+    elif args.command == 'export-registry':
+        output_path = os.path.abspath(args.output or os.path.join(workspace_path, '.forai', 'registry.json'))
+        registry.export_json(output_path)
+        
+        print(json.dumps({
+            'success': True,
+            'output': output_path
+        }))
+        
+    return 0
+
+def _run_updater_command(args: argparse.Namespace, parser: argparse.ArgumentParser, registry: 'SymbolRegistry',
+                         updater: 'WorkspaceUpdater', workspace_path: str) -> int:
+    """Run a parsed CLI command with the workspace updater (see ``run_command``)."""
+    if args.command == 'update':
+        # Validate file paths
+        file_paths = [os.path.abspath(file) for file in args.files]
+        for file_path in file_paths:
             if not os.path.isfile(file_path):
                 logger.error(f"File does not exist: {file_path}")
                 return 1
                 
-            # Get file ID
-            file_id = registry.get_file_id(file_path)
-            
-            # Get affected files
-            dependency_tracker = DependencyTracker(registry)
-            affected_files = dependency_tracker.get_affected_files(file_id)
-            
-            # Convert file IDs to paths
-            affected_paths = []
-            for affected_id in affected_files:
-                file_info = registry.registry['files'].get(affected_id)
-                if file_info:
-                    affected_paths.append(os.path.join(workspace_path, file_info['path']))
+        # Update the files and, if their imports changed, their dependents in one pass
+        result = updater.update_files(file_paths, transitive=args.transitive)
+        
+        logger.info(f"Updated FORAI headers for {result['updated']} files")
+        
+        # Return success with JSON
+        print(json.dumps({
+            'success': True,
+            'imports_changed': bool(result['imports_changed']),
+            'modified': result['modified']
+        }))
+        
+    elif args.command == 'update-all':
+        if args.jobs < 1:
+            logger.error("--jobs must be at least 1")
+            return 1
             
-            # Return results
-            print(json.dumps({
-                'success': True,
-                'file_id': file_id,
-                'dependencies': affected_paths
-            }))
+        on_file = None
+        if args.format == 'jsonl':
+            def on_file(record):
+                if args.fields:
+                    record = {field: record[field] for field in args.fields if field in record}
+                sys.stdout.write(json.dumps(record) + '\n')
+        
+        result = updater.update_all(jobs=args.jobs, writers=args.writers, use_cache=not args.no_cache,
+                                    on_file=on_file)
+        
+        logger.info(f"Updated FORAI headers for {result['updated']} files")
+        
+        # Return success with JSON
+        print(json.dumps(dict(success=True, **result)))
+        
+    elif args.command == 'update-changed':
+        from forai.utils.git_utils import get_changed_files
+        
+        changed, renamed, deleted = get_changed_files(workspace_path, args.since)
+        
+        # Only the changed files and their dependents are analyzed; the tree is never walked
+        result = updater.apply_changes(changed, renamed, deleted, transitive=args.transitive)
+        
+        logger.info(f"Updated FORAI headers for {result['updated']} files changed since {args.since}")
+        
+        # Return success with JSON
+        print(json.dumps({
+            'success': True,
+            'updated': result['updated'],
+            'renamed': result['renamed'],
+            'removed': result['removed'],
+            'modified': result['modified']
+        }))
+        
+    elif args.command == 'rename':
+        # Validate file paths
+        old_path = os.path.abspath(args.old_path)
+        new_path = os.path.abspath(args.new_path)
+        
+        if not os.path.isfile(new_path):
+            logger.error(f"New file does not exist: {new_path}")
+            return 1
             
-        else:
-            logger.error(f"Unknown command: {args.command}")
-            parser.print_help()
+        # Update registry
+        file_id = registry.update_file_path(old_path, new_path)
+        
+        # Update header in the new file
+        result = updater.update_file(new_path)
+        
+        # Update dependent files
+        modified = int(result['modified']) + len(updater.update_dependents(file_id, args.transitive))
+        
+        logger.info(f"Updated FORAI header for renamed file {new_path}")
+        
+        # Return success with JSON
+        print(json.dumps({
+            'success': True,
+            'imports_changed': result['imports_changed'],
+            'modified': modified
+        }))
+        
+    elif args.command == 'update-deps':
+        # Validate file path
+        file_path = os.path.abspath(args.file)
+        if not os.path.isfile(file_path):
+            logger.error(f"File does not exist: {file_path}")
             return 1
             
-    except Exception as e:
-        logger.error(f"Error: {e}")
+        # Update dependent files
+        modified = updater.update_dependents(registry.get_file_id(file_path), args.transitive)
+        
+        logger.info(f"Updated FORAI headers for files depending on {file_path}")
+        
+        # Return success with JSON
         print(json.dumps({
-            'success': False,
-            'error': str(e)
+            'success': True,
+            'modified': len(modified)
         }))
+        
+    else:
+        logger.error(f"Unknown command: {args.command}")
+        parser.print_help()
         return 1
         
     return 0
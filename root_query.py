@@ -6,40 +6,82 @@ A simple API for AI assistants to query FORAI headers.
 """
 
 import argparse
+import itertools
 import json
 import os
-import re
+import queue
 import sys
-from typing import Dict, List, Optional, Any
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Any
+
+from forai.header_reader import read_header
+from forai.symbol_registry.index import MATCH_MODES, SYMBOL_TYPES, SymbolIndex, iter_registry_symbols
+from forai.symbol_registry.storage import SQLiteRegistryStorage, open_storage
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
 
 class FORAIQueryEngine:
-    """Query engine for FORAI headers."""
+    """Query engine for FORAI headers.
+    
+    The registry is loaded lazily. With the SQLite storage backend, lookups by symbol
+    name or file path are answered with indexed queries and never load it at all.
+    Name searches use an in-memory ``SymbolIndex``, built on first use; call
+    ``invalidate_index`` after changing the queried registry.
+    """
     
-    def __init__(self, workspace_path: str):
+    def __init__(self, workspace_path: str, storage: Optional[str] = None,
+                 registry: Optional[Dict[str, Any]] = None):
         """Initialize the query engine.
         
         Args:
             workspace_path: Path to the workspace root
+            storage: The registry storage backend name, or None to detect it
+            registry: An already loaded registry to query instead of reading it from storage
         """
         self.workspace_path = workspace_path
-        self.registry_path = os.path.join(workspace_path, '.forai', 'registry.json')
-        self.registry = self._load_registry()
+        self.storage = open_storage(workspace_path, storage)
+        self.registry_path = self.storage.path
+        self._registry: Optional[Dict[str, Any]] = registry
+        self._symbol_index: Optional[SymbolIndex] = None
+        
+    @property
+    def registry(self) -> Dict[str, Any]:
+        """The full symbol registry, loaded on first access."""
+        if self._registry is None:
+            self._registry = self._load_registry()
+        return self._registry
         
     def _load_registry(self) -> Dict[str, Any]:
-        """Load the symbol registry from disk."""
-        if os.path.exists(self.registry_path):
-            try:
-                with open(self.registry_path, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                return {
-                    'files': {},
-                    'file_paths': {}
-                }
-        return {
-            'files': {},
-            'file_paths': {}
-        }
+        """Load the symbol registry from storage."""
+        registry = self.storage.load()
+        if registry is None:
+            return {
+                'files': {},
+                'file_paths': {}
+            }
+        return registry
+    
+    def _indexed_storage(self) -> Optional[SQLiteRegistryStorage]:
+        """Get the storage backend if it can answer lookups without a full registry load."""
+        if self._registry is None and isinstance(self.storage, SQLiteRegistryStorage):
+            return self.storage
+        return None
+    
+    @property
+    def symbol_index(self) -> SymbolIndex:
+        """The name index of the registry, built on first access."""
+        if self._symbol_index is None:
+            storage = self._indexed_storage()
+            if storage is not None:
+                self._symbol_index = storage.build_symbol_index()
+            else:
+                self._symbol_index = SymbolIndex.from_registry(self.registry)
+        return self._symbol_index
+    
+    def invalidate_index(self) -> None:
+        """Drop the name index so the next search rebuilds it from the registry."""
+        self._symbol_index = None
     
     def find_symbol_definition(self, symbol_name: str) -> Optional[Dict[str, str]]:
         """Find where a symbol is defined.
@@ -48,18 +90,61 @@ class FORAIQueryEngine:
             symbol_name: The name of the symbol to find
             
         Returns:
-            A dictionary with file_id, file_path, and symbol_id, or None if not found
+            A dictionary with file_id, file_path, and symbol_id of the first definition
+            in registry order, or None if not found
         """
-        for file_id, file_info in self.registry.get('files', {}).items():
-            for name, symbol_id in file_info.get('symbols', {}).items():
-                if name == symbol_name:
-                    file_path = os.path.join(self.workspace_path, file_info.get('path', ''))
-                    return {
-                        'file_id': file_id,
-                        'file_path': file_path,
-                        'symbol_id': symbol_id
-                    }
-        return None
+        definitions = self.find_symbol_definitions(symbol_name)
+        if not definitions:
+            return None
+        return {key: definitions[0][key] for key in ('file_id', 'file_path', 'symbol_id')}
+    
+    def find_symbol_definitions(self, symbol_name: str,
+                                types: Optional[Iterable[str]] = None) -> List[Dict[str, str]]:
+        """Find all definitions of a symbol name.
+        
+        Args:
+            symbol_name: The name of the symbol to find
+            types: Symbol types to keep ('class', 'function', 'variable'), or None for all
+            
+        Returns:
+            A list of dictionaries with file_id, file_path, symbol_id and type, in registry order
+        """
+        if self._symbol_index is None and self._indexed_storage() is not None:
+            matches = self._indexed_storage().find_symbols(symbol_name)
+        else:
+            matches = [{'file_id': file_id, 'path': self.symbol_index.paths.get(file_id, ''),
+                        'symbol_id': symbol_id, 'type': symbol_type}
+                       for file_id, symbol_id, symbol_type in self.symbol_index.lookup(symbol_name)]
+        
+        return [{
+            'file_id': match['file_id'],
+            'file_path': os.path.join(self.workspace_path, match['path']),
+            'symbol_id': match['symbol_id'],
+            'type': match['type']
+        } for match in matches if not types or match['type'] in types]
+    
+    def search_symbols(self, query: str, match: str = 'prefix', types: Optional[Iterable[str]] = None,
+                       limit: Optional[int] = 20) -> List[Dict[str, Any]]:
+        """Search symbol names by exact name, prefix, substring or similarity.
+        
+        Args:
+            query: The name or name fragment to search for
+            match: 'exact', 'prefix', 'substring' or 'fuzzy'; looser modes also return
+                the matches of stricter ones. Substrings are only matched from three characters on
+            types: Symbol types to keep ('class', 'function', 'variable'), or None for all
+            limit: Maximum number of results, or None for all
+            
+        Returns:
+            A ranked list of dictionaries with name, file_id, file_path, symbol_id, type,
+            match and score
+            
+        Raises:
+            ValueError: If the match mode is unknown, or the query is empty and the match is not exact
+        """
+        results = self.symbol_index.search(query, match=match, types=types, limit=limit)
+        for result in results:
+            result['file_path'] = os.path.join(self.workspace_path, result.pop('path'))
+        return results
     
     def get_file_symbols(self, file_path: str) -> Optional[Dict[str, Any]]:
         """Get all symbols defined in a file.
@@ -68,75 +153,191 @@ class FORAIQueryEngine:
             file_path: Path to the file
             
         Returns:
-            A dictionary with file_id and symbols, or None if not found
+            A dictionary with file_id and symbols (and the imports and exports of its
+            header, if recorded), or None if not found
         """
         rel_path = os.path.relpath(file_path, self.workspace_path)
+        
+        storage = self._indexed_storage()
+        if storage is not None:
+            return storage.get_file(rel_path)
+            
         for file_id, file_info in self.registry.get('files', {}).items():
             if file_info.get('path') == rel_path:
-                return {
+                result = {
                     'file_id': file_id,
                     'symbols': file_info.get('symbols', {})
                 }
+                if 'exports' in file_info:
+                    result['imports'] = file_info.get('imports', [])
+                    result['exports'] = file_info['exports']
+                return result
         return None
     
-    def get_symbol_usages(self, symbol_name: str) -> List[Dict[str, str]]:
+    def get_symbol_usages(self, symbol_name: str, verify: bool = False) -> List[Dict[str, str]]:
         """Find all files that use a symbol.
         
         Args:
             symbol_name: The name of the symbol to find
+            verify: Whether to read every file's header on disk instead of the registry
             
         Returns:
             A list of dictionaries with file_id and file_path
         """
+        return list(self.iter_symbol_usages(symbol_name, verify=verify))
+    
+    def iter_symbol_usages(self, symbol_name: str, verify: bool = False) -> Iterator[Dict[str, str]]:
+        """Find all files that use a symbol, yielding each as soon as it is confirmed.
+        
+        Usages are looked up in the header sections recorded in the registry when the
+        headers were written (see ``SymbolRegistry.record_header``); only files without
+        recorded sections have their header read.
+        
+        Args:
+            symbol_name: The name of the symbol to find
+            verify: Whether to read every file's header on disk instead of the registry
+            
+        Yields:
+            Dictionaries with file_id and file_path, in registry order
+        """
         # First find the definition
         definition = self.find_symbol_definition(symbol_name)
         if not definition:
-            return []
-            
-        # Then find all files that import it
-        usages = []
-        for file_id, file_info in self.registry.get('files', {}).items():
-            file_path = os.path.join(self.workspace_path, file_info.get('path', ''))
-            
-            if not os.path.exists(file_path):
+            return
+        target_file_id, target_symbol_id = definition['file_id'], definition['symbol_id']
+        
+        storage = None if verify else self._indexed_storage()
+        if storage is not None:
+            candidates = storage.find_importers(target_file_id, target_symbol_id)
+        else:
+            candidates = []
+            references = {f"{target_file_id}:{target_symbol_id}", f"{target_file_id}:*"}
+            for file_id, file_info in self.registry.get('files', {}).items():
+                recorded = not verify and 'exports' in file_info
+                if not recorded or references.intersection(file_info.get('imports', ())):
+                    candidates.append({'file_id': file_id, 'path': file_info.get('path', ''), 'recorded': recorded})
+        
+        # Then keep the files that import it
+        seen = set()
+        for candidate in candidates:
+            file_id = candidate['file_id']
+            if file_id in seen:
                 continue
-                
-            with open(file_path, 'r') as f:
-                content = f.read(2000)  # Read first 2000 characters to find header
+            seen.add(file_id)
             
-            # Look for header
-            header_match = re.search(r'//FORAI:(.*?)//', content)
-            if not header_match:
-                continue
-                
-            header = header_match.group(1)
+            file_path = os.path.join(self.workspace_path, candidate['path'])
+            if not candidate['recorded']:
+                header = read_header(file_path)
+                if header is None or not header.imports_symbol(target_file_id, target_symbol_id):
+                    continue
+            yield {
+                'file_id': file_id,
+                'file_path': file_path
+            }
+    
+    def verify_index(self, file_ids: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Reconcile the header sections recorded in the registry with the headers on disk.
+        
+        Args:
+            file_ids: The files to check, or None for every registered file
             
-            # Check if this file imports the symbol
-            imp_pattern = f"{definition['file_id']}:{definition['symbol_id']}"
-            star_pattern = f"{definition['file_id']}:\\*"
+        Returns:
+            A dictionary with the number of checked files and the IDs of the stale files,
+            whose recorded sections are missing or differ from their header
+        """
+        files = self.registry.get('files', {})
+        if file_ids is None:
+            file_ids = list(files)
+        
+        checked = 0
+        stale = []
+        for file_id in file_ids:
+            file_info = files.get(file_id)
+            if file_info is None:
+                continue
+            checked += 1
             
-            if re.search(f"IMP\\[.*{imp_pattern}.*\\]", header) or re.search(f"IMP\\[.*{star_pattern}.*\\]", header):
-                usages.append({
-                    'file_id': file_id,
-                    'file_path': file_path
-                })
-                
-        return usages
+            header = read_header(os.path.join(self.workspace_path, file_info.get('path', '')))
+            on_disk = None
+            if header is not None:
+                on_disk = {
+                    'definitions': [defn.name for defn in header.definitions],
+                    'imports': header.import_refs(),
+                    'exports': list(header.exports)
+                }
+            recorded = None
+            if 'exports' in file_info:
+                recorded = {key: file_info.get(key, []) for key in ('definitions', 'imports', 'exports')}
+            if recorded != on_disk:
+                stale.append(file_id)
+        
+        return {
+            'checked': checked,
+            'stale': stale
+        }
         
     def list_all_symbols(self) -> Dict[str, Dict[str, str]]:
         """List all symbols in the workspace.
         
+        Names defined in several files map to their first definition in registry
+        order, like ``find_symbol_definition``; see ``list_all_definitions``.
+        
         Returns:
             A dictionary mapping symbol names to dictionaries with file_id and symbol_id
         """
-        symbols = {}
-        for file_id, file_info in self.registry.get('files', {}).items():
-            for name, symbol_id in file_info.get('symbols', {}).items():
-                symbols[name] = {
-                    'file_id': file_id,
-                    'symbol_id': symbol_id
-                }
-        return symbols
+        return {symbol.pop('name'): symbol for symbol in self.iter_symbols()}
+    
+    def iter_symbols(self) -> Iterator[Dict[str, str]]:
+        """Iterate over the first definition of every symbol name, as ``list_all_symbols`` lists them.
+        
+        Yields:
+            Dictionaries with name, file_id and symbol_id, in registry order
+        """
+        seen = set()
+        for definition in self.iter_definitions():
+            if definition['name'] not in seen:
+                seen.add(definition['name'])
+                del definition['type']
+                yield definition
+    
+    def list_all_definitions(self, types: Optional[Iterable[str]] = None) -> List[Dict[str, str]]:
+        """List every symbol definition in the workspace, including colliding names.
+        
+        Args:
+            types: Symbol types to keep ('class', 'function', 'variable'), or None for all
+            
+        Returns:
+            A list of dictionaries with name, file_id, symbol_id and type, in registry order
+        """
+        return list(self.iter_definitions(types))
+    
+    def iter_definitions(self, types: Optional[Iterable[str]] = None) -> Iterator[Dict[str, str]]:
+        """Iterate over every symbol definition in the workspace.
+        
+        With the SQLite backend, definitions are read from the database as they are
+        yielded, without loading the registry or building the name index.
+        
+        Args:
+            types: Symbol types to keep ('class', 'function', 'variable'), or None for all
+            
+        Yields:
+            Dictionaries with name, file_id, symbol_id and type, in registry order
+        """
+        storage = self._indexed_storage() if self._symbol_index is None else None
+        if storage is not None:
+            definitions = storage.iter_symbols()
+        else:
+            definitions = iter_registry_symbols(self.registry)
+        
+        for name, file_id, symbol_id, symbol_type in definitions:
+            if types and symbol_type not in types:
+                continue
+            yield {
+                'name': name,
+                'file_id': file_id,
+                'symbol_id': symbol_id,
+                'type': symbol_type
+            }
     
     def get_file_header(self, file_path: str) -> Optional[str]:
         """Get the FORAI header from a file.
@@ -147,30 +348,282 @@ class FORAIQueryEngine:
         Returns:
             The FORAI header string, or None if not found
         """
-        if not os.path.exists(file_path):
-            return None
-            
-        with open(file_path, 'r') as f:
-            content = f.read(2000)  # Read first 2000 characters to find header
+        header = read_header(file_path)
+        return header.text if header is not None else None
+
+
+# Default maximum number of results of name searches
+DEFAULT_SEARCH_LIMIT = 20
+
+# Commands whose results are record lists that can be paginated, projected and streamed
+STREAMING_COMMANDS = ('list', 'usages')
+
+
+def _project(record: Dict[str, Any], fields: Optional[Iterable[str]]) -> Dict[str, Any]:
+    """Keep only the requested fields of a record (all of them if no fields are given)."""
+    if not fields:
+        return record
+    return {field: record[field] for field in fields if field in record}
+
+
+def stream_records(query_engine: FORAIQueryEngine, command: str, symbol: Optional[str] = None,
+                   verify: bool = False, all_definitions: bool = False, types: Optional[List[str]] = None,
+                   offset: int = 0, limit: Optional[int] = None,
+                   fields: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Stream the records of a ``list`` or ``usages`` query as they are produced.
+    
+    ``list`` yields name, file_id and symbol_id records (plus type with
+    ``all_definitions`` or ``types``); ``usages`` yields file_id and file_path records.
+    
+    Args:
+        query_engine: The query engine
+        command: list or usages
+        symbol: The symbol name (usages)
+        verify: Whether to read every file's header on disk instead of the registry (usages)
+        all_definitions: List every definition instead of the first of each name (list)
+        types: Symbol types to keep (list)
+        offset: Number of records to skip
+        limit: Maximum number of records, or None for all
+        fields: Record fields to keep, or None for all
         
-        # Look for header
-        header_match = re.search(r'//FORAI:(.*?)//', content)
-        if not header_match:
-            return None
-            
-        return f"//FORAI:{header_match.group(1)}//"
+    Yields:
+        The records, in registry order
+        
+    Raises:
+        ValueError: If the command or its arguments are invalid
+    """
+    if command == 'usages':
+        if not symbol:
+            raise ValueError("usages requires a symbol")
+        records = query_engine.iter_symbol_usages(symbol, verify=verify)
+    elif command == 'list' and (all_definitions or types):
+        records = query_engine.iter_definitions(types=types)
+    elif command == 'list':
+        records = query_engine.iter_symbols()
+    else:
+        raise ValueError(f"Command {command} does not stream records")
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError("offset and limit must not be negative")
+    
+    stop = None if limit is None else offset + limit
+    for record in itertools.islice(records, offset, stop):
+        yield _project(record, fields)
+
+
+def run_query(query_engine: FORAIQueryEngine, command: str, symbol: Optional[str] = None,
+              file: Optional[str] = None, verify: bool = False, all_definitions: bool = False,
+              match: str = 'exact', types: Optional[List[str]] = None, offset: int = 0,
+              limit: Optional[int] = None, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Answer one query command.
+    
+    Args:
+        query_engine: The query engine
+        command: find, file-symbols, usages, list or header
+        symbol: The symbol name (find, usages)
+        file: The file path, absolute or relative to the current directory (file-symbols, header)
+        verify: Whether to reconcile the header index with the headers on disk
+        all_definitions: Return every definition (find, list)
+        match: Name matching mode for find ('exact', 'prefix', 'substring' or 'fuzzy')
+        types: Symbol types to keep (find, list)
+        offset: Number of list or usages records to skip
+        limit: Maximum number of list or usages records, or of find results with a
+            non-exact match (default 20, 0 for all); None returns everything
+        fields: List or usages record fields to keep, or None for all
+        
+    Returns:
+        The response dictionary printed by the command line interface
+        
+    Raises:
+        ValueError: If the command or its arguments are invalid
+    """
+    if command in ('find', 'usages') and not symbol:
+        raise ValueError(f"{command} requires a symbol")
+    if command in ('file-symbols', 'header') and not file:
+        raise ValueError(f"{command} requires a file")
+    if match not in MATCH_MODES:
+        raise ValueError(f"Unknown match mode: {match}")
+    
+    message = None
+    if command == 'find' and match != 'exact':
+        result = query_engine.search_symbols(symbol, match=match, types=types,
+                                             limit=DEFAULT_SEARCH_LIMIT if limit is None else limit or None)
+    elif command == 'find' and (all_definitions or types):
+        result = query_engine.find_symbol_definitions(symbol, types=types)
+    elif command == 'find':
+        result = query_engine.find_symbol_definition(symbol)
+        message = f"Symbol {symbol} not found"
+    elif command == 'file-symbols':
+        file_path = os.path.abspath(file)
+        result = query_engine.get_file_symbols(file_path)
+        message = f"File {file_path} not found in registry"
+    elif command == 'list' and not (all_definitions or types):
+        # Keyed by name, as list_all_symbols returns it
+        records = stream_records(query_engine, command, offset=offset, limit=limit)
+        result = {record.pop('name'): _project(record, fields) for record in records}
+    elif command in STREAMING_COMMANDS:
+        result = list(stream_records(query_engine, command, symbol=symbol, verify=verify,
+                                     all_definitions=all_definitions, types=types, offset=offset,
+                                     limit=limit, fields=fields))
+    elif command == 'header':
+        file_path = os.path.abspath(file)
+        result = query_engine.get_file_header(file_path)
+        message = f"No FORAI header found in {file_path}"
+    else:
+        raise ValueError(f"Unknown command: {command}")
+    
+    response = {
+        'success': True,
+        'result': result
+    }
+    if not result and message:
+        response['message'] = message
+    elif verify and command == 'find' and isinstance(result, list):
+        response['verify'] = query_engine.verify_index(sorted({found['file_id'] for found in result}))
+    elif verify and command in ('find', 'file-symbols'):
+        response['verify'] = query_engine.verify_index([result['file_id']])
+    elif verify and command == 'usages':
+        response['verify'] = query_engine.verify_index()
+    return response
+
+
+# Query fields accepted on each ``batch`` input line besides "command" and "id"
+_BATCH_FIELDS = ('symbol', 'file', 'verify', 'all_definitions', 'match', 'types', 'offset', 'limit', 'fields')
+
+
+def _answer_line(query_engine: FORAIQueryEngine, line: str) -> Dict[str, Any]:
+    """Answer one ``batch`` input line, reporting any error in the response."""
+    request_id = None
+    try:
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError("Query must be a JSON object")
+        request_id = request.get('id')
+        unknown = set(request) - set(_BATCH_FIELDS) - {'command', 'id'}
+        if unknown:
+            raise ValueError(f"Unknown query fields: {', '.join(sorted(unknown))}")
+        response = run_query(query_engine, request.get('command'),
+                             **{key: request[key] for key in _BATCH_FIELDS if key in request})
+    except Exception as e:
+        response = {
+            'success': False,
+            'error': str(e)
+        }
+    if request_id is not None:
+        response['id'] = request_id
+    return response
+
+
+def run_batch(query_engine: FORAIQueryEngine, lines: Iterable[str], write: Callable[[str], None],
+              jobs: int = 4) -> int:
+    """Answer queries read as JSON lines, writing one JSON-line answer per query.
+    
+    Each line is an object with a ``command`` and the ``run_query`` arguments (``symbol``,
+    ``file``, ``verify``, ``all_definitions``, ``match``, ``types``, ``offset``, ``limit``,
+    ``fields``), plus an
+    optional ``id`` echoed in the answer. The registry and name index are loaded once
+    up front; queries are then answered by ``jobs`` threads, and answers are written in
+    input order as soon as they are ready, so callers can send a query and wait for its
+    answer before sending the next one.
+    
+    Args:
+        query_engine: The query engine
+        lines: The input lines
+        write: Callback writing one answer line (without the newline)
+        jobs: Number of threads answering queries
+        
+    Returns:
+        The number of answered queries
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    # Answering from memory keeps the workers off the SQLite connection, which is bound to this thread
+    query_engine.registry
+    query_engine.symbol_index
+    
+    pending: 'queue.Queue[Optional[Future]]' = queue.Queue()
+    
+    def write_answers() -> None:
+        while True:
+            future = pending.get()
+            if future is None:
+                return
+            write(json.dumps(future.result()))
+    
+    writer = threading.Thread(target=write_answers, name='forai-query-batch-writer', daemon=True)
+    writer.start()
+    count = 0
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        try:
+            for line in lines:
+                if not line.strip():
+                    continue
+                pending.put(executor.submit(_answer_line, query_engine, line))
+                count += 1
+        finally:
+            pending.put(None)
+            writer.join()
+    return count
+
+
+def _add_record_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the output format, pagination and projection options of record-list commands."""
+    parser.add_argument('--format', choices=['json', 'jsonl'], default='json',
+                        help='Print one JSON document, or stream one JSON line per record (default: json)')
+    parser.add_argument('--offset', type=int, default=0, help='Number of records to skip')
+    parser.add_argument('--limit', type=int, default=None, help='Maximum number of records (default: all)')
+    parser.add_argument('--fields', type=lambda value: [field for field in value.split(',') if field],
+                        default=None, help='Comma-separated record fields to keep (default: all)')
+
+
+def print_records(query_engine: FORAIQueryEngine, args: argparse.Namespace) -> int:
+    """Stream the records of a ``list`` or ``usages`` command as JSON lines.
+    
+    Each record is printed as soon as it is produced. With ``--verify`` a final
+    ``{"verify": ...}`` line follows; an error ends the stream with an error line.
+    
+    Returns:
+        The process exit code
+    """
+    try:
+        for record in stream_records(query_engine, args.command, symbol=getattr(args, 'symbol', None),
+                                     verify=args.verify, all_definitions=getattr(args, 'all_definitions', False),
+                                     types=getattr(args, 'types', None), offset=args.offset,
+                                     limit=args.limit, fields=args.fields):
+            sys.stdout.write(json.dumps(record) + '\n')
+        if args.verify and args.command == 'usages':
+            sys.stdout.write(json.dumps({'verify': query_engine.verify_index()}) + '\n')
+    except Exception as e:
+        print(json.dumps({
+            'success': False,
+            'error': str(e)
+        }))
+        return 1
+    return 0
 
 
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(description='FORAI Query API')
     parser.add_argument('--workspace', '-w', required=True, help='Path to workspace root')
+    parser.add_argument('--storage', choices=['json', 'sqlite'], default=None,
+                        help='Registry storage backend (default: detect)')
+    parser.add_argument('--verify', action='store_true',
+                        help='Reconcile the header index in the registry with the headers on disk')
     
     subparsers = parser.add_subparsers(dest='command', help='Command to run')
     
     # Find symbol definition
     find_parser = subparsers.add_parser('find', help='Find where a symbol is defined')
-    find_parser.add_argument('symbol', help='Symbol name')
+    find_parser.add_argument('symbol', help='Symbol name, or name fragment with --match')
+    find_parser.add_argument('--all', action='store_true', dest='all_definitions',
+                             help='Return every definition instead of the first')
+    find_parser.add_argument('--match', choices=MATCH_MODES, default='exact',
+                             help='Match names exactly, by prefix, substring (3 or more characters) or similarity '
+                                  '(default: exact)')
+    find_parser.add_argument('--type', action='append', choices=SYMBOL_TYPES, dest='types',
+                             help='Only return symbols of this type (may be repeated)')
+    find_parser.add_argument('--limit', type=int, default=None,
+                             help=f'Maximum number of results with --match (default: {DEFAULT_SEARCH_LIMIT}, 0 for all)')
     
     # Get file symbols
     file_symbols_parser = subparsers.add_parser('file-symbols', help='Get all symbols defined in a file')
@@ -179,14 +632,26 @@ def main():
     # Get symbol usages
     usages_parser = subparsers.add_parser('usages', help='Find all files that use a symbol')
     usages_parser.add_argument('symbol', help='Symbol name')
+    _add_record_arguments(usages_parser)
     
     # List all symbols
     list_parser = subparsers.add_parser('list', help='List all symbols in the workspace')
+    list_parser.add_argument('--all', action='store_true', dest='all_definitions',
+                             help='List every definition, including names defined in several files')
+    list_parser.add_argument('--type', action='append', choices=SYMBOL_TYPES, dest='types',
+                             help='Only list symbols of this type (may be repeated, implies --all)')
+    _add_record_arguments(list_parser)
     
     # Get file header
     header_parser = subparsers.add_parser('header', help='Get the FORAI header from a file')
     header_parser.add_argument('file', help='Path to file')
     
+    # Answer many queries
+    batch_parser = subparsers.add_parser(
+        'batch', help='Answer queries read as JSON lines from stdin, one JSON-line answer per query')
+    batch_parser.add_argument('--jobs', '-j', type=int, default=4,
+                              help='Number of threads answering queries (default: 4)')
+    
     args = parser.parse_args()
     
     # Validate workspace path
@@ -199,74 +664,37 @@ def main():
         return 1
     
     # Initialize query engine
-    query_engine = FORAIQueryEngine(workspace_path)
+    query_engine = FORAIQueryEngine(workspace_path, storage=args.storage)
     
-    try:
-        if args.command == 'find':
-            result = query_engine.find_symbol_definition(args.symbol)
-            if result:
-                print(json.dumps({
-                    'success': True,
-                    'result': result
-                }))
-            else:
-                print(json.dumps({
-                    'success': True,
-                    'result': None,
-                    'message': f"Symbol {args.symbol} not found"
-                }))
-        
-        elif args.command == 'file-symbols':
-            file_path = os.path.abspath(args.file)
-            result = query_engine.get_file_symbols(file_path)
-            if result:
-                print(json.dumps({
-                    'success': True,
-                    'result': result
-                }))
-            else:
-                print(json.dumps({
-                    'success': True,
-                    'result': None,
-                    'message': f"File {file_path} not found in registry"
-                }))
-        
-        elif args.command == 'usages':
-            result = query_engine.get_symbol_usages(args.symbol)
-            print(json.dumps({
-                'success': True,
-                'result': result
-            }))
-        
-        elif args.command == 'list':
-            result = query_engine.list_all_symbols()
-            print(json.dumps({
-                'success': True,
-                'result': result
-            }))
-        
-        elif args.command == 'header':
-            file_path = os.path.abspath(args.file)
-            result = query_engine.get_file_header(file_path)
-            if result:
-                print(json.dumps({
-                    'success': True,
-                    'result': result
-                }))
-            else:
-                print(json.dumps({
-                    'success': True,
-                    'result': None,
-                    'message': f"No FORAI header found in {file_path}"
-                }))
-        
-        else:
+    if args.command == 'batch':
+        if args.jobs < 1:
             print(json.dumps({
                 'success': False,
-                'error': f"Unknown command: {args.command}"
+                'error': "--jobs must be at least 1"
             }))
             return 1
+        
+        def write(answer: str) -> None:
+            sys.stdout.write(answer + '\n')
+            sys.stdout.flush()
+        
+        run_batch(query_engine, sys.stdin, write, jobs=args.jobs)
+        return 0
     
+    if getattr(args, 'format', 'json') == 'jsonl':
+        return print_records(query_engine, args)
+    
+    try:
+        response = run_query(query_engine, args.command,
+                             symbol=getattr(args, 'symbol', None),
+                             file=getattr(args, 'file', None),
+                             verify=args.verify,
+                             all_definitions=getattr(args, 'all_definitions', False),
+                             match=getattr(args, 'match', 'exact'),
+                             types=getattr(args, 'types', None),
+                             offset=getattr(args, 'offset', 0),
+                             limit=getattr(args, 'limit', None),
+                             fields=getattr(args, 'fields', None))
     except Exception as e:
         print(json.dumps({
             'success': False,
@@ -274,6 +702,7 @@ def main():
         }))
         return 1
     
+    print(json.dumps(response))
     return 0
 
 
@@ -1,3 +1,19 @@
-from forai.runtime_introspector.introspector import RuntimeIntrospector
+import importlib
+from typing import Any
 
-__all__ = ["RuntimeIntrospector"]
\ No newline at end of file
+__all__ = ["RuntimeIntrospector", "IntrospectionPool", "RuntimeCache"]
+
+# Modules of the exported classes; they are imported on first use, as importing them pulls
+# in inspect and multiprocessing, which commands without runtime introspection do not need
+_EXPORTS = {
+    "RuntimeIntrospector": "forai.runtime_introspector.introspector",
+    "IntrospectionPool": "forai.runtime_introspector.pool",
+    "RuntimeCache": "forai.runtime_introspector.cache",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module), name)
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import logging
+from typing import Dict, Iterable, Optional, Any
+
+from forai.header_reader import strip_header
+from forai.utils.file_utils import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+
+def hash_source(file_path: str) -> str:
+    """Compute the hash of a source file's content without its FORAI header.
+
+    Leading blank lines are ignored too, as a newly written header is followed by
+    one; writing or updating a header therefore does not change the hash.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        The hex digest of the content
+    """
+    with open(file_path, 'rb') as f:
+        return hashlib.blake2b(strip_header(f.read()).lstrip(b'\r\n'), digest_size=20).hexdigest()
+
+
+class RuntimeCache:
+    """Runtime introspection results stored in ``.forai/runtime_cache.json``.
+
+    Entries are keyed by workspace-relative path and hold the introspection result
+    together with a fingerprint of the module and of every source file imported while
+    it was executed: their mtime, size and content hash. An entry is reused only if
+    none of these files changed; files whose mtime or size changed are hashed to tell.
+    Failed introspections are not cached.
+    """
+
+    VERSION = 2
+
+    def __init__(self, workspace_path: str):
+        """Initialize the runtime cache.
+
+        Args:
+            workspace_path: Path to the workspace root directory
+        """
+        self.workspace_path = workspace_path
+        self.cache_path = os.path.join(workspace_path, '.forai', 'runtime_cache.json')
+        self.entries: Dict[str, Dict[str, Any]] = self._load()
+        self.stats = {'hits': 0, 'misses': 0}
+        self._dirty = False
+        # Fingerprints taken during this run, shared by the modules importing the same files
+        self._fingerprints: Dict[str, Dict[str, Any]] = {}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Load the cache from disk, discarding it if it is unreadable or outdated."""
+        if not os.path.exists(self.cache_path):
+            return {}
+
+        try:
+            with open(self.cache_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Failed to load runtime cache file {self.cache_path}: {e}")
+            return {}
+
+        if data.get('version') != self.VERSION:
+            return {}
+        return data.get('files', {})
+
+    def save(self) -> bool:
+        """Write the cache to disk if it changed.
+
+        Returns:
+            True if the cache was written
+        """
+        if not self._dirty:
+            return False
+
+        atomic_write_text(self.cache_path, json.dumps({'version': self.VERSION, 'files': self.entries}))
+        self._dirty = False
+        return True
+
+    def _key(self, file_path: str) -> str:
+        """Get the cache key of a file."""
+        return os.path.relpath(file_path, self.workspace_path)
+
+    def _unchanged(self, file_path: str, fingerprint: Dict[str, Any]) -> bool:
+        """Check a file against its recorded fingerprint, refreshing the stat data on a hash match."""
+        try:
+            st = os.stat(file_path)
+            if st.st_mtime_ns == fingerprint['mtime_ns'] and st.st_size == fingerprint['size']:
+                return True
+            if hash_source(file_path) != fingerprint['hash']:
+                return False
+        except OSError:
+            return False
+
+        fingerprint['mtime_ns'] = st.st_mtime_ns
+        fingerprint['size'] = st.st_size
+        self._dirty = True
+        return True
+
+    def _fingerprint(self, file_path: str) -> Dict[str, Any]:
+        """Take the fingerprint of a file, once per run."""
+        fingerprint = self._fingerprints.get(file_path)
+        if fingerprint is None:
+            st = os.stat(file_path)
+            fingerprint = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'hash': hash_source(file_path)}
+            self._fingerprints[file_path] = fingerprint
+        return dict(fingerprint)
+
+    def lookup(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """Look up the introspection result of a module.
+
+        Args:
+            file_path: Path to the module
+
+        Returns:
+            The cached result, or None if the module or one of its imports changed
+        """
+        entry = self.entries.get(self._key(file_path))
+        if entry is not None and self._unchanged(file_path, entry['module']) and all(
+                self._unchanged(dependency, fingerprint) for dependency, fingerprint in entry['imports'].items()):
+            self.stats['hits'] += 1
+            return entry['result']
+
+        self.stats['misses'] += 1
+        return None
+
+    def record(self, file_path: str, result: Dict[str, Any]) -> None:
+        """Record the introspection result of a module.
+
+        Args:
+            file_path: Path to the module
+            result: The ``RuntimeIntrospector.introspect`` result
+        """
+        key = self._key(file_path)
+        if 'error' in result:
+            if self.entries.pop(key, None) is not None:
+                self._dirty = True
+            return
+
+        try:
+            st = os.stat(file_path)
+            module = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'hash': hash_source(file_path)}
+            imports = {dependency: self._fingerprint(dependency)
+                       for dependency in result.get('imported_files', ()) if dependency != file_path}
+        except OSError as e:
+            logger.debug(f"Failed to cache the introspection of {file_path}: {e}")
+            self.entries.pop(key, None)
+            return
+
+        self.entries[key] = {'module': module, 'imports': imports, 'result': result}
+        self._dirty = True
+
+    def prune(self, file_paths: Iterable[str]) -> None:
+        """Drop entries of files that are no longer present.
+
+        Args:
+            file_paths: Paths of all files that still exist
+        """
+        keep = {self._key(file_path) for file_path in file_paths}
+        stale = [key for key in self.entries if key not in keep]
+        for key in stale:
+            del self.entries[key]
+        if stale:
+            self._dirty = True
@@ -1,3 +1,6 @@
+import builtins
+import importlib.abc
+import importlib.machinery
 import importlib.util
 import inspect
 import sys
@@ -6,8 +9,32 @@ import logging
 import types
 from typing import Dict, Any, List, Set, Optional
 
+from forai.header_reader import strip_header
+
 logger = logging.getLogger(__name__)
 
+
+class _HeaderStrippingLoader(importlib.machinery.SourceFileLoader):
+    """Loads a Python source file without its FORAI header."""
+    
+    def source_to_code(self, data, path, *, _optimize=-1):
+        return super().source_to_code(strip_header(data), path, _optimize=_optimize)
+        
+    def set_data(self, path, data, *, _mode=0o666):
+        # Do not cache bytecode compiled from the stripped source
+        pass
+
+
+class _HeaderStrippingFinder(importlib.abc.MetaPathFinder):
+    """Finds modules on sys.path like the path finder and loads their sources without the FORAI header."""
+    
+    def find_spec(self, fullname, path=None, target=None):
+        spec = importlib.machinery.PathFinder.find_spec(fullname, path, target)
+        if spec is not None and type(spec.loader) is importlib.machinery.SourceFileLoader:
+            spec.loader = _HeaderStrippingLoader(fullname, spec.origin)
+        return spec
+
+
 class RuntimeIntrospector:
     """Runtime introspector for Python files.
     
@@ -26,7 +53,10 @@ class RuntimeIntrospector:
             file_path: Path to the Python file
             
         Returns:
-            A dictionary with runtime_symbols and imported_modules
+            A dictionary with the module name, runtime_symbols (classes and functions
+            carry the name of the module defining them, and classes the modules of their
+            bases), imported_modules and imported_files (the source files of the modules
+            imported while executing it), or an error
         """
         logger.info(f"Introspecting file: {file_path}")
         
@@ -42,29 +72,54 @@ class RuntimeIntrospector:
             # Create the module
             module = importlib.util.module_from_spec(spec)
             
+            # The FORAI header is not valid Python; compile the source without it
+            with open(file_path, 'rb') as f:
+                code = compile(strip_header(f.read()), file_path, 'exec')
+            
             # Track imported modules
-            original_import = __import__
+            original_import = builtins.__import__
             imported_modules = {}
+            modules_before = set(sys.modules)
             
-            def custom_import(name, *args, **kwargs):
-                imported_modules[name] = True
-                return original_import(name, *args, **kwargs)
+            def custom_import(name, globals=None, locals=None, fromlist=(), level=0):
+                if level == 0:
+                    imported_modules[name] = True
+                return original_import(name, globals, locals, fromlist, level)
             
             # Replace builtin import
             sys.modules[module_name] = module
-            sys.__import__ = custom_import
+            builtins.__import__ = custom_import
+            
+            # Let the module import its siblings, as when run as a script; they may have FORAI headers too
+            module_dir = os.path.dirname(os.path.abspath(file_path))
+            sys.path.insert(0, module_dir)
+            finder = _HeaderStrippingFinder()
+            if importlib.machinery.PathFinder in sys.meta_path:
+                sys.meta_path.insert(sys.meta_path.index(importlib.machinery.PathFinder), finder)
+            else:
+                sys.meta_path.append(finder)
             
             try:
                 # Execute the module
-                spec.loader.exec_module(module)
+                exec(code, module.__dict__)
             finally:
                 # Restore original import
-                sys.__import__ = original_import
+                builtins.__import__ = original_import
+                if sys.path and sys.path[0] == module_dir:
+                    del sys.path[0]
+                sys.meta_path.remove(finder)
                 
                 # Clean up
                 if module_name in sys.modules:
                     del sys.modules[module_name]
             
+            # Files of the imported modules, including the ones they imported in turn
+            imported_files = set()
+            for name in set(imported_modules) | (set(sys.modules) - modules_before):
+                imported_file = getattr(sys.modules.get(name), '__file__', None)
+                if imported_file and os.path.isfile(imported_file):
+                    imported_files.add(os.path.abspath(imported_file))
+            
             # Introspect the module
             runtime_symbols = {}
             for name, obj in inspect.getmembers(module):
@@ -73,19 +128,28 @@ class RuntimeIntrospector:
                     
                 if inspect.isclass(obj):
                     bases = []
+                    base_modules = []
                     for base in obj.__bases__:
                         if base is not object:
                             bases.append(base.__name__)
+                            base_modules.append(getattr(base, '__module__', None))
                             
                     runtime_symbols[name] = {
                         'type': 'class',
+                        'module': getattr(obj, '__module__', None),
                         'bases': bases,
+                        'base_modules': base_modules,
                         'docstring': inspect.getdoc(obj)
                     }
                 elif inspect.isfunction(obj):
+                    try:
+                        signature = str(inspect.signature(obj))
+                    except (TypeError, ValueError):
+                        signature = None
                     runtime_symbols[name] = {
                         'type': 'function',
-                        'signature': str(inspect.signature(obj)),
+                        'module': getattr(obj, '__module__', None),
+                        'signature': signature,
                         'docstring': inspect.getdoc(obj)
                     }
                 elif not inspect.ismodule(obj) and not inspect.isbuiltin(obj):
@@ -96,8 +160,10 @@ class RuntimeIntrospector:
                     }
             
             return {
+                'module': module_name,
                 'runtime_symbols': runtime_symbols,
-                'imported_modules': list(imported_modules.keys())
+                'imported_modules': list(imported_modules.keys()),
+                'imported_files': sorted(imported_files)
             }
             
         except Exception as e:
@@ -0,0 +1,250 @@
+import os
+import sys
+import queue
+import logging
+import threading
+from typing import TYPE_CHECKING, Dict, Any, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the per-module limits. The memory limit caps the address space, which
+# counts reserved virtual memory: numpy, scipy or torch exceed any small value on import
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MEMORY_LIMIT_MB: Optional[int] = None
+
+# Number of modules a worker introspects before it is replaced, bounding leaked state
+DEFAULT_MAX_TASKS_PER_WORKER = 50
+
+
+def _failure(message: str) -> Dict[str, Any]:
+    """Build the introspection result of a module that could not be introspected."""
+    return {
+        'error': message,
+        'runtime_symbols': {},
+        'imported_modules': []
+    }
+
+
+def _worker_main(conn: 'Connection', memory_limit_mb: Optional[int]) -> None:
+    """Introspect the modules whose paths are received on a connection until it closes.
+
+    Runs in a worker subprocess. Modules imported while introspecting a file are
+    dropped from ``sys.modules`` afterwards, so files do not see each other's imports.
+    Output of the introspected modules goes to stderr, keeping the parent's stdout clean.
+    """
+    try:
+        os.dup2(2, 1)
+    except OSError:
+        pass
+    sys.stdout = sys.stderr
+
+    if memory_limit_mb and resource is not None:
+        limit = memory_limit_mb * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError) as e:
+            logger.warning(f"Could not limit introspection worker memory: {e}")
+
+    from forai.runtime_introspector.introspector import RuntimeIntrospector
+    
+    introspector = RuntimeIntrospector()
+    while True:
+        try:
+            file_path = conn.recv()
+        except (EOFError, OSError):
+            return
+        if file_path is None:
+            return
+
+        modules = set(sys.modules)
+        path = list(sys.path)
+        cwd = os.getcwd()
+        try:
+            result = introspector.introspect(file_path)
+        except BaseException as e:  # SystemExit, KeyboardInterrupt and MemoryError raised by the module
+            result = _failure(f"{type(e).__name__}: {e}")
+        finally:
+            for name in set(sys.modules) - modules:
+                del sys.modules[name]
+            sys.path[:] = path
+            try:
+                os.chdir(cwd)
+            except OSError:
+                pass
+
+        try:
+            conn.send(result)
+        except Exception as e:
+            conn.send(_failure(f"Could not return the introspection result: {e}"))
+
+
+class _Worker:
+    """A worker subprocess and the parent's end of its connection."""
+
+    def __init__(self, context: Any, memory_limit_mb: Optional[int]):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, memory_limit_mb),
+                                       name='forai-introspector', daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+
+    def stop(self, kill: bool = False) -> None:
+        """Stop the worker, killing it right away if it may be stuck."""
+        if not kill:
+            try:
+                self.conn.send(None)
+                self.process.join(1.0)
+            except (OSError, ValueError):
+                pass
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class IntrospectionPool:
+    """Runs ``RuntimeIntrospector`` in a pool of reusable worker subprocesses.
+
+    Importing a module to introspect it runs arbitrary code: a slow or heavy import
+    or an infinite loop would otherwise stall the whole run, and import side effects
+    would leak into later files. Each module is introspected in a worker subprocess
+    with a wall-clock timeout and, if configured, an address space limit. A worker that times out or
+    dies is replaced, and the module gets an ``error`` result like any other
+    introspection failure. Results are plain data.
+
+    Workers are started with the ``spawn`` method on first use and reused; each one
+    is replaced after ``max_tasks_per_worker`` modules.
+    """
+
+    def __init__(self, workers: Optional[int] = None, timeout: Optional[float] = None,
+                 memory_limit_mb: Optional[int] = DEFAULT_MEMORY_LIMIT_MB,
+                 max_tasks_per_worker: int = DEFAULT_MAX_TASKS_PER_WORKER):
+        """Initialize the pool.
+
+        Args:
+            workers: Maximum number of worker subprocesses (default: min(4, CPU count))
+            timeout: Seconds a module may take to import and introspect (default: ``DEFAULT_TIMEOUT``)
+            memory_limit_mb: Address space limit of each worker in MiB, or None for no limit
+                (only enforced where the ``resource`` module is available)
+            max_tasks_per_worker: Number of modules after which a worker is replaced
+        """
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_tasks_per_worker = max_tasks_per_worker
+        # multiprocessing is imported here, so that importing the module for the defaults is cheap
+        import multiprocessing
+        self._context = multiprocessing.get_context('spawn')
+        self._idle: 'queue.Queue[_Worker]' = queue.Queue()
+        self._started = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _acquire(self) -> _Worker:
+        """Take an idle worker, starting one if fewer than ``workers`` are running."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Introspection pool is closed")
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                if self._started < self.workers:
+                    self._started += 1
+                    try:
+                        return _Worker(self._context, self.memory_limit_mb)
+                    except Exception:
+                        self._started -= 1
+                        raise
+        return self._idle.get()
+
+    def _release(self, worker: _Worker, healthy: bool) -> None:
+        """Return a worker to the pool, or replace it if it is broken or used up."""
+        if healthy and worker.tasks < self.max_tasks_per_worker and not self._closed:
+            self._idle.put(worker)
+            return
+
+        worker.stop(kill=not healthy)
+        with self._lock:
+            self._started -= 1
+            if self._closed:
+                return
+            # Hand a fresh worker to any thread waiting for one
+            self._started += 1
+        try:
+            self._idle.put(_Worker(self._context, self.memory_limit_mb))
+        except Exception as e:
+            logger.error(f"Could not start an introspection worker: {e}")
+            with self._lock:
+                self._started -= 1
+
+    def introspect(self, file_path: str) -> Dict[str, Any]:
+        """Introspect a module in a worker subprocess.
+
+        Args:
+            file_path: Path to the Python file
+
+        Returns:
+            The ``RuntimeIntrospector.introspect`` result, with an ``error`` if the module
+            failed, timed out or killed its worker
+        """
+        worker = self._acquire()
+        worker.tasks += 1
+        healthy = False
+        try:
+            worker.conn.send(file_path)
+            if not worker.conn.poll(self.timeout):
+                logger.error(f"Introspection of {file_path} timed out after {self.timeout}s")
+                return _failure(f"Introspection timed out after {self.timeout}s")
+            result = worker.conn.recv()
+            healthy = True
+            return result
+        except (EOFError, OSError):
+            worker.process.join(1.0)
+            logger.error(f"Introspection worker died while introspecting {file_path}")
+            return _failure(f"Introspection worker exited with code {worker.process.exitcode}")
+        finally:
+            self._release(worker, healthy)
+
+    def introspect_many(self, file_paths: Iterable[str]) -> List[Dict[str, Any]]:
+        """Introspect several modules concurrently.
+
+        Args:
+            file_paths: Paths to the Python files
+
+        Returns:
+            The introspection results, in the order of the paths
+        """
+        file_paths = list(file_paths)
+        if len(file_paths) <= 1 or self.workers == 1:
+            return [self.introspect(file_path) for file_path in file_paths]
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(file_paths))) as executor:
+            return list(executor.map(self.introspect, file_paths))
+
+    def close(self) -> None:
+        """Stop all workers."""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.stop()
+            with self._lock:
+                self._started -= 1
+
+    def __enter__(self) -> 'IntrospectionPool':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,4 @@
+from forai.server.server import FORAIServer, RPCError, serve_stdio, serve_unix
+from forai.server.update_queue import UpdateQueue
+
+__all__ = ["FORAIServer", "RPCError", "UpdateQueue", "serve_stdio", "serve_unix"]
@@ -0,0 +1,463 @@
+import os
+import json
+import inspect
+import socket
+import logging
+import threading
+import socketserver
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, TextIO, Callable
+
+from forai.symbol_registry import SymbolRegistry
+from forai.workspace_updater import WorkspaceUpdater
+from forai.query import FORAIQueryEngine, run_query
+from forai.server.update_queue import UpdateQueue
+
+if TYPE_CHECKING:
+    from forai.runtime_introspector import IntrospectionPool
+
+logger = logging.getLogger(__name__)
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+class RPCError(Exception):
+    """An error returned to the client as a JSON-RPC error object."""
+
+    def __init__(self, code: int, message: str):
+        """Initialize the error.
+
+        Args:
+            code: The JSON-RPC error code
+            message: The error message
+        """
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class FORAIServer:
+    """Long-lived FORAI process answering line-delimited JSON-RPC 2.0 requests.
+
+    The registry, dependency index and analysis components are loaded once and kept
+    in memory between requests. Each request runs in a registry batch, so changes
+    are persisted when the request completes. Requests are handled one at a time.
+
+    With a debounce window, ``update`` requests are queued and coalesced: files saved
+    in a burst are updated in one batch with a single affected-set computation, and
+    every request in the batch is answered with the batch result.
+
+    The server assumes it is the only writer of the workspace registry while it runs;
+    changes made by a separate ``forai`` process are not picked up.
+
+    Methods (params are passed by name; paths may be relative to the workspace):
+        ping, update(file or files, transitive), update_all(jobs, writers, use_cache),
+        rename(old_path, new_path, transitive), update_deps(file, transitive),
+        list_deps(file, transitive), rebuild,
+        query(command, symbol, file, verify, all_definitions, match, types, offset, limit, fields), shutdown
+    """
+
+    def __init__(self, workspace_path: str, enable_runtime: bool = False,
+                 storage: Optional[str] = None, flush_interval: Optional[int] = None,
+                 debounce: float = 0.0, runtime_pool: Optional['IntrospectionPool'] = None):
+        """Initialize the server.
+
+        Args:
+            workspace_path: Path to the workspace root directory
+            enable_runtime: Whether to use runtime introspection
+            storage: The registry storage backend name, or None to detect it
+            flush_interval: Persist the registry every N changes within a request
+            debounce: Seconds to wait for more ``update`` requests before processing
+                a batch (0 processes each request immediately)
+            runtime_pool: The introspection worker pool, or None for the default limits
+        """
+        self.workspace_path = os.path.abspath(workspace_path)
+        self.registry = SymbolRegistry(self.workspace_path, flush_interval=flush_interval, storage=storage)
+        self.updater = WorkspaceUpdater(self.registry, enable_runtime, runtime_pool)
+        self.query_engine = FORAIQueryEngine(self.workspace_path, storage=self.registry.storage.name,
+                                             registry=self.registry.registry)
+        self._index_version = self.registry.version
+        self.running = True
+        self._lock = threading.Lock()
+        self.update_queue = UpdateQueue(self._process_updates, debounce) if debounce > 0 else None
+        self._methods: Dict[str, Callable[..., Dict[str, Any]]] = {
+            'ping': self.ping,
+            'update': self.update,
+            'update_all': self.update_all,
+            'rename': self.rename,
+            'update_deps': self.update_deps,
+            'list_deps': self.list_deps,
+            'rebuild': self.rebuild,
+            'query': self.query,
+            'shutdown': self.shutdown
+        }
+
+    def handle_line(self, line: str) -> Optional[str]:
+        """Handle one line of input and wait for its response.
+
+        Args:
+            line: A JSON-RPC request
+
+        Returns:
+            The JSON-encoded response, or None for notifications and blank lines
+        """
+        responses = []
+        self.submit_line(line, responses.append).result()
+        return responses[0] if responses else None
+
+    def submit_line(self, line: str, respond: Callable[[str], None]) -> Future:
+        """Handle one line of input.
+
+        Queued ``update`` requests are answered from the update queue thread once
+        their batch has been processed; all other requests are answered before this
+        method returns.
+
+        Args:
+            line: A JSON-RPC request
+            respond: Called with the JSON-encoded response (not called for notifications)
+
+        Returns:
+            A future that is done once the request has been answered
+        """
+        done: Future = Future()
+        done.set_result(None)
+        if not line.strip():
+            return done
+
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            respond(json.dumps(self._error_response(None, RPCError(PARSE_ERROR, f"Parse error: {e}"))))
+            return done
+
+        if (self.update_queue is not None and isinstance(request, dict)
+                and request.get('method') == 'update'):
+            try:
+                future = self._submit_update(**self._params(request, self.update))
+            except Exception as e:
+                # Includes submitting to the update queue after shutdown
+                if 'id' in request:
+                    error = e if isinstance(e, RPCError) else RPCError(INTERNAL_ERROR, str(e))
+                    respond(json.dumps(self._error_response(request.get('id'), error)))
+                return done
+
+            replied: Future = Future()
+
+            def reply(future: Future) -> None:
+                try:
+                    if 'id' in request:
+                        try:
+                            response = {'jsonrpc': '2.0', 'id': request['id'], 'result': future.result()}
+                        except Exception as e:
+                            response = self._error_response(request['id'], RPCError(INTERNAL_ERROR, str(e)))
+                        respond(json.dumps(response))
+                finally:
+                    replied.set_result(None)
+
+            future.add_done_callback(reply)
+            return replied
+
+        response = self.handle_request(request)
+        if response is not None:
+            respond(json.dumps(response))
+        return done
+
+    def handle_request(self, request: Any) -> Optional[Dict[str, Any]]:
+        """Handle a decoded JSON-RPC request.
+
+        Args:
+            request: The request object
+
+        Returns:
+            The response object, or None for notifications
+        """
+        if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+            return self._error_response(None, RPCError(INVALID_REQUEST, "Invalid request"))
+
+        request_id = request.get('id')
+        is_notification = 'id' not in request
+
+        try:
+            method = self._methods.get(request['method'])
+            if method is None:
+                raise RPCError(METHOD_NOT_FOUND, f"Unknown method: {request['method']}")
+
+            params = self._params(request, method)
+            if method in (self.update, self.shutdown):
+                # These wait for the update queue, which takes the lock itself
+                result = method(**params)
+            else:
+                with self._lock:
+                    with self.registry.batch():
+                        result = method(**params)
+        except RPCError as e:
+            return None if is_notification else self._error_response(request_id, e)
+        except Exception as e:
+            logger.error(f"Error handling {request['method']}: {e}")
+            return None if is_notification else self._error_response(request_id, RPCError(INTERNAL_ERROR, str(e)))
+
+        if is_notification:
+            return None
+        return {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+
+    def _params(self, request: Dict[str, Any], method: Callable[..., Any]) -> Dict[str, Any]:
+        """Get the params of a request and check them against the method signature.
+
+        Raises:
+            RPCError: If the params do not match the method
+        """
+        params = request.get('params') or {}
+        if not isinstance(params, dict):
+            raise RPCError(INVALID_PARAMS, "Params must be an object")
+        try:
+            inspect.signature(method).bind(**params)
+        except TypeError as e:
+            raise RPCError(INVALID_PARAMS, str(e))
+        return params
+
+    def _error_response(self, request_id: Any, error: RPCError) -> Dict[str, Any]:
+        """Build a JSON-RPC error response."""
+        return {
+            'jsonrpc': '2.0',
+            'id': request_id,
+            'error': {'code': error.code, 'message': error.message}
+        }
+
+    def _resolve_file(self, file_path: str, must_exist: bool = True) -> str:
+        """Resolve a request path against the workspace root.
+
+        Raises:
+            RPCError: If the file must exist and does not
+        """
+        file_path = os.path.abspath(os.path.join(self.workspace_path, file_path))
+        if must_exist and not os.path.isfile(file_path):
+            raise RPCError(INVALID_PARAMS, f"File does not exist: {file_path}")
+        return file_path
+
+    def ping(self) -> Dict[str, Any]:
+        """Check that the server is alive."""
+        return {'success': True, 'workspace': self.workspace_path}
+
+    def update(self, file: Optional[str] = None, files: Optional[List[str]] = None,
+               transitive: bool = False) -> Dict[str, Any]:
+        """Update the headers of changed files and, if their imports changed, of their dependents."""
+        return self._submit_update(file, files, transitive).result()
+
+    def _submit_update(self, file: Optional[str] = None, files: Optional[List[str]] = None,
+                       transitive: bool = False) -> Future:
+        """Queue an update, or run it immediately without a debounce window.
+
+        Raises:
+            RPCError: If no file is given or a file does not exist
+        """
+        file_paths = ([file] if file else []) + list(files or [])
+        if not file_paths:
+            raise RPCError(INVALID_PARAMS, "update requires file or files")
+        file_paths = [self._resolve_file(file_path) for file_path in file_paths]
+
+        if self.update_queue is not None:
+            return self.update_queue.submit(file_paths, transitive)
+
+        future: Future = Future()
+        try:
+            future.set_result(self._process_updates(file_paths, transitive))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _process_updates(self, file_paths: List[str], transitive: bool) -> Dict[str, Any]:
+        """Update a batch of changed files in one pass."""
+        with self._lock:
+            with self.registry.batch():
+                result = self.updater.update_files(file_paths, transitive=transitive)
+
+        return {
+            'success': True,
+            'updated': result['updated'],
+            'imports_changed': bool(result['imports_changed']),
+            'modified': result['modified']
+        }
+
+    def update_all(self, jobs: int = 1, writers: Optional[int] = None, use_cache: bool = True) -> Dict[str, Any]:
+        """Update the headers of all Python files in the workspace."""
+        if jobs < 1:
+            raise RPCError(INVALID_PARAMS, "jobs must be at least 1")
+
+        result = self.updater.update_all(jobs=jobs, writers=writers, use_cache=use_cache)
+        return dict(success=True, **result)
+
+    def rename(self, old_path: str, new_path: str, transitive: bool = False) -> Dict[str, Any]:
+        """Handle a file rename and update the headers that refer to the file."""
+        old_path = self._resolve_file(old_path, must_exist=False)
+        new_path = self._resolve_file(new_path)
+
+        file_id = self.registry.update_file_path(old_path, new_path)
+        result = self.updater.update_file(new_path)
+        modified = int(result['modified']) + len(self.updater.update_dependents(file_id, transitive))
+
+        return {
+            'success': True,
+            'imports_changed': result['imports_changed'],
+            'modified': modified
+        }
+
+    def update_deps(self, file: str, transitive: bool = False) -> Dict[str, Any]:
+        """Update the headers of the files that depend on a file."""
+        file_id = self.registry.get_file_id(self._resolve_file(file))
+        modified = self.updater.update_dependents(file_id, transitive)
+
+        return {
+            'success': True,
+            'modified': len(modified)
+        }
+
+    def list_deps(self, file: str, transitive: bool = False) -> Dict[str, Any]:
+        """List the files that depend on a file."""
+        file_id = self.registry.get_file_id(self._resolve_file(file))
+        tracker = self.updater.dependency_tracker
+        if transitive:
+            affected_files = [affected_id
+                              for component in tracker.get_affected_components(file_id)
+                              for affected_id in component]
+        else:
+            affected_files = tracker.get_affected_files(file_id)
+
+        affected_paths = []
+        for affected_id in affected_files:
+            file_info = self.registry.registry['files'].get(affected_id)
+            if file_info:
+                affected_paths.append(os.path.join(self.workspace_path, file_info['path']))
+
+        return {
+            'success': True,
+            'file_id': file_id,
+            'dependencies': affected_paths
+        }
+
+    def rebuild(self) -> Dict[str, Any]:
+        """Rebuild the dependency index from the FORAI headers."""
+        return dict(success=True, **self.updater.dependency_tracker.rebuild_index())
+
+    def query(self, command: str, symbol: Optional[str] = None, file: Optional[str] = None,
+              verify: bool = False, all_definitions: bool = False, match: str = 'exact',
+              types: Optional[List[str]] = None, offset: int = 0, limit: Optional[int] = None,
+              fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Run a ``forai-query`` command (find, file-symbols, usages, list or header).
+
+        With ``verify``, the header index in the registry is reconciled with the headers
+        on disk as with ``forai-query --verify``. The other arguments correspond to the
+        ``find --all/--match/--type/--limit`` options and the ``list`` and ``usages``
+        ``--all/--type/--offset/--limit/--fields`` options.
+        """
+        if self.registry.version != self._index_version:
+            self.query_engine.invalidate_index()
+            self._index_version = self.registry.version
+        if file:
+            file = self._resolve_file(file, must_exist=False)
+
+        try:
+            return run_query(self.query_engine, command, symbol=symbol, file=file, verify=verify,
+                             all_definitions=all_definitions, match=match, types=types, offset=offset,
+                             limit=limit, fields=fields)
+        except ValueError as e:
+            raise RPCError(INVALID_PARAMS, str(e))
+
+    def shutdown(self) -> Dict[str, Any]:
+        """Process any queued updates and stop the server after this request."""
+        if self.update_queue is not None:
+            self.update_queue.close()
+        self.running = False
+        return {'success': True}
+
+
+def _line_writer(write: Callable[[str], None], flush: Callable[[], None]) -> Callable[[str], None]:
+    """Build a thread-safe callback that writes one response per line."""
+    lock = threading.Lock()
+
+    def respond(response: str) -> None:
+        with lock:
+            write(response + '\n')
+            flush()
+
+    return respond
+
+
+def serve_stdio(server: FORAIServer, stdin: TextIO, stdout: TextIO) -> None:
+    """Serve requests read line by line from a stream until it closes or shutdown is requested.
+
+    Args:
+        server: The FORAI server
+        stdin: The stream requests are read from
+        stdout: The stream responses are written to
+    """
+    logger.info(f"Serving {server.workspace_path} on stdio")
+    respond = _line_writer(stdout.write, stdout.flush)
+    for line in stdin:
+        server.submit_line(line, respond)
+        if not server.running:
+            break
+
+    # Answer updates still waiting for their debounce window
+    if server.update_queue is not None:
+        server.update_queue.close()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handles one Unix socket connection."""
+
+    def handle(self):
+        respond = _line_writer(lambda response: self.wfile.write(response.encode('utf-8')), self.wfile.flush)
+        pending = []
+        for line in self.rfile:
+            pending.append(self.server.forai.submit_line(line.decode('utf-8'), respond))
+            if not self.server.forai.running:
+                # shutdown() blocks until serve_forever() returns, so it runs on another thread
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                break
+
+        # Keep the connection open until queued updates have been answered
+        for future in pending:
+            try:
+                future.result()
+            except Exception:
+                pass
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server handling each connection on its own thread."""
+
+    daemon_threads = True
+
+
+def serve_unix(server: FORAIServer, socket_path: str) -> None:
+    """Serve requests on a Unix socket until shutdown is requested.
+
+    Several clients may be connected at once; their requests are serialized.
+
+    Args:
+        server: The FORAI server
+        socket_path: Path of the Unix socket to listen on
+    """
+    if os.path.exists(socket_path):
+        # Remove a stale socket left behind by a previous server, but never a live one
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+            raise RuntimeError(f"A server is already listening on {socket_path}")
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(socket_path)
+        finally:
+            probe.close()
+
+    with _UnixServer(socket_path, _RequestHandler) as unix_server:
+        unix_server.forai = server
+        logger.info(f"Serving {server.workspace_path} on {socket_path}")
+        try:
+            unix_server.serve_forever()
+        finally:
+            os.unlink(socket_path)
@@ -0,0 +1,127 @@
+import time
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Any, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateQueue:
+    """Debounced queue that coalesces file updates into batches.
+
+    Submitted files are collected until no new file has arrived for ``debounce``
+    seconds (or the oldest one has waited ``max_delay`` seconds), and are then
+    processed as one batch on a background thread. Every submission in the batch
+    receives the batch result through its future.
+    """
+
+    def __init__(self, process: Callable[[List[str], bool], Dict[str, Any]], debounce: float,
+                 max_delay: Optional[float] = None):
+        """Initialize the update queue.
+
+        Args:
+            process: Called with the de-duplicated file paths of a batch and whether any
+                submission asked for transitive updates; returns the batch result
+            debounce: Seconds without new submissions after which a batch is processed
+            max_delay: Maximum seconds a submission waits (defaults to ten debounce windows)
+        """
+        self.process = process
+        self.debounce = debounce
+        self.max_delay = max_delay if max_delay is not None else debounce * 10
+        self._condition = threading.Condition()
+        self._files: Dict[str, None] = {}
+        self._futures: List[Future] = []
+        self._transitive = False
+        self._first_submit = 0.0
+        self._last_submit = 0.0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='forai-update-queue', daemon=True)
+        self._thread.start()
+
+    def submit(self, file_paths: Iterable[str], transitive: bool = False) -> Future:
+        """Queue files for the next batch.
+
+        Args:
+            file_paths: Paths of the changed files
+            transitive: Whether dependents of dependents should be updated
+
+        Returns:
+            A future resolved with the result of the batch the files end up in
+        """
+        future: Future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Update queue is closed")
+
+            now = time.monotonic()
+            if not self._futures:
+                self._first_submit = now
+            self._last_submit = now
+            self._files.update(dict.fromkeys(file_paths))
+            self._futures.append(future)
+            self._transitive = self._transitive or transitive
+            self._condition.notify()
+        return future
+
+    def flush(self) -> None:
+        """Process any queued files now, without waiting for the debounce window."""
+        with self._condition:
+            batch = self._take_batch()
+        if batch is not None:
+            self._process_batch(*batch)
+
+    def close(self) -> None:
+        """Process any queued files and stop the background thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _take_batch(self) -> Optional[tuple]:
+        """Remove and return the queued batch. The condition lock must be held."""
+        if not self._futures:
+            return None
+
+        batch = (list(self._files), self._transitive, self._futures)
+        self._files = {}
+        self._futures = []
+        self._transitive = False
+        return batch
+
+    def _run(self) -> None:
+        """Wait for debounce windows to elapse and process the batches."""
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        batch = self._take_batch()
+                        break
+
+                    if self._futures:
+                        now = time.monotonic()
+                        deadline = min(self._last_submit + self.debounce, self._first_submit + self.max_delay)
+                        if now >= deadline:
+                            batch = self._take_batch()
+                            break
+                        self._condition.wait(deadline - now)
+                    else:
+                        self._condition.wait()
+
+            if batch is not None:
+                self._process_batch(*batch)
+            if self._closed:
+                return
+
+    def _process_batch(self, file_paths: List[str], transitive: bool, futures: List[Future]) -> None:
+        """Process a batch and resolve the futures of its submissions."""
+        logger.info(f"Processing batch of {len(file_paths)} files from {len(futures)} requests")
+        try:
+            result = self.process(file_paths, transitive)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        for future in futures:
+            future.set_result(result)
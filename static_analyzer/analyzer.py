@@ -32,12 +32,27 @@ class StaticAnalyzer:
         """
         logger.info(f"Analyzing file: {file_path}")
         
-        # Get file ID
-        file_id = self.registry.get_file_id(file_path)
-        
         # Parse file
         parse_result = parse_python_file(file_path)
         
+        return self.analyze_parse_result(file_path, parse_result)
+    
+    def analyze_parse_result(self, file_path: str, parse_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Analyze the result of ``parse_python_file`` for a file.
+        
+        Parsing does not touch the registry, so it can run elsewhere (e.g. in a worker
+        process) while symbol IDs are still allocated here.
+        
+        Args:
+            file_path: Path to the Python file
+            parse_result: The dictionary returned by ``parse_python_file``
+            
+        Returns:
+            A dictionary with file_id, definitions, imports, and exports
+        """
+        # Get file ID
+        file_id = self.registry.get_file_id(file_path)
+        
         # Convert imports to FORAI format
         imports = self._extract_imports(parse_result['imports'])
         
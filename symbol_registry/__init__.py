@@ -1,3 +1,17 @@
+from forai.symbol_registry.index import SymbolIndex
 from forai.symbol_registry.registry import SymbolRegistry
+from forai.symbol_registry.storage import (
+    RegistryStorage,
+    JSONRegistryStorage,
+    SQLiteRegistryStorage,
+    open_storage,
+)
 
-__all__ = ["SymbolRegistry"]
\ No newline at end of file
+__all__ = [
+    "SymbolRegistry",
+    "SymbolIndex",
+    "RegistryStorage",
+    "JSONRegistryStorage",
+    "SQLiteRegistryStorage",
+    "open_storage",
+]
\ No newline at end of file
@@ -0,0 +1,232 @@
+import bisect
+import difflib
+import heapq
+import logging
+from array import array
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Search modes, from strictest to loosest; each mode also returns the matches of the stricter ones
+MATCH_MODES = ('exact', 'prefix', 'substring', 'fuzzy')
+
+SYMBOL_TYPES = ('class', 'function', 'variable')
+
+# Substring matches are looked up by trigram, so shorter fragments only match as prefixes
+MIN_SUBSTRING_LENGTH = 3
+
+# Minimum similarity ratio of a fuzzy match
+FUZZY_THRESHOLD = 0.6
+
+# Trigrams occurring in more names than this are skipped when collecting fuzzy candidates
+_MAX_FUZZY_POSTING = 20000
+
+# Number of candidates sharing the most trigrams with the query that are scored
+_MAX_FUZZY_CANDIDATES = 2000
+
+# A definition is (file_id, symbol_id, type)
+Definition = Tuple[str, str, str]
+
+
+def symbol_type_from_id(symbol_id: str) -> str:
+    """Guess the type of a symbol whose type was not recorded from its ID prefix."""
+    return 'class' if symbol_id.startswith('C') else 'function'
+
+
+def iter_registry_symbols(registry: Dict[str, Any]) -> Iterator[Tuple[str, str, str, str]]:
+    """Iterate over the symbol definitions of a registry dictionary.
+
+    Yields:
+        (name, file_id, symbol_id, type) tuples in registry order
+    """
+    for file_id, file_info in registry.get('files', {}).items():
+        types = file_info.get('symbol_types', {})
+        for name, symbol_id in file_info.get('symbols', {}).items():
+            yield name, file_id, symbol_id, types.get(name) or symbol_type_from_id(symbol_id)
+
+
+def _trigrams(name: str) -> Set[str]:
+    """Get the trigrams of a lowercased name, padded so short names have some."""
+    padded = f"^{name}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SymbolIndex:
+    """In-memory inverted index of the symbol names in a registry.
+
+    Names map to all their definitions in registry order, so colliding names are
+    all kept. A sorted list of lowercased names answers prefix searches with a
+    binary search, and trigram postings (built on the first substring or fuzzy
+    search) narrow substring and fuzzy searches down to a few candidate names.
+    Searches are case-insensitive. Fragments shorter than ``MIN_SUBSTRING_LENGTH``
+    are not matched as substrings, which would mean scanning every name, and
+    results are ranked with a heap, so a short prefix matching most names does
+    not sort all of them for a limited search.
+    """
+
+    def __init__(self, definitions: Iterable[Tuple[str, str, str, str]], paths: Optional[Dict[str, str]] = None):
+        """Build the index.
+
+        Args:
+            definitions: (name, file_id, symbol_id, type) tuples in registry order
+            paths: Workspace-relative file paths by file ID
+        """
+        self.paths = paths or {}
+        self.by_name: Dict[str, List[Definition]] = {}
+        for name, file_id, symbol_id, symbol_type in definitions:
+            self.by_name.setdefault(name, []).append((file_id, symbol_id, symbol_type))
+
+        self.names: List[str] = sorted(self.by_name)
+        self._folded = sorted((name.lower(), i) for i, name in enumerate(self.names))
+        self._folded_names = [folded for folded, _ in self._folded]
+        self._postings: Optional[Dict[str, array]] = None
+
+    @classmethod
+    def from_registry(cls, registry: Dict[str, Any]) -> 'SymbolIndex':
+        """Build the index of a registry dictionary.
+
+        Args:
+            registry: The registry, as loaded by ``SymbolRegistry``
+
+        Returns:
+            The index
+        """
+        paths = {file_id: file_info.get('path', '') for file_id, file_info in registry.get('files', {}).items()}
+        return cls(iter_registry_symbols(registry), paths)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def lookup(self, name: str) -> List[Definition]:
+        """Get all definitions of an exact name, in registry order."""
+        return self.by_name.get(name, [])
+
+    def _postings_index(self) -> Dict[str, array]:
+        """Get the trigram postings (trigram -> sorted name numbers), building them on first use."""
+        if self._postings is None:
+            postings: Dict[str, array] = {}
+            for i, name in enumerate(self.names):
+                for trigram in _trigrams(name.lower()):
+                    posting = postings.get(trigram)
+                    if posting is None:
+                        posting = postings[trigram] = array('i')
+                    posting.append(i)
+            self._postings = postings
+            logger.debug(f"Built trigram index of {len(self.names)} names ({len(postings)} trigrams)")
+        return self._postings
+
+    def _prefix_matches(self, folded_query: str) -> List[int]:
+        """Get the numbers of the names starting with a lowercased query."""
+        start = bisect.bisect_left(self._folded_names, folded_query)
+        end = bisect.bisect_left(self._folded_names, folded_query + '\uffff', start)
+        return [i for _, i in self._folded[start:end]]
+
+    def _substring_matches(self, folded_query: str) -> List[int]:
+        """Get the numbers of the names containing a lowercased query of at least ``MIN_SUBSTRING_LENGTH`` characters."""
+        if len(folded_query) < MIN_SUBSTRING_LENGTH:
+            return []
+
+        # Every match contains all trigrams of the query; check the names of the rarest one
+        postings = self._postings_index()
+        query_trigrams = {folded_query[i:i + 3] for i in range(len(folded_query) - 2)}
+        rarest = min((postings.get(trigram, array('i')) for trigram in query_trigrams), key=len)
+        return [i for i in rarest if folded_query in self.names[i].lower()]
+
+    def _fuzzy_matches(self, folded_query: str) -> List[Tuple[int, float]]:
+        """Get the numbers and similarities of the names similar to a lowercased query.
+
+        Names sharing the most trigrams with the query are candidates; they are scored
+        with ``difflib``'s similarity ratio, which copes better with short names.
+        """
+        postings = self._postings_index()
+        selected = [postings[trigram] for trigram in _trigrams(folded_query) if trigram in postings]
+        common = [posting for posting in selected if len(posting) <= _MAX_FUZZY_POSTING]
+        if common:
+            selected = common
+
+        shared: Dict[int, int] = {}
+        for posting in selected:
+            for i in posting:
+                shared[i] = shared.get(i, 0) + 1
+        candidates = heapq.nlargest(_MAX_FUZZY_CANDIDATES, shared, key=shared.__getitem__)
+
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(folded_query)
+        matches = []
+        for i in candidates:
+            matcher.set_seq1(self.names[i].lower())
+            if matcher.real_quick_ratio() >= FUZZY_THRESHOLD and matcher.quick_ratio() >= FUZZY_THRESHOLD:
+                similarity = matcher.ratio()
+                if similarity >= FUZZY_THRESHOLD:
+                    matches.append((i, similarity))
+        return matches
+
+    def search(self, query: str, match: str = 'exact', types: Optional[Iterable[str]] = None,
+               limit: Optional[int] = 20) -> List[Dict[str, Any]]:
+        """Search symbol names.
+
+        Results are ranked by match kind (exact, prefix, substring, then fuzzy), then by
+        similarity, name length and name. Names with several definitions yield one
+        result per definition, in registry order.
+
+        Args:
+            query: The name or name fragment to search for
+            match: 'exact', 'prefix', 'substring' or 'fuzzy'; looser modes include the
+                matches of stricter ones
+            types: Symbol types to keep ('class', 'function', 'variable'), or None for all
+            limit: Maximum number of results, or None for all
+
+        Returns:
+            Dictionaries with name, file_id, path, symbol_id, type, match and score
+
+        Raises:
+            ValueError: If the match mode is unknown, or the query is empty and the match is not exact
+        """
+        if match not in MATCH_MODES:
+            raise ValueError(f"Unknown match mode: {match}")
+        if not query and match != 'exact':
+            raise ValueError("Cannot search for an empty name fragment")
+        allowed = set(types) if types else None
+        level = MATCH_MODES.index(match)
+        folded = query.lower()
+
+        # name number -> (rank, score); stricter matches overwrite looser ones
+        ranked: Dict[int, Tuple[int, float]] = {}
+        if level == 0:
+            if query in self.by_name:
+                ranked[bisect.bisect_left(self.names, query)] = (0, 1.0)
+        else:
+            if level >= 3:
+                for i, similarity in self._fuzzy_matches(folded):
+                    ranked[i] = (3, similarity)
+            if level >= 2:
+                for i in self._substring_matches(folded):
+                    ranked[i] = (2, len(folded) / len(self.names[i]))
+            for i in self._prefix_matches(folded):
+                if self.names[i].lower() == folded:
+                    ranked[i] = (0, 1.0)
+                else:
+                    ranked[i] = (1, len(folded) / len(self.names[i]))
+
+        # Heapify and pop only as many names as the limit needs, instead of sorting all matches
+        order = [(rank, -score, len(self.names[i]), self.names[i], i) for i, (rank, score) in ranked.items()]
+        heapq.heapify(order)
+
+        results = []
+        while order:
+            rank, negative_score, _, name, i = heapq.heappop(order)
+            for file_id, symbol_id, symbol_type in self.by_name[name]:
+                if allowed is not None and symbol_type not in allowed:
+                    continue
+                results.append({
+                    'name': name,
+                    'file_id': file_id,
+                    'path': self.paths.get(file_id, ''),
+                    'symbol_id': symbol_id,
+                    'type': symbol_type,
+                    'match': MATCH_MODES[rank],
+                    'score': round(-negative_score, 3)
+                })
+                if limit is not None and len(results) >= limit:
+                    return results
+        return results
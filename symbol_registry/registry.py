@@ -1,7 +1,10 @@
-import json
+import bisect
 import os
 import logging
-from typing import Dict, Optional, Any
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Any, Set, Tuple, Union
+
+from forai.symbol_registry.storage import RegistryStorage, new_registry, open_storage
 
 logger = logging.getLogger(__name__)
 
@@ -9,45 +12,131 @@ class SymbolRegistry:
     """Manages the symbol registry for the FORAI system.
     
     The registry keeps track of all files, their unique IDs, and the symbols defined in each file.
+    
+    Changes are written to disk immediately by default. Inside a ``batch()`` block
+    they are only marked dirty and persisted once when the block exits (or every
+    ``flush_interval`` changes), which avoids rewriting the whole registry for every
+    newly allocated ID.
+    
+    The registry is persisted through a pluggable storage backend (see
+    ``forai.symbol_registry.storage``). Only the files changed since the last flush
+    are passed to the backend, so incremental backends can upsert them in place.
+    Loading is not incremental: the whole registry is read when it is created,
+    with either backend, because ID allocation and import resolution need every
+    file. ``forai`` commands therefore still take longer to start as the registry
+    grows; only the indexed ``forai-query`` lookups on SQLite avoid the full load.
     """
     
-    def __init__(self, workspace_path: str):
+    def __init__(self, workspace_path: str, flush_interval: Optional[int] = None,
+                 storage: Union[str, RegistryStorage, None] = None):
         """Initialize the symbol registry.
         
         Args:
             workspace_path: Path to the workspace root directory
+            flush_interval: Number of changes after which a batch is flushed to disk,
+                or None to flush only when the outermost batch exits
+            storage: A storage backend or backend name ("json" or "sqlite"); by default
+                an existing SQLite registry is used and JSON otherwise
         """
         self.workspace_path = workspace_path
-        self.registry_path = os.path.join(workspace_path, '.forai', 'registry.json')
+        if not isinstance(storage, RegistryStorage):
+            storage = open_storage(workspace_path, storage)
+        self.storage = storage
+        self.registry_path = storage.path
+        self.flush_interval = flush_interval
+        self._dirty = False
+        self._changed_files: Set[str] = set()
+        self._removed_files: Set[str] = set()
+        self._pending_changes = 0
+        self._batch_depth = 0
+        # Incremented on every change, so long-lived readers can tell when to rebuild derived indexes
+        self.version = 0
         self.registry = self._load_registry()
         
+        # Module path suffix -> [(registry position, file_id)], built lazily by resolve_import
+        self._module_index: Optional[Dict[str, List[Tuple[int, str]]]] = None
+        self._file_positions: Dict[str, int] = {}
+        self._next_position = 0
+        
     def _load_registry(self) -> Dict[str, Any]:
-        """Load the symbol registry from disk."""
-        if os.path.exists(self.registry_path):
-            try:
-                with open(self.registry_path, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                logger.warning(f"Failed to parse registry file {self.registry_path}, creating new registry")
+        """Load the symbol registry from storage."""
+        registry = self.storage.load()
+        if registry is not None:
+            return registry
         
         # Create new registry
-        os.makedirs(os.path.dirname(self.registry_path), exist_ok=True)
-        registry = {
-            'files': {},
-            'next_file_id': 101,
-            'file_paths': {}
-        }
+        registry = new_registry()
         self._save_registry(registry)
         return registry
     
     def _save_registry(self, registry: Optional[Dict[str, Any]] = None) -> None:
-        """Save the symbol registry to disk."""
+        """Save the whole symbol registry to storage."""
         if registry is None:
             registry = self.registry
         
-        os.makedirs(os.path.dirname(self.registry_path), exist_ok=True)
-        with open(self.registry_path, 'w') as f:
-            json.dump(registry, f, indent=2)
+        self.storage.save(registry)
+    
+    @property
+    def dirty(self) -> bool:
+        """Whether the in-memory registry has changes that are not on disk yet."""
+        return self._dirty
+    
+    def flush(self) -> bool:
+        """Write pending changes to disk.
+        
+        Returns:
+            True if the registry was written, False if there was nothing to write
+        """
+        if not self._dirty:
+            return False
+        
+        self.storage.save(self.registry, self._changed_files, self._removed_files)
+        self._changed_files = set()
+        self._removed_files = set()
+        self._dirty = False
+        self._pending_changes = 0
+        return True
+    
+    @contextmanager
+    def batch(self) -> Iterator['SymbolRegistry']:
+        """Defer registry writes until the end of the block.
+        
+        Batches may be nested; only the outermost one flushes. The registry is
+        flushed even if the block raises, since every individual change leaves
+        the registry in a consistent state.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.flush()
+    
+    def export_json(self, output_path: str) -> None:
+        """Export the registry in the ``registry.json`` format.
+        
+        Args:
+            output_path: Path of the JSON file to write
+        """
+        self.storage.export_json(output_path, self.registry)
+    
+    def _mark_dirty(self, file_id: Optional[str] = None) -> None:
+        """Record a change and persist it according to the current batching mode.
+        
+        Args:
+            file_id: The ID of the changed file, if the change concerns a single file
+        """
+        if file_id is not None:
+            self._changed_files.add(file_id)
+        self.version += 1
+        self._dirty = True
+        self._pending_changes += 1
+        
+        if self._batch_depth == 0:
+            self.flush()
+        elif self.flush_interval and self._pending_changes >= self.flush_interval:
+            self.flush()
     
     def get_file_id(self, file_path: str) -> str:
         """Get or create a file ID for the given path.
@@ -74,7 +163,8 @@ class SymbolRegistry:
             'next_class_id': 1,
             'next_func_id': 1
         }
-        self._save_registry()
+        self._index_file(file_id, rel_path)
+        self._mark_dirty(file_id)
         return file_id
     
     def get_symbol_id(self, file_id: str, symbol_name: str, symbol_type: str) -> str:
@@ -83,7 +173,8 @@ class SymbolRegistry:
         Args:
             file_id: The file ID (e.g., "F101")
             symbol_name: The name of the symbol (e.g., "UserModel")
-            symbol_type: The type of the symbol ("class" or "function")
+            symbol_type: The type of the symbol ("class", "function" or "variable"),
+                recorded in the file's ``symbol_types``
             
         Returns:
             The symbol ID (e.g., "C1" for a class, "F2" for a function)
@@ -96,7 +187,12 @@ class SymbolRegistry:
         
         # Check if symbol exists
         if symbol_name in file_entry['symbols']:
-            return file_entry['symbols'][symbol_name]
+            symbol_id = file_entry['symbols'][symbol_name]
+            symbol_types = file_entry.setdefault('symbol_types', {})
+            if symbol_types.get(symbol_name) != symbol_type:
+                symbol_types[symbol_name] = symbol_type
+                self._mark_dirty(file_id)
+            return symbol_id
         
         # Create new symbol ID
         if symbol_type == 'class':
@@ -107,10 +203,42 @@ class SymbolRegistry:
             file_entry['next_func_id'] += 1
             
         file_entry['symbols'][symbol_name] = symbol_id
+        file_entry.setdefault('symbol_types', {})[symbol_name] = symbol_type
         self.registry['files'][file_id] = file_entry
-        self._save_registry()
+        self._mark_dirty(file_id)
         return symbol_id
     
+    def record_header(self, file_data: Dict[str, Any]) -> bool:
+        """Record the DEF, IMP and EXP sections of a file's header in the registry.
+        
+        The file entry gets ``definitions`` (defined names), ``imports`` (references
+        such as "F101:C1") and ``exports`` lists in header order, so queries can be
+        answered without opening source files.
+        
+        Args:
+            file_data: The analyzed file data the header is generated from
+            
+        Returns:
+            True if the recorded sections changed
+        """
+        file_info = self.registry['files'].get(file_data.get('file_id'))
+        if file_info is None:
+            return False
+        
+        sections = {
+            'definitions': [defn['name'] for defn in file_data.get('definitions', [])
+                            if defn.get('symbol_id') and defn.get('name')],
+            'imports': [f"{imp['file_id']}:{imp.get('symbol_id', '*')}" for imp in file_data.get('imports', [])
+                        if imp.get('file_id')],
+            'exports': list(file_data.get('exports', []))
+        }
+        if all(file_info.get(key) == value for key, value in sections.items()):
+            return False
+        
+        file_info.update(sections)
+        self._mark_dirty(file_data['file_id'])
+        return True
+    
     def resolve_import(self, module_name: str, symbol_name: str) -> Optional[Dict[str, str]]:
         """Resolve an import to a file_id:symbol_id reference.
         
@@ -121,26 +249,105 @@ class SymbolRegistry:
         Returns:
             A dictionary with file_id and symbol_id, or None if not found
         """
-        # First try to find the module path in the registry
-        for file_id, file_info in self.registry['files'].items():
-            file_path = os.path.join(self.workspace_path, file_info['path'])
-            module_path = os.path.splitext(file_path)[0]
+        file_id = self._find_module(module_name)
+        if file_id is None:
+            # Module not found
+            return None
+        
+        # If symbol is "*", return the file_id only
+        if symbol_name == "*":
+            return {"file_id": file_id, "symbol_id": "*"}
+        
+        # Symbol not found in this file yields a None symbol_id
+        symbols = self.registry['files'][file_id].get('symbols', {})
+        return {"file_id": file_id, "symbol_id": symbols.get(symbol_name)}
+    
+    def _find_module(self, module_name: str) -> Optional[str]:
+        """Find the file ID of the first registered file whose module path ends with a module name.
+        
+        The module name is matched against whole path components, so ``pkg.mod`` matches
+        ``src/pkg/mod.py`` but not ``src/otherpkg/mod.py``. Leading components may also match
+        the tail of the workspace path itself, as they did when paths were compared in full.
+        
+        Args:
+            module_name: The dotted module name
             
-            if module_path.endswith(module_name.replace('.', '/')):
-                # If symbol is "*", return the file_id only
-                if symbol_name == "*":
-                    return {"file_id": file_id, "symbol_id": "*"}
-                
-                # Check if the symbol exists in this file
-                for sym_name, sym_id in file_info.get('symbols', {}).items():
-                    if sym_name == symbol_name:
-                        return {"file_id": file_id, "symbol_id": sym_id}
+        Returns:
+            The file ID, or None if no registered file matches
+        """
+        index = self._get_module_index()
+        target = module_name.replace('.', '/')
+        
+        candidates = index.get(target, [])
+        best = candidates[0] if candidates else None
+        
+        # Module names that start above the workspace root, e.g. "project.pkg.mod"
+        # for a workspace at ".../project" and a file at "pkg/mod.py"
+        parts = target.split('/')
+        workspace_parts = os.path.abspath(self.workspace_path).replace(os.sep, '/').split('/')
+        for i in range(1, min(len(parts), len(workspace_parts) + 1)):
+            if workspace_parts[-i:] != parts[:i]:
+                continue
                 
-                # Symbol not found in this file
-                return {"file_id": file_id, "symbol_id": None}
+            rest = '/'.join(parts[i:])
+            for position, file_id in index.get(rest, []):
+                if best is not None and position >= best[0]:
+                    break
+                if self._module_path(self.registry['files'][file_id]['path']) == rest:
+                    best = (position, file_id)
+                    break
         
-        # Module not found
-        return None
+        return best[1] if best else None
+    
+    @staticmethod
+    def _module_path(rel_path: str) -> str:
+        """Convert a workspace-relative file path to a slash-separated module path."""
+        return os.path.splitext(rel_path)[0].replace(os.sep, '/')
+    
+    def _module_keys(self, rel_path: str) -> List[str]:
+        """Get all module path suffixes under which a file can be imported."""
+        parts = self._module_path(rel_path).split('/')
+        return ['/'.join(parts[i:]) for i in range(len(parts))]
+    
+    def _get_module_index(self) -> Dict[str, List[Tuple[int, str]]]:
+        """Get the module path index, building it from the registry on first use."""
+        if self._module_index is None:
+            self._module_index = {}
+            self._file_positions = {}
+            self._next_position = 0
+            for file_id, file_info in self.registry['files'].items():
+                if 'path' in file_info:
+                    self._index_file(file_id, file_info['path'])
+                else:
+                    self._next_position += 1
+        return self._module_index
+    
+    def _index_file(self, file_id: str, rel_path: str) -> None:
+        """Add a file to the module path index, if the index has been built."""
+        if self._module_index is None:
+            return
+            
+        position = self._file_positions.get(file_id)
+        if position is None:
+            position = self._next_position
+            self._next_position += 1
+            self._file_positions[file_id] = position
+            
+        for key in self._module_keys(rel_path):
+            bisect.insort(self._module_index.setdefault(key, []), (position, file_id))
+    
+    def _unindex_file(self, file_id: str, rel_path: str) -> None:
+        """Remove a file's module path suffixes from the index, if the index has been built."""
+        if self._module_index is None:
+            return
+            
+        entry = (self._file_positions.get(file_id), file_id)
+        for key in self._module_keys(rel_path):
+            entries = self._module_index.get(key)
+            if entries and entry in entries:
+                entries.remove(entry)
+                if not entries:
+                    del self._module_index[key]
     
     def update_file_path(self, old_path: str, new_path: str) -> str:
         """Update a file path in the registry.
@@ -161,9 +368,11 @@ class SymbolRegistry:
             self.registry['file_paths'][rel_new_path] = file_id
             
             if file_id in self.registry['files']:
+                self._unindex_file(file_id, rel_old_path)
                 self.registry['files'][file_id]['path'] = rel_new_path
+                self._index_file(file_id, rel_new_path)
                 
-            self._save_registry()
+            self._mark_dirty(file_id)
             return file_id
         
         # Old path not found, treat as new file
@@ -183,4 +392,8 @@ class SymbolRegistry:
                 del self.registry['file_paths'][rel_path]
                 
             del self.registry['files'][file_id]
-            self._save_registry()
\ No newline at end of file
+            self._unindex_file(file_id, rel_path)
+            self._file_positions.pop(file_id, None)
+            self._changed_files.discard(file_id)
+            self._removed_files.add(file_id)
+            self._mark_dirty()
\ No newline at end of file
@@ -0,0 +1,457 @@
+import abc
+import json
+import os
+import logging
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Any, Tuple
+
+from forai.symbol_registry.index import SymbolIndex, symbol_type_from_id
+from forai.utils.file_utils import atomic_write_text
+
+if TYPE_CHECKING:
+    import sqlite3
+
+logger = logging.getLogger(__name__)
+
+# Per-file registry keys that have dedicated columns or tables in the SQLite schema
+_FILE_COLUMNS = ('path', 'symbols', 'symbol_types', 'next_class_id', 'next_func_id', 'imports')
+
+
+class RegistryStorage(abc.ABC):
+    """Base class for symbol registry storage backends.
+
+    A backend loads the whole registry as the plain dictionary used by
+    ``SymbolRegistry`` and persists it again, optionally only for the files
+    that changed since the last save.
+    """
+
+    name = ''
+    filename = ''
+
+    def __init__(self, workspace_path: str):
+        """Initialize the storage backend.
+
+        Args:
+            workspace_path: Path to the workspace root directory
+        """
+        self.workspace_path = workspace_path
+        self.path = os.path.join(workspace_path, '.forai', self.filename)
+
+    def exists(self) -> bool:
+        """Check whether the registry has been stored with this backend."""
+        return os.path.exists(self.path)
+
+    @abc.abstractmethod
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Load the registry.
+
+        Returns:
+            The registry dictionary, or None if there is no usable stored registry
+        """
+
+    @abc.abstractmethod
+    def save(self, registry: Dict[str, Any], changed_files: Optional[Iterable[str]] = None,
+             removed_files: Optional[Iterable[str]] = None) -> None:
+        """Save the registry.
+
+        Args:
+            registry: The registry dictionary
+            changed_files: IDs of files added or modified since the last save,
+                or None to save every file
+            removed_files: IDs of files removed since the last save
+        """
+
+    def export_json(self, output_path: str, registry: Optional[Dict[str, Any]] = None) -> None:
+        """Export the registry in the ``registry.json`` format.
+
+        Args:
+            output_path: Path of the JSON file to write
+            registry: The registry to export, or None to load it from storage
+        """
+        if registry is None:
+            registry = self.load() or new_registry()
+        atomic_write_text(output_path, json.dumps(registry, indent=2))
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+        pass
+
+
+class JSONRegistryStorage(RegistryStorage):
+    """Stores the registry as a single ``registry.json`` document."""
+
+    name = 'json'
+    filename = 'registry.json'
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Load the registry from the JSON file."""
+        if not os.path.exists(self.path):
+            return None
+
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            logger.warning(f"Failed to parse registry file {self.path}, creating new registry")
+            return None
+
+    def save(self, registry: Dict[str, Any], changed_files: Optional[Iterable[str]] = None,
+             removed_files: Optional[Iterable[str]] = None) -> None:
+        """Rewrite the whole JSON file; the document format cannot be updated in place."""
+        atomic_write_text(self.path, json.dumps(registry, indent=2))
+
+
+class SQLiteRegistryStorage(RegistryStorage):
+    """Stores the registry in an SQLite database.
+
+    Files, symbols and resolved imports live in separate indexed tables, so saves
+    only touch the rows of changed files and lookups by path, module or symbol name
+    do not need the whole registry in memory. An existing ``registry.json`` is
+    migrated into the database the first time it is opened.
+    """
+
+    name = 'sqlite'
+    filename = 'registry.db'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS files (
+            file_id TEXT PRIMARY KEY,
+            position INTEGER NOT NULL,
+            path TEXT,
+            module TEXT,
+            next_class_id INTEGER NOT NULL DEFAULT 1,
+            next_func_id INTEGER NOT NULL DEFAULT 1,
+            extra TEXT
+        );
+        CREATE INDEX IF NOT EXISTS files_path ON files (path);
+        CREATE INDEX IF NOT EXISTS files_module ON files (module);
+        CREATE TABLE IF NOT EXISTS symbols (
+            file_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            symbol_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            type TEXT,
+            PRIMARY KEY (file_id, name)
+        );
+        CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name);
+        CREATE TABLE IF NOT EXISTS imports (
+            file_id TEXT NOT NULL,
+            target_file_id TEXT NOT NULL,
+            target_symbol_id TEXT NOT NULL,
+            position INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS imports_file ON imports (file_id);
+        CREATE INDEX IF NOT EXISTS imports_target ON imports (target_file_id, target_symbol_id);
+    """
+
+    def __init__(self, workspace_path: str):
+        """Initialize the SQLite backend.
+
+        Args:
+            workspace_path: Path to the workspace root directory
+        """
+        super().__init__(workspace_path)
+        self.json_path = os.path.join(workspace_path, '.forai', JSONRegistryStorage.filename)
+        self._conn: Optional['sqlite3.Connection'] = None
+
+    @property
+    def conn(self) -> 'sqlite3.Connection':
+        """The database connection, opened (and migrated from JSON) on first use."""
+        if self._conn is None:
+            # Imported here, as workspaces using the JSON backend never need it
+            import sqlite3
+            
+            needs_migration = not os.path.exists(self.path) and os.path.exists(self.json_path)
+
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(self.SCHEMA)
+            self._upgrade_schema()
+
+            if needs_migration:
+                registry = JSONRegistryStorage(self.workspace_path).load()
+                if registry is not None:
+                    logger.info(f"Migrating {self.json_path} to {self.path}")
+                    self.save(registry)
+        return self._conn
+
+    def _upgrade_schema(self) -> None:
+        """Add the columns missing from databases created by older versions."""
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(symbols)')}
+        if 'type' not in columns:
+            self._conn.execute('ALTER TABLE symbols ADD COLUMN type TEXT')
+
+    def exists(self) -> bool:
+        """Check whether a database or a JSON registry to migrate exists."""
+        return os.path.exists(self.path) or os.path.exists(self.json_path)
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Load the whole registry from the database."""
+        if not self.exists():
+            return None
+
+        conn = self.conn
+        meta = dict(conn.execute('SELECT key, value FROM meta'))
+        if 'next_file_id' not in meta:
+            return None
+
+        files: Dict[str, Dict[str, Any]] = {}
+        file_paths: Dict[str, str] = {}
+        rows = conn.execute(
+            'SELECT file_id, path, next_class_id, next_func_id, extra FROM files ORDER BY position')
+        for file_id, path, next_class_id, next_func_id, extra in rows:
+            file_info: Dict[str, Any] = {}
+            if path is not None:
+                file_info['path'] = path
+                file_paths[path] = file_id
+            file_info['symbols'] = {}
+            file_info['next_class_id'] = next_class_id
+            file_info['next_func_id'] = next_func_id
+            if extra:
+                file_info.update(json.loads(extra))
+            files[file_id] = file_info
+
+        for file_id, name, symbol_id, symbol_type in conn.execute(
+                'SELECT file_id, name, symbol_id, type FROM symbols ORDER BY file_id, position'):
+            if file_id in files:
+                files[file_id]['symbols'][name] = symbol_id
+                if symbol_type is not None:
+                    files[file_id].setdefault('symbol_types', {})[name] = symbol_type
+
+        for file_id, target_file_id, target_symbol_id in conn.execute(
+                'SELECT file_id, target_file_id, target_symbol_id FROM imports ORDER BY file_id, position'):
+            if file_id in files:
+                files[file_id].setdefault('imports', []).append(f"{target_file_id}:{target_symbol_id}")
+
+        # Files with recorded header sections (see SymbolRegistry.record_header) may have no imports
+        for file_info in files.values():
+            if 'exports' in file_info:
+                file_info.setdefault('imports', [])
+
+        return {
+            'files': files,
+            'next_file_id': int(meta['next_file_id']),
+            'file_paths': file_paths
+        }
+
+    def save(self, registry: Dict[str, Any], changed_files: Optional[Iterable[str]] = None,
+             removed_files: Optional[Iterable[str]] = None) -> None:
+        """Upsert the changed files, delete the removed ones and update the metadata."""
+        conn = self.conn
+        files = registry['files']
+
+        with conn:
+            if changed_files is None:
+                conn.execute('DELETE FROM files')
+                conn.execute('DELETE FROM symbols')
+                conn.execute('DELETE FROM imports')
+                changed_files = files.keys()
+
+            for file_id in removed_files or ():
+                self._delete_file(file_id)
+
+            position = conn.execute('SELECT COALESCE(MAX(position), -1) FROM files').fetchone()[0]
+            for file_id in changed_files:
+                file_info = files.get(file_id)
+                if file_info is None:
+                    self._delete_file(file_id)
+                    continue
+
+                position += 1
+                self._upsert_file(file_id, file_info, position)
+
+            conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                         ('next_file_id', str(registry['next_file_id'])))
+
+    def _delete_file(self, file_id: str) -> None:
+        """Delete all rows belonging to a file."""
+        for table in ('files', 'symbols', 'imports'):
+            self.conn.execute(f'DELETE FROM {table} WHERE file_id = ?', (file_id,))
+
+    def _upsert_file(self, file_id: str, file_info: Dict[str, Any], position: int) -> None:
+        """Insert or update a file row and replace its symbol and import rows.
+
+        Existing files keep their original position so the registry order is stable.
+        """
+        conn = self.conn
+        path = file_info.get('path')
+        module = os.path.splitext(path)[0].replace(os.sep, '/').replace('/', '.') if path else None
+        extra = {key: value for key, value in file_info.items() if key not in _FILE_COLUMNS}
+
+        conn.execute(
+            """INSERT INTO files (file_id, position, path, module, next_class_id, next_func_id, extra)
+               VALUES (?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (file_id) DO UPDATE SET
+                   path = excluded.path,
+                   module = excluded.module,
+                   next_class_id = excluded.next_class_id,
+                   next_func_id = excluded.next_func_id,
+                   extra = excluded.extra""",
+            (file_id, position, path, module, file_info.get('next_class_id', 1),
+             file_info.get('next_func_id', 1), json.dumps(extra) if extra else None))
+
+        conn.execute('DELETE FROM symbols WHERE file_id = ?', (file_id,))
+        symbol_types = file_info.get('symbol_types', {})
+        conn.executemany(
+            'INSERT INTO symbols (file_id, name, symbol_id, position, type) VALUES (?, ?, ?, ?, ?)',
+            [(file_id, name, symbol_id, i, symbol_types.get(name))
+             for i, (name, symbol_id) in enumerate(file_info.get('symbols', {}).items())])
+
+        conn.execute('DELETE FROM imports WHERE file_id = ?', (file_id,))
+        rows = []
+        for i, ref in enumerate(file_info.get('imports', [])):
+            target_file_id, _, target_symbol_id = ref.partition(':')
+            rows.append((file_id, target_file_id, target_symbol_id or '*', i))
+        conn.executemany(
+            'INSERT INTO imports (file_id, target_file_id, target_symbol_id, position) VALUES (?, ?, ?, ?)',
+            rows)
+
+    def get_file(self, rel_path: str) -> Optional[Dict[str, Any]]:
+        """Look up a file by its workspace-relative path.
+
+        Args:
+            rel_path: The workspace-relative file path
+
+        Returns:
+            A dictionary with file_id and symbols (and imports and exports, if the file's
+            header sections are recorded), or None if the path is not registered
+        """
+        row = self.conn.execute(
+            'SELECT file_id, extra FROM files WHERE path = ? ORDER BY position LIMIT 1', (rel_path,)).fetchone()
+        if row is None:
+            return None
+
+        file_id, extra = row
+        symbols = dict(self.conn.execute(
+            'SELECT name, symbol_id FROM symbols WHERE file_id = ? ORDER BY position', (file_id,)))
+        result = {'file_id': file_id, 'symbols': symbols}
+
+        extra = json.loads(extra) if extra else {}
+        if 'exports' in extra:
+            rows = self.conn.execute(
+                'SELECT target_file_id, target_symbol_id FROM imports WHERE file_id = ? ORDER BY position', (file_id,))
+            result['imports'] = [f"{target_file_id}:{target_symbol_id}" for target_file_id, target_symbol_id in rows]
+            result['exports'] = extra['exports']
+        return result
+
+    def find_symbols(self, symbol_name: str) -> List[Dict[str, str]]:
+        """Find all definitions of a symbol name, in registry order.
+
+        Args:
+            symbol_name: The symbol name
+
+        Returns:
+            A list of dictionaries with file_id, path, symbol_id and type
+        """
+        rows = self.conn.execute(
+            """SELECT s.file_id, f.path, s.symbol_id, s.type FROM symbols s
+               JOIN files f ON f.file_id = s.file_id
+               WHERE s.name = ? ORDER BY f.position""", (symbol_name,))
+        return [{'file_id': file_id, 'path': path or '', 'symbol_id': symbol_id,
+                 'type': symbol_type or symbol_type_from_id(symbol_id)}
+                for file_id, path, symbol_id, symbol_type in rows]
+
+    def iter_symbols(self) -> Iterator[Tuple[str, str, str, str]]:
+        """Iterate over every symbol definition without loading the registry.
+
+        Yields:
+            (name, file_id, symbol_id, type) tuples in registry order
+        """
+        rows = self.conn.execute(
+            """SELECT s.name, s.file_id, s.symbol_id, s.type FROM symbols s
+               JOIN files f ON f.file_id = s.file_id
+               ORDER BY f.position, s.position""")
+        for name, file_id, symbol_id, symbol_type in rows:
+            yield name, file_id, symbol_id, symbol_type or symbol_type_from_id(symbol_id)
+
+    def build_symbol_index(self) -> SymbolIndex:
+        """Build the in-memory name index from the symbols table, without loading the registry.
+
+        Returns:
+            The symbol index
+        """
+        paths = {file_id: path or '' for file_id, path in self.conn.execute('SELECT file_id, path FROM files')}
+        return SymbolIndex(self.iter_symbols(), paths)
+
+    def find_importers(self, file_id: str, symbol_id: str) -> List[Dict[str, Any]]:
+        """Find the files whose recorded imports include a symbol or its whole module.
+
+        Files without recorded header sections (see ``SymbolRegistry.record_header``)
+        are returned as well, flagged as unrecorded, since their imports are unknown.
+
+        Args:
+            file_id: The file ID of the module defining the symbol
+            symbol_id: The symbol ID
+
+        Returns:
+            A list of dictionaries with file_id, path and recorded, in registry order
+        """
+        rows = self.conn.execute(
+            """SELECT file_id, path, position, 1 FROM files WHERE file_id IN (
+                   SELECT file_id FROM imports WHERE target_file_id = ? AND target_symbol_id IN (?, '*'))
+               UNION ALL
+               SELECT file_id, path, position, 0 FROM files
+               WHERE extra IS NULL OR json_extract(extra, '$.exports') IS NULL
+               ORDER BY position""", (file_id, symbol_id))
+        return [{'file_id': row_file_id, 'path': path or '', 'recorded': bool(recorded)}
+                for row_file_id, path, _, recorded in rows]
+
+    def find_module(self, module_name: str) -> List[str]:
+        """Find files registered under an exact dotted module name.
+
+        Args:
+            module_name: The dotted module name relative to the workspace root
+
+        Returns:
+            A list of file IDs in registry order
+        """
+        rows = self.conn.execute(
+            'SELECT file_id FROM files WHERE module = ? ORDER BY position', (module_name,))
+        return [row[0] for row in rows]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+STORAGE_BACKENDS = {
+    JSONRegistryStorage.name: JSONRegistryStorage,
+    SQLiteRegistryStorage.name: SQLiteRegistryStorage,
+}
+
+
+def new_registry() -> Dict[str, Any]:
+    """Create an empty registry dictionary."""
+    return {
+        'files': {},
+        'next_file_id': 101,
+        'file_paths': {}
+    }
+
+
+def open_storage(workspace_path: str, backend: Optional[str] = None) -> RegistryStorage:
+    """Open the registry storage for a workspace.
+
+    Args:
+        workspace_path: Path to the workspace root directory
+        backend: The backend name ("json" or "sqlite"), or None to use SQLite if the
+            workspace already has a registry database and JSON otherwise
+
+    Returns:
+        The storage backend
+    """
+    if backend is None:
+        sqlite_path = os.path.join(workspace_path, '.forai', SQLiteRegistryStorage.filename)
+        backend = SQLiteRegistryStorage.name if os.path.exists(sqlite_path) else JSONRegistryStorage.name
+
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown registry storage backend: {backend}")
+
+    return STORAGE_BACKENDS[backend](workspace_path)
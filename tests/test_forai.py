@@ -1,11 +1,25 @@
 import unittest
 import tempfile
 import os
+import json
 import shutil
+import subprocess
+import sys
+import time
 
-from forai.symbol_registry import SymbolRegistry
+from forai.symbol_registry import SymbolRegistry, SQLiteRegistryStorage
 from forai.static_analyzer import StaticAnalyzer
 from forai.header_generator import HeaderGenerator
+from forai.header_reader import read_header
+from forai.dependency_tracker import DependencyTracker
+from forai.workspace_updater import WorkspaceUpdater, merge_static_and_runtime
+from forai.server import FORAIServer
+from forai.query import FORAIQueryEngine, run_batch, stream_records
+from forai.file_watcher import Watcher, PollingBackend
+from forai.runtime_introspector import IntrospectionPool, RuntimeCache
+from forai.utils.ast_utils import parse_python_file
+from forai.utils.git_utils import get_changed_files
+from forai.benchmarks import compare_results, run_benchmarks
 
 
 class TestFORAI(unittest.TestCase):
@@ -68,7 +82,9 @@ def login(user):
         # Check definitions
         self.assertIn('definitions', file_data)
         definitions = file_data['definitions']
-        self.assertEqual(len(definitions), 2)  # User class and login function
+        # User class, its __init__ method and login function
+        self.assertEqual([(d['name'], d['type']) for d in definitions],
+                         [('User', 'class'), ('__init__', 'function'), ('login', 'function')])
         
         # Check imports
         self.assertIn('imports', file_data)
@@ -76,6 +92,61 @@ def login(user):
         # Check exports
         self.assertIn('exports', file_data)
         
+    def test_static_analysis_scopes(self):
+        """Test which scopes definitions are collected from."""
+        file_path = os.path.join(self.workspace_path, 'scopes.py')
+        with open(file_path, 'w') as f:
+            f.write("""
+try:
+    import json
+except ImportError:
+    def loads(text):
+        return None
+
+if json:
+    class Codec:
+        def encode(self, value):
+            def helper(item):
+                return item
+            return helper(value)
+
+def outer():
+    from os import path
+    def inner():
+        class Local:
+            pass
+    return inner
+""")
+        file_data = self.analyzer.analyze_file(file_path)
+
+        # Definitions inside try and if bodies are kept, those inside functions are not
+        self.assertEqual([d['name'] for d in file_data['definitions']],
+                         ['loads', 'Codec', 'encode', 'outer'])
+        # Imports are collected from every scope
+        self.assertEqual([(i['module'], i['symbol']) for i in parse_python_file(file_path)['imports']],
+                         [('json', '*'), ('os', 'path')])
+
+    @unittest.skipIf(sys.version_info < (3, 10), "match statements need Python 3.10")
+    def test_static_analysis_match(self):
+        """Test that definitions inside match cases are collected."""
+        file_path = os.path.join(self.workspace_path, 'backend.py')
+        with open(file_path, 'w') as f:
+            f.write("""
+import sys
+
+match sys.platform:
+    case 'win32':
+        class Backend:
+            pass
+    case _:
+        def Backend():
+            def nested():
+                pass
+""")
+        file_data = self.analyzer.analyze_file(file_path)
+        self.assertEqual([(d['name'], d['type']) for d in file_data['definitions']],
+                         [('Backend', 'class'), ('Backend', 'function')])
+
     def test_header_generation(self):
         """Test generation of a FORAI header."""
         # Get file paths
@@ -112,6 +183,668 @@ def login(user):
             content = f.read()
         
         self.assertIn('//FORAI:', content)
+        
+    def test_header_update_noop(self):
+        """Test that unchanged headers are not rewritten and file properties are kept."""
+        file_path = os.path.join(self.workspace_path, 'crlf.py')
+        with open(file_path, 'wb') as f:
+            f.write(b"#!/usr/bin/env python\r\nclass Config:\r\n    pass\r\n")
+        os.chmod(file_path, 0o755)
+        
+        header = self.header_generator.generate_header(self.analyzer.analyze_file(file_path))
+        self.assertTrue(self.header_generator.update_file_header(file_path, header))
+        
+        with open(file_path, 'rb') as f:
+            content = f.read()
+        self.assertEqual(content, b"#!/usr/bin/env python\r\n" + header.encode() +
+                         b"\r\n\r\nclass Config:\r\n    pass\r\n")
+        self.assertEqual(os.stat(file_path).st_mode & 0o777, 0o755)
+        
+        # Re-analyzing the file with its header yields the same header, so nothing is written
+        mtime = os.stat(file_path).st_mtime_ns
+        header = self.header_generator.generate_header(self.analyzer.analyze_file(file_path))
+        self.assertFalse(self.header_generator.update_file_header(file_path, header))
+        self.assertEqual(os.stat(file_path).st_mtime_ns, mtime)
+        
+    def test_header_update_region(self):
+        """Test that only the header at the top of a file is replaced."""
+        file_path = os.path.join(self.workspace_path, 'large.py')
+        body = "MARKER = '//FORAI:not-a-header//'\n" + "x = 1\n" * 200000
+        with open(file_path, 'w') as f:
+            f.write("//FORAI:F1;DEF[];IMP[];EXP[]//\n\n" + body)
+        
+        # Same length: patched in place
+        self.assertTrue(self.header_generator.update_file_header(file_path, "//FORAI:F2;DEF[];IMP[];EXP[]//"))
+        with open(file_path) as f:
+            self.assertEqual(f.read(), "//FORAI:F2;DEF[];IMP[];EXP[]//\n\n" + body)
+        
+        # Different length: the body is streamed after the new header
+        self.assertTrue(self.header_generator.update_file_header(file_path, "//FORAI:F22;DEF[];IMP[];EXP[]//"))
+        with open(file_path) as f:
+            self.assertEqual(f.read(), "//FORAI:F22;DEF[];IMP[];EXP[]//\n\n" + body)
+
+    def test_header_update_marker_in_code(self):
+        """Test that FORAI markers inside code are not taken for a header."""
+        file_path = os.path.join(self.workspace_path, 'pattern.py')
+        body = 'import re\n\nPATTERN = re.compile(r"//FORAI:(.*?)//")\n'
+        with open(file_path, 'w') as f:
+            f.write(body)
+        self.assertIsNone(read_header(file_path))
+
+        # The header is inserted on its own line and the literal is kept
+        header = self.header_generator.generate_header(self.analyzer.analyze_file(file_path))
+        self.assertTrue(self.header_generator.update_file_header(file_path, header))
+        with open(file_path) as f:
+            self.assertEqual(f.read(), header + "\n\n" + body)
+        self.assertEqual(read_header(file_path).text, header)
+
+        # Updating replaces the header line only
+        self.assertTrue(self.header_generator.update_file_header(file_path, "//FORAI:F9;DEF[];IMP[];EXP[]//"))
+        with open(file_path) as f:
+            self.assertEqual(f.read(), "//FORAI:F9;DEF[];IMP[];EXP[]//\n\n" + body)
+
+    def test_registry_batch(self):
+        """Test that batched registry changes are written once on exit."""
+        registry_path = self.registry.registry_path
+        
+        with self.registry.batch():
+            file_id = self.registry.get_file_id(os.path.join(self.workspace_path, 'user.py'))
+            self.registry.get_symbol_id(file_id, 'User', 'class')
+            self.assertTrue(self.registry.dirty)
+            
+            # Nothing has been written inside the batch yet
+            reloaded = SymbolRegistry(self.workspace_path)
+            self.assertNotIn(file_id, reloaded.registry['files'])
+        
+        self.assertFalse(self.registry.dirty)
+        reloaded = SymbolRegistry(self.workspace_path)
+        self.assertEqual(reloaded.registry['files'][file_id]['symbols'], {'User': 'C1'})
+        
+        # A batch without changes does not touch the registry file
+        mtime = os.stat(registry_path).st_mtime_ns
+        with self.registry.batch():
+            self.registry.get_file_id(os.path.join(self.workspace_path, 'user.py'))
+        self.assertEqual(os.stat(registry_path).st_mtime_ns, mtime)
+        self.assertFalse(self.registry.flush())
+        
+    def test_resolve_import_index(self):
+        """Test that import resolution follows renames and removals."""
+        base_path = os.path.join(self.workspace_path, 'base.py')
+        base_id = self.registry.get_file_id(base_path)
+        symbol_id = self.registry.get_symbol_id(base_id, 'BaseModel', 'class')
+        
+        self.assertEqual(self.registry.resolve_import('base', 'BaseModel'),
+                         {'file_id': base_id, 'symbol_id': symbol_id})
+        self.assertEqual(self.registry.resolve_import('base', 'Missing'),
+                         {'file_id': base_id, 'symbol_id': None})
+        self.assertIsNone(self.registry.resolve_import('ase', '*'))
+        
+        # Module names match whole path components, not string suffixes
+        self.registry.get_file_id(os.path.join(self.workspace_path, 'bigmod.py'))
+        self.assertIsNone(self.registry.resolve_import('mod', '*'))
+        
+        # Rename into a package
+        new_path = os.path.join(self.workspace_path, 'models', 'base.py')
+        self.registry.update_file_path(base_path, new_path)
+        self.assertEqual(self.registry.resolve_import('models.base', '*'),
+                         {'file_id': base_id, 'symbol_id': '*'})
+        self.assertEqual(self.registry.resolve_import('base', '*')['file_id'], base_id)
+        
+        self.registry.remove_file(base_id)
+        self.assertIsNone(self.registry.resolve_import('models.base', '*'))
+        
+    def test_sqlite_storage(self):
+        """Test migrating the JSON registry to SQLite and saving incrementally."""
+        for name in ('base.py', 'user.py'):
+            self.analyzer.analyze_file(os.path.join(self.workspace_path, name))
+        expected = self.registry.registry
+        
+        # The existing registry.json is migrated on first use
+        sqlite_registry = SymbolRegistry(self.workspace_path, storage='sqlite')
+        self.assertIsInstance(sqlite_registry.storage, SQLiteRegistryStorage)
+        self.assertEqual(sqlite_registry.registry, expected)
+        
+        # Incremental changes survive a reload, and the backend is detected automatically
+        with sqlite_registry.batch():
+            user_id = sqlite_registry.get_file_id(os.path.join(self.workspace_path, 'user.py'))
+            sqlite_registry.get_symbol_id(user_id, 'logout', 'function')
+            sqlite_registry.remove_file(sqlite_registry.get_file_id(os.path.join(self.workspace_path, 'base.py')))
+        sqlite_registry.storage.close()
+        
+        reloaded = SymbolRegistry(self.workspace_path)
+        self.assertIsInstance(reloaded.storage, SQLiteRegistryStorage)
+        self.assertEqual(reloaded.registry, sqlite_registry.registry)
+        self.assertEqual(reloaded.storage.find_symbols('logout')[0]['path'], 'user.py')
+        
+        # Export back to the JSON format
+        export_path = os.path.join(self.workspace_path, 'export.json')
+        reloaded.export_json(export_path)
+        with open(export_path) as f:
+            self.assertEqual(json.load(f), reloaded.registry)
+        reloaded.storage.close()
+        
+    def test_update_all_parallel(self):
+        """Test that parallel update-all allocates the same IDs as a serial run."""
+        serial_workspace = tempfile.mkdtemp()
+        try:
+            for name in ('base.py', 'user.py'):
+                shutil.copy(os.path.join(self.workspace_path, name), serial_workspace)
+            serial_registry = SymbolRegistry(serial_workspace)
+            
+            with serial_registry.batch():
+                serial = WorkspaceUpdater(serial_registry).update_all(jobs=1)
+            with self.registry.batch():
+                parallel = WorkspaceUpdater(self.registry).update_all(jobs=2, writers=2)
+            
+            self.assertEqual(parallel['updated'], 2)
+            self.assertEqual(serial['updated'], 2)
+            self.assertIn('parse', parallel['timings'])
+            self.assertEqual(serial_registry.registry, self.registry.registry)
+            
+            # Imports resolve to symbols of files processed later in the run
+            with open(os.path.join(self.workspace_path, 'user.py')) as f:
+                self.assertIn('IMP[F101:C1]', f.read())
+        finally:
+            shutil.rmtree(serial_workspace)
+            
+    def test_update_all_cache(self):
+        """Test that update-all skips files that did not change since the last run."""
+        updater = WorkspaceUpdater(self.registry)
+        first = updater.update_all()
+        self.assertEqual(first['cache'], {'stat_hits': 0, 'hash_hits': 0, 'misses': 2})
+        
+        second = updater.update_all()
+        self.assertEqual(second['cache'], {'stat_hits': 2, 'hash_hits': 0, 'misses': 0})
+        self.assertEqual(second['updated'], 2)
+        
+        # A touched file is recognized by its content hash, an edited one is parsed again
+        base_path = os.path.join(self.workspace_path, 'base.py')
+        user_path = os.path.join(self.workspace_path, 'user.py')
+        st = os.stat(base_path)
+        os.utime(base_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1000))
+        with open(user_path, 'a') as f:
+            f.write("\nTIMEOUT = 5\n")
+        
+        third = updater.update_all()
+        self.assertEqual(third['cache'], {'stat_hits': 0, 'hash_hits': 1, 'misses': 1})
+
+        
+    def test_dependency_index(self):
+        """Test that dependents are found from the persisted dependency index."""
+        with self.registry.batch():
+            WorkspaceUpdater(self.registry).update_all()
+        base_id = self.registry.get_file_id(os.path.join(self.workspace_path, 'base.py'))
+        user_id = self.registry.get_file_id(os.path.join(self.workspace_path, 'user.py'))
+        
+        # A new tracker loads the index instead of reading headers
+        tracker = DependencyTracker(self.registry)
+        self.assertTrue(os.path.exists(tracker.index_path))
+        self.assertEqual(tracker.get_affected_files(base_id), [user_id])
+        
+        # Incremental updates replace the edges of a file
+        tracker.set_file_imports(user_id, [])
+        self.assertEqual(tracker.get_affected_files(base_id), [])
+        
+        # Rebuilding reads the headers again
+        self.assertEqual(tracker.rebuild_index(), {'files': 2, 'edges': 1})
+        self.assertEqual(tracker.get_affected_files(base_id), [user_id])
+
+        
+    def test_affected_components(self):
+        """Test that transitive dependents are ordered topologically with cycles collapsed."""
+        tracker = DependencyTracker(self.registry)
+        tracker.set_file_imports('F2', ['F1:C1'])
+        tracker.set_file_imports('F3', ['F2:C1'])
+        tracker.set_file_imports('F4', ['F3:C1', 'F1:*'])
+        tracker.set_file_imports('F3', ['F2:C1', 'F4:F1'])
+        tracker.set_file_imports('F5', ['F4:C1'])
+        
+        self.assertEqual(tracker.get_affected_files('F1'), ['F2', 'F4'])
+        self.assertEqual(tracker.get_affected_components('F1'), [['F2'], ['F3', 'F4'], ['F5']])
+        self.assertEqual(tracker.get_affected_components('F5'), [])
+
+        
+    def test_server_requests(self):
+        """Test that the server answers JSON-RPC requests from one warm registry."""
+        server = FORAIServer(self.workspace_path)
+        
+        def call(method, request_id=1, **params):
+            return json.loads(server.handle_line(json.dumps(
+                {'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params})))
+        
+        self.assertEqual(call('update_all')['result']['updated'], 2)
+        deps = call('list_deps', file='base.py')['result']
+        self.assertEqual(deps['dependencies'], [os.path.join(self.workspace_path, 'user.py')])
+        found = call('query', command='find', symbol='User')['result']['result']
+        self.assertEqual(found['file_path'], os.path.join(self.workspace_path, 'user.py'))
+        
+        # Errors are reported as JSON-RPC error objects
+        self.assertEqual(call('update', file='missing.py')['error']['code'], -32602)
+        self.assertEqual(call('unknown')['error']['code'], -32601)
+        self.assertEqual(json.loads(server.handle_line('{'))['error']['code'], -32700)
+        self.assertIsNone(server.handle_line(json.dumps({'jsonrpc': '2.0', 'method': 'ping'})))
+        
+        call('shutdown')
+        self.assertFalse(server.running)
+
+        
+    def test_update_files_batch(self):
+        """Test that a batch of changed files is updated in one coalesced pass."""
+        updater = WorkspaceUpdater(self.registry)
+        with self.registry.batch():
+            updater.update_all()
+            
+        admin_path = os.path.join(self.workspace_path, 'admin.py')
+        with open(admin_path, 'w') as f:
+            f.write("from user import User\n\nclass Admin(User):\n    pass\n")
+        
+        paths = [admin_path, os.path.join(self.workspace_path, 'user.py'), admin_path]
+        with self.registry.batch():
+            result = updater.update_files(paths)
+        admin_id = self.registry.get_file_id(admin_path)
+        self.assertEqual(result['updated'], 2)
+        self.assertEqual(result['imports_changed'], [admin_id])
+        self.assertEqual(result['modified'], 1)
+        
+    def test_server_debounce(self):
+        """Test that update requests arriving within the debounce window share one batch."""
+        server = FORAIServer(self.workspace_path, debounce=0.05)
+        responses = []
+        futures = [server.submit_line(json.dumps({'jsonrpc': '2.0', 'id': i, 'method': 'update',
+                                                  'params': {'file': name}}), responses.append)
+                   for i, name in enumerate(['base.py', 'user.py', 'base.py'])]
+        for future in futures:
+            future.result(timeout=5)
+        server.shutdown()
+        
+        results = [json.loads(response)['result'] for response in responses]
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(result['updated'] == 2 for result in results))
+
+        # Updates after shutdown get an error response
+        response = json.loads(server.handle_line(json.dumps({'jsonrpc': '2.0', 'id': 3, 'method': 'update',
+                                                             'params': {'file': 'base.py'}})))
+        self.assertEqual(response['id'], 3)
+        self.assertEqual(response['error']['message'], "Update queue is closed")
+
+        
+    def test_watcher_polling(self):
+        """Test that watched renames keep their file ID and header writes do not retrigger updates."""
+        updater = WorkspaceUpdater(self.registry)
+        watcher = Watcher(updater, PollingBackend(self.workspace_path, interval=0))
+        watcher.update_all()
+        watcher.backend.read(0)
+        
+        user_path = os.path.join(self.workspace_path, 'user.py')
+        member_path = os.path.join(self.workspace_path, 'member.py')
+        user_id = self.registry.get_file_id(user_path)
+        os.rename(user_path, member_path)
+        
+        result = watcher.process_events(watcher.backend.read(0))
+        self.assertEqual(result['renamed'], 1)
+        self.assertEqual(self.registry.get_file_id(member_path), user_id)
+        
+        # The events caused by the watcher's own header writes are dropped
+        self.assertIsNone(watcher.process_events(watcher.backend.read(0)))
+        
+        os.remove(member_path)
+        result = watcher.process_events(watcher.backend.read(0))
+        self.assertEqual(result['removed'], 1)
+        self.assertNotIn(user_id, self.registry.registry['files'])
+
+    def test_watcher_update_all_edits(self):
+        """Test that files edited while update_all runs, but not written by it, still trigger updates."""
+        updater = WorkspaceUpdater(self.registry)
+        watcher = Watcher(updater, PollingBackend(self.workspace_path, interval=0))
+        watcher.update_all()
+        watcher.backend.read(0)
+
+        base_path = os.path.join(self.workspace_path, 'base.py')
+        update_all = updater.update_all
+
+        def update_all_during_edit(*args, **kwargs):
+            with open(base_path, 'a') as f:
+                f.write("# edited\n")
+            # Filesystem timestamps are coarse; make the edit clearly newer than the update's start
+            edited = time.time_ns() + 10 ** 9
+            os.utime(base_path, ns=(edited, edited))
+            return update_all(*args, **kwargs)
+
+        updater.update_all = update_all_during_edit
+        self.assertEqual(watcher.update_all()['modified'], 0)
+
+        result = watcher.process_events(watcher.backend.read(0))
+        self.assertIsNotNone(result)
+        self.assertEqual(result['updated'], 1)
+
+
+    @unittest.skipUnless(shutil.which('git'), "git is not installed")
+    def test_update_changed(self):
+        """Test that only files changed since a git revision are updated."""
+        def git(*args):
+            subprocess.run(['git', '-C', self.workspace_path, '-c', 'user.name=FORAI', '-c', 'user.email=forai@example.com']
+                           + list(args), check=True, capture_output=True)
+        
+        updater = WorkspaceUpdater(self.registry)
+        with self.registry.batch():
+            updater.update_all()
+        git('init', '-q')
+        git('add', 'base.py', 'user.py')
+        git('commit', '-q', '-m', 'Initial commit')
+        
+        git('mv', 'user.py', 'member.py')
+        with open(os.path.join(self.workspace_path, 'extra.py'), 'w') as f:
+            f.write("from base import BaseModel\n")
+        
+        changed, renamed, deleted = get_changed_files(self.workspace_path)
+        self.assertEqual(changed, [os.path.join(self.workspace_path, 'extra.py')])
+        self.assertEqual(renamed, [(os.path.join(self.workspace_path, 'user.py'),
+                                    os.path.join(self.workspace_path, 'member.py'))])
+        self.assertEqual(deleted, [])
+        
+        with self.registry.batch():
+            result = updater.apply_changes(changed, renamed, deleted)
+        self.assertEqual(result['updated'], 2)
+        self.assertEqual(result['renamed'], 1)
+
+        
+    def test_workspace_scanner(self):
+        """Test that the workspace scan prunes default and ignored directories."""
+        files = {
+            '.git/hooks/hook.py': '', 'node_modules/pkg/setup.py': '', '.venv/lib/site.py': '',
+            'pkg/build/out.py': '', 'pkg/module.py': '', 'pkg/gen_api.py': '', 'pkg/gen_keep.py': '',
+            'vendor/lib.py': '', 'scripts/tool.py': '', 'scripts/.gitignore': '*.py\n!tool.py\n',
+            'scripts/old.py': '', 'dist/release.py': '',
+            '.gitignore': 'gen_*.py\n/vendor/\n!dist/\n!.git/\n', '.foraiignore': '!pkg/gen_keep.py\n'
+        }
+        for rel_path, content in files.items():
+            file_path = os.path.join(self.workspace_path, rel_path)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, 'w') as f:
+                f.write(content)
+        
+        updater = WorkspaceUpdater(self.registry)
+        found = [os.path.relpath(path, self.workspace_path) for path in updater.find_python_files()]
+        # Negations re-include default directories (dist), but not version control metadata
+        self.assertEqual(found, ['base.py', os.path.join('dist', 'release.py'), os.path.join('pkg', 'gen_keep.py'),
+                                 os.path.join('pkg', 'module.py'), os.path.join('scripts', 'tool.py'), 'user.py'])
+
+        
+    def test_header_reader(self):
+        """Test that headers after a long docstring are read and cached per file state."""
+        file_path = os.path.join(self.workspace_path, 'licensed.py')
+        docstring = '"""' + "License text.\n" * 500 + '"""\n'
+        with open(file_path, 'w') as f:
+            f.write(docstring + "//FORAI:F7;DEF[C1:Model<F1:C1,F2:C3>];IMP[F1:C1,F2:*];EXP[Model];LANG[python]//\n")
+        
+        header = read_header(file_path)
+        self.assertEqual(header.file_id, 'F7')
+        self.assertEqual(header.offset, len(docstring))
+        self.assertEqual(header.definitions[0].parents, ('F1:C1', 'F2:C3'))
+        self.assertEqual(header.import_refs(), ['F1:C1', 'F2:*'])
+        self.assertTrue(header.imports_symbol('F2', 'C9'))
+        self.assertEqual(header.language, 'python')
+        self.assertIs(read_header(file_path), header)
+        self.assertEqual(DependencyTracker(self.registry)._get_header_imports(file_path), ['F1:C1', 'F2:*'])
+        
+        # A same-length rewrite is seen even if the mtime and size do not change
+        self.assertTrue(self.header_generator.update_file_header(file_path, header.text.replace('F7', 'F8')))
+        self.assertEqual(read_header(file_path).file_id, 'F8')
+
+
+    def test_header_index_queries(self):
+        """Test that usages come from the recorded header sections and --verify finds stale ones."""
+        updater = WorkspaceUpdater(self.registry)
+        with self.registry.batch():
+            updater.update_all()
+        user_path = os.path.join(self.workspace_path, 'user.py')
+        user_id = self.registry.get_file_id(user_path)
+        symbols = self.registry.registry['files'][user_id]['symbols']
+        self.assertEqual(self.registry.registry['files'][user_id]['exports'], [symbols['User'], symbols['login']])
+        
+        # Drop the header on disk; indexed queries do not notice, verified ones do
+        with open(user_path) as f:
+            content = f.read()
+        with open(user_path, 'w') as f:
+            f.write(content.split('//\n', 1)[1])
+        
+        for storage in ('json', 'sqlite'):
+            engine = FORAIQueryEngine(self.workspace_path, storage=storage)
+            self.assertEqual(engine.get_symbol_usages('BaseModel'), [{'file_id': user_id, 'file_path': user_path}])
+            self.assertEqual(engine.get_file_symbols(user_path)['exports'], [symbols['User'], symbols['login']])
+            self.assertEqual(engine.get_symbol_usages('BaseModel', verify=True), [])
+            self.assertEqual(engine.verify_index()['stale'], [user_id])
+            engine.storage.close()
+
+    def test_symbol_search(self):
+        """Test finding every definition of a name and searching names by prefix, substring and similarity."""
+        with open(os.path.join(self.workspace_path, 'views.py'), 'w') as f:
+            f.write("def User(request):\n    pass\n\nuser_count = 0\n")
+        updater = WorkspaceUpdater(self.registry)
+        with self.registry.batch():
+            updater.update_all()
+        user_id = self.registry.get_file_id(os.path.join(self.workspace_path, 'user.py'))
+        views_id = self.registry.get_file_id(os.path.join(self.workspace_path, 'views.py'))
+        
+        for storage in ('json', 'sqlite'):
+            engine = FORAIQueryEngine(self.workspace_path, storage=storage)
+            definitions = engine.find_symbol_definitions('User')
+            self.assertEqual(sorted((d['file_id'], d['type']) for d in definitions),
+                             sorted([(user_id, 'class'), (views_id, 'function')]))
+            self.assertEqual([d['file_id'] for d in engine.find_symbol_definitions('User', types=['class'])],
+                             [user_id])
+            self.assertEqual(engine.list_all_symbols()['User']['file_id'], definitions[0]['file_id'])
+            
+            prefix = engine.search_symbols('us', match='prefix')
+            self.assertEqual([(r['name'], r['match']) for r in prefix][-1], ('user_count', 'prefix'))
+            self.assertEqual(engine.search_symbols('user', match='prefix', types=['variable'])[0]['file_id'], views_id)
+            self.assertEqual([r['name'] for r in engine.search_symbols('odel', match='substring')], ['BaseModel'])
+            # Fragments too short for the trigram index only match as prefixes
+            self.assertEqual(engine.search_symbols('de', match='substring'), [])
+            with self.assertRaises(ValueError):
+                engine.search_symbols('', match='prefix')
+            fuzzy = engine.search_symbols('Usr', match='fuzzy', types=['class'])
+            self.assertEqual([(r['name'], r['match']) for r in fuzzy], [('User', 'fuzzy')])
+            engine.storage.close()
+
+    def test_query_batch(self):
+        """Test answering JSON-line queries in input order with the registry loaded once."""
+        updater = WorkspaceUpdater(self.registry)
+        with self.registry.batch():
+            updater.update_all()
+        user_path = os.path.join(self.workspace_path, 'user.py')
+        lines = [json.dumps({'id': i, 'command': 'find', 'symbol': name})
+                 for i, name in enumerate(['User', 'BaseModel', 'Missing'] * 10)]
+        lines += ['', json.dumps({'id': 'u', 'command': 'usages', 'symbol': 'BaseModel'}),
+                  json.dumps({'id': 'h', 'command': 'header', 'file': user_path}), 'not json',
+                  json.dumps({'command': 'find', 'name': 'User'})]
+        
+        answers = []
+        count = run_batch(FORAIQueryEngine(self.workspace_path), lines, lambda line: answers.append(json.loads(line)),
+                          jobs=4)
+        self.assertEqual(count, 34)
+        self.assertEqual([answer.get('id') for answer in answers[:30]], list(range(30)))
+        self.assertEqual(answers[0]['result']['file_path'], user_path)
+        self.assertIsNone(answers[2]['result'])
+        self.assertEqual(answers[30]['result'][0]['file_path'], user_path)
+        self.assertTrue(answers[31]['result'].startswith('//FORAI:'))
+        self.assertFalse(answers[32]['success'])
+        self.assertIn('name', answers[33]['error'])
+
+    def test_streaming_records(self):
+        """Test per-file update records and paginated, projected list and usages records."""
+        updater = WorkspaceUpdater(self.registry)
+        records = []
+        with self.registry.batch():
+            result = updater.update_all(on_file=records.append)
+        self.assertEqual(len(records), result['total'])
+        self.assertTrue(all(record['modified'] for record in records))
+        
+        for storage in ('json', 'sqlite'):
+            engine = FORAIQueryEngine(self.workspace_path, storage=storage)
+            names = [record['name'] for record in stream_records(engine, 'list')]
+            self.assertEqual(names, list(engine.list_all_symbols()))
+            page = list(stream_records(engine, 'list', offset=1, limit=2, fields=['name', 'missing']))
+            self.assertEqual(page, [{'name': name} for name in names[1:3]])
+            usages = list(stream_records(engine, 'usages', symbol='BaseModel', fields=['file_path']))
+            self.assertEqual(usages, [{'file_path': os.path.join(self.workspace_path, 'user.py')}])
+            engine.storage.close()
+
+    def test_introspection_pool(self):
+        """Test that introspection runs in worker subprocesses with timeouts and isolated failures."""
+        modules = {
+            'loops.py': "while True:\n    pass\n",
+            'crashes.py': "import os\nos._exit(3)\n",
+            'exits.py': "import sys\nsys.exit(2)\n"
+        }
+        for name, source in modules.items():
+            with open(os.path.join(self.workspace_path, name), 'w') as f:
+                f.write(source)
+        paths = [os.path.join(self.workspace_path, name)
+                 for name in ('base.py', 'loops.py', 'crashes.py', 'exits.py', 'base.py')]
+        
+        with IntrospectionPool(workers=2, timeout=1) as pool:
+            results = pool.introspect_many(paths)
+        self.assertEqual(results[0]['runtime_symbols']['BaseModel']['type'], 'class')
+        self.assertIn('timed out', results[1]['error'])
+        self.assertIn('exited with code 3', results[2]['error'])
+        self.assertIn('SystemExit', results[3]['error'])
+        self.assertEqual(results[4], results[0])
+
+    def test_runtime_cache(self):
+        """Test that introspection results are reused until the module or an import changes."""
+        base_path = os.path.join(self.workspace_path, 'base.py')
+        with open(os.path.join(self.workspace_path, 'solo.py'), 'w') as f:
+            f.write("import json\n\nclass Solo:\n    pass\n")
+        
+        updater = WorkspaceUpdater(self.registry, enable_runtime=True,
+                                   runtime_pool=IntrospectionPool(workers=2))
+        try:
+            first = updater.update_all()
+            second = updater.update_all()
+        finally:
+            updater.close()
+        self.assertEqual(first['runtime_cache']['hits'], 0)
+        self.assertGreater(second['runtime_cache']['hits'], 0)
+        self.assertEqual(second['runtime_cache']['misses'], first['runtime_cache']['misses'] - second['runtime_cache']['hits'])
+        
+        # Headers written by the first run do not invalidate; edits of imported files do
+        cache = RuntimeCache(self.workspace_path)
+        solo_path = os.path.join(self.workspace_path, 'solo.py')
+        self.assertIsNotNone(cache.lookup(solo_path))
+        cache.record(solo_path, {'runtime_symbols': {}, 'imported_modules': ['base'],
+                                 'imported_files': [base_path]})
+        self.assertIsNotNone(cache.lookup(solo_path))
+        with open(base_path, 'a') as f:
+            f.write("\nCHANGED = True\n")
+        self.assertIsNone(cache.lookup(solo_path))
+
+    def test_runtime_dependents(self):
+        """Test that dependents re-analyzed after an import change keep their runtime parents."""
+        base_path = os.path.join(self.workspace_path, 'base.py')
+        dynamic_path = os.path.join(self.workspace_path, 'dynamic.py')
+        with open(dynamic_path, 'w') as f:
+            f.write("from base import BaseModel\n\nBASES = (BaseModel,)\n\nclass Dynamic(*BASES):\n    pass\n")
+        with open(os.path.join(self.workspace_path, 'mixins.py'), 'w') as f:
+            f.write("class Mixin:\n    pass\n")
+
+        updater = WorkspaceUpdater(self.registry, enable_runtime=True,
+                                   runtime_pool=IntrospectionPool(workers=2))
+        try:
+            updater.update_all()
+            base_id = self.registry.get_file_id(base_path)
+            model_id = self.registry.get_symbol_id(base_id, 'BaseModel', 'class')
+            parents = {defn.name: defn.parents for defn in read_header(dynamic_path).definitions}
+            self.assertEqual(parents['Dynamic'], (model_id,))
+
+            with open(base_path, 'a') as f:
+                f.write("\nfrom mixins import Mixin\n")
+            result = updater.update_files([base_path])
+        finally:
+            updater.close()
+        self.assertEqual(result['imports_changed'], [base_id])
+        # The dependent is re-analyzed with introspection, so its header does not lose the runtime parent
+        self.assertEqual(result['written'], [base_path])
+        parents = {defn.name: defn.parents for defn in read_header(dynamic_path).definitions}
+        self.assertEqual(parents['Dynamic'], (model_id,))
+
+
+    def test_merge_static_and_runtime(self):
+        """Test that runtime bases, dynamic definitions and re-exports are merged with provenance."""
+        base_data = self.analyzer.analyze_file(os.path.join(self.workspace_path, 'base.py'))
+        base_id = base_data['definitions'][0]['symbol_id']
+        static_data = self.analyzer.analyze_file(os.path.join(self.workspace_path, 'user.py'))
+        runtime_data = {
+            'module': 'user',
+            'runtime_symbols': {
+                'User': {'type': 'class', 'module': 'user', 'bases': ['Mixin', 'BaseModel'],
+                         'base_modules': ['user', 'base']},
+                'Mixin': {'type': 'class', 'module': 'user', 'bases': [], 'base_modules': []},
+                'BaseModel': {'type': 'class', 'module': 'base', 'bases': [], 'base_modules': []},
+                'loads': {'type': 'function', 'module': 'json'},
+                'login': {'type': 'function', 'module': 'user'}
+            }
+        }
+        
+        merged = merge_static_and_runtime(static_data, runtime_data, self.registry)
+        definitions = {defn['name']: defn for defn in merged['definitions']}
+        mixin = definitions['Mixin']
+        self.assertEqual(mixin['source'], 'runtime')
+        self.assertEqual(mixin['symbol_id'], self.registry.get_symbol_id(static_data['file_id'], 'Mixin', 'class'))
+        self.assertIn(mixin['symbol_id'], merged['exports'])
+        # Statically, the imported base of User is not resolved
+        self.assertEqual(definitions['User']['parents'], [mixin['symbol_id'], base_id])
+        self.assertEqual(definitions['User']['runtime_parents'], [mixin['symbol_id'], base_id])
+        self.assertNotIn('source', definitions['login'])
+        self.assertEqual(len(merged['imports']), len(static_data['imports']))
+        self.assertNotIn('Mixin', [defn['name'] for defn in static_data['definitions']])
+
+
+    def test_lazy_cli_imports(self):
+        """Test that loading the CLI defers the command modules and that startup can be profiled."""
+        loaded = subprocess.run(
+            [sys.executable, '-c', "import sys, forai.cli; print(sorted(name for name in "
+             "('forai.workspace_updater', 'forai.static_analyzer', 'forai.runtime_introspector.introspector', "
+             "'forai.runtime_introspector.pool', 'multiprocessing', 'sqlite3') if name in sys.modules))"],
+            stdout=subprocess.PIPE, universal_newlines=True, check=True)
+        self.assertEqual(loaded.stdout.strip(), '[]')
+
+        # The server creates the introspection pool only when runtime introspection is used
+        loaded = subprocess.run(
+            [sys.executable, '-c', "import sys, forai.server; print(sorted(name for name in "
+             "('forai.runtime_introspector.pool', 'multiprocessing') if name in sys.modules))"],
+            stdout=subprocess.PIPE, universal_newlines=True, check=True)
+        self.assertEqual(loaded.stdout.strip(), '[]')
+        
+        profiled = subprocess.run(
+            [sys.executable, '-m', 'forai', '--profile-startup', '-w', self.workspace_path,
+             'list-deps', os.path.join(self.workspace_path, 'base.py')],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        self.assertEqual(profiled.returncode, 0)
+        self.assertTrue(json.loads(profiled.stdout)['success'])
+        self.assertIn('Run time:', profiled.stderr)
+        self.assertIn('forai.cli', profiled.stderr)
+        self.assertNotIn('import time:', profiled.stderr)
+
+
+    def test_benchmarks(self):
+        """Test that the benchmark suite runs on a synthetic repository and flags regressions."""
+        results = run_benchmarks(files=6, symbols=4, fan_out=2, cycles=1, repeat=1,
+                                 only=['parse_python_file', 'update_all_warm', 'query_find'])
+        self.assertEqual(results['repo']['files'], 6)
+        self.assertEqual(sorted(results['benchmarks']), ['parse_python_file', 'query_find', 'update_all_warm'])
+        self.assertEqual(results['benchmarks']['parse_python_file']['items'], 7)  # With the package __init__.py
+        
+        baseline = json.loads(json.dumps(results))
+        baseline['benchmarks']['update_all_warm']['median'] = results['benchmarks']['update_all_warm']['median'] / 2
+        baseline['benchmarks']['query_find']['median'] = results['benchmarks']['query_find']['median'] * 2
+        comparison = compare_results(baseline, results, threshold=0.2, min_time=0)
+        self.assertTrue(comparison['params_match'])
+        self.assertEqual([change['name'] for change in comparison['regressions']], ['update_all_warm'])
+        self.assertEqual([change['name'] for change in comparison['improvements']], ['query_find'])
+        
+        with self.assertRaises(ValueError):
+            run_benchmarks(files=2, repeat=1, only=['no_such_benchmark'])
 
 
 if __name__ == '__main__':
@@ -1,30 +1,98 @@
 import ast
+import re
 import logging
 from typing import List, Dict, Any, Set, Tuple, Optional
 
 logger = logging.getLogger(__name__)
 
-class ImportVisitor(ast.NodeVisitor):
-    """Visitor for extracting import information from an AST."""
-    
+# FORAI headers are written as bare "//FORAI:...//" lines, which are not valid Python.
+# They are turned into comments of the same length before parsing.
+_HEADER_LINE_PATTERN = re.compile(r'^//FORAI:', re.MULTILINE)
+
+# AST node types that can contain statements in one of their fields
+_STATEMENT_CONTAINERS = (ast.stmt, ast.excepthandler) + ((ast.match_case,) if hasattr(ast, 'match_case') else ())
+
+# Statements that introduce a new scope for definitions
+_FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+class SymbolExtractor:
+    """Extracts imports, definitions and exports from a module AST in a single pass.
+
+    Only statements are traversed; expressions never contain imports or definitions.
+    Imports are collected from every statement, including function bodies. Definitions
+    are collected from the module body and class bodies (and the compound statements
+    nested in them), but not from inside functions. The AST is not modified.
+    """
+
     def __init__(self):
         self.imports = []
-        
-    def visit_Import(self, node):
-        """Visit an Import node."""
+        self.definitions = []
+        # Ordered set, so that exports (and the headers built from them) are stable across runs
+        self.exports = {}
+
+    def extract(self, tree: ast.Module) -> None:
+        """Extract symbols from a parsed module.
+
+        Args:
+            tree: The module AST
+        """
+        self._visit_body(tree.body, in_definition_scope=True, module_level=True)
+
+    def _visit_body(self, statements: List[ast.AST], in_definition_scope: bool, module_level: bool = False) -> None:
+        """Visit a list of statements.
+
+        Args:
+            statements: The statements to visit
+            in_definition_scope: Whether definitions in these statements are recorded
+            module_level: Whether these statements are the top-level module body
+        """
+        for node in statements:
+            if isinstance(node, ast.Import):
+                self._add_import(node)
+            elif isinstance(node, ast.ImportFrom):
+                self._add_import_from(node)
+            elif isinstance(node, ast.ClassDef):
+                if in_definition_scope:
+                    self._add_class(node)
+                self._visit_body(node.body, in_definition_scope)
+            elif isinstance(node, _FUNCTION_NODES):
+                if in_definition_scope:
+                    self._add_function(node)
+                self._visit_body(node.body, False)
+            elif isinstance(node, ast.Assign):
+                if module_level:
+                    self._add_assignment(node)
+            else:
+                self._visit_nested(node, in_definition_scope)
+
+    def _visit_nested(self, node: ast.AST, in_definition_scope: bool) -> None:
+        """Visit the statement lists of a compound statement (if, for, try, with, ...)."""
+        for _, value in ast.iter_fields(node):
+            if not isinstance(value, list) or not value or not isinstance(value[0], _STATEMENT_CONTAINERS):
+                continue
+
+            if isinstance(value[0], ast.stmt):
+                self._visit_body(value, in_definition_scope)
+            else:
+                # Exception handlers and match cases hold their own statement lists
+                for child in value:
+                    self._visit_nested(child, in_definition_scope)
+
+    def _add_import(self, node: ast.Import) -> None:
+        """Record an Import node."""
         for name in node.names:
             self.imports.append({
                 'module': name.name,
                 'symbol': '*',
                 'alias': name.asname
             })
-        self.generic_visit(node)
-        
-    def visit_ImportFrom(self, node):
-        """Visit an ImportFrom node."""
+
+    def _add_import_from(self, node: ast.ImportFrom) -> None:
+        """Record an ImportFrom node."""
         if node.module is None:  # relative import with no module
             return
-            
+
         for name in node.names:
             if name.name == '*':
                 # Import all symbols
@@ -40,18 +108,9 @@ class ImportVisitor(ast.NodeVisitor):
                     'symbol': name.name,
                     'alias': name.asname
                 })
-        self.generic_visit(node)
-
 
-class DefinitionVisitor(ast.NodeVisitor):
-    """Visitor for extracting class and function definitions from an AST."""
-    
-    def __init__(self):
-        self.definitions = []
-        self.exports = set()
-        
-    def visit_ClassDef(self, node):
-        """Visit a ClassDef node."""
+    def _add_class(self, node: ast.ClassDef) -> None:
+        """Record a ClassDef node."""
         # Extract base classes
         bases = []
         for base in node.bases:
@@ -59,7 +118,7 @@ class DefinitionVisitor(ast.NodeVisitor):
                 bases.append(base.id)
             elif isinstance(base, ast.Attribute):
                 bases.append(self._get_attribute_name(base))
-        
+
         # Add class definition
         self.definitions.append({
             'name': node.name,
@@ -67,76 +126,52 @@ class DefinitionVisitor(ast.NodeVisitor):
             'bases': bases,
             'docstring': ast.get_docstring(node)
         })
-        
+
         # Add to exports if class is not private
         if not node.name.startswith('_'):
-            self.exports.add(node.name)
-            
-        self.generic_visit(node)
-        
-    def visit_FunctionDef(self, node):
-        """Visit a FunctionDef node."""
-        # Add function definition
-        self.definitions.append({
-            'name': node.name,
-            'type': 'function',
-            'docstring': ast.get_docstring(node)
-        })
-        
-        # Add to exports if function is not private
-        if not node.name.startswith('_'):
-            self.exports.add(node.name)
-            
-        self.generic_visit(node)
-        
-    def visit_AsyncFunctionDef(self, node):
-        """Visit an AsyncFunctionDef node."""
-        # Add async function definition
-        self.definitions.append({
+            self.exports[node.name] = None
+
+    def _add_function(self, node: ast.AST) -> None:
+        """Record a FunctionDef or AsyncFunctionDef node."""
+        definition = {
             'name': node.name,
-            'type': 'function',
-            'is_async': True,
-            'docstring': ast.get_docstring(node)
-        })
-        
+            'type': 'function'
+        }
+        if isinstance(node, ast.AsyncFunctionDef):
+            definition['is_async'] = True
+        definition['docstring'] = ast.get_docstring(node)
+        self.definitions.append(definition)
+
         # Add to exports if function is not private
         if not node.name.startswith('_'):
-            self.exports.add(node.name)
-            
-        self.generic_visit(node)
-        
-    def visit_Assign(self, node):
-        """Visit an assignment to catch module-level variables."""
-        # Only consider module-level assignments
-        if not hasattr(node, 'parent') or not isinstance(node.parent, ast.Module):
-            return
-            
+            self.exports[node.name] = None
+
+    def _add_assignment(self, node: ast.Assign) -> None:
+        """Record a module-level assignment."""
         # Extract targets
         for target in node.targets:
             if isinstance(target, ast.Name):
                 # Skip private variables
                 if target.id.startswith('_') and target.id != '__all__':
                     continue
-                    
+
                 # Handle __all__ special case
                 if target.id == '__all__' and isinstance(node.value, ast.List):
                     for elt in node.value.elts:
-                        if isinstance(elt, ast.Str):
-                            self.exports.add(elt.s)
+                        if isinstance(elt, ast.Constant) and isinstance(elt.value, str):
+                            self.exports[elt.value] = None
                     return
-                
+
                 # Add variable definition
                 self.definitions.append({
                     'name': target.id,
                     'type': 'variable'
                 })
-                
+
                 # Add to exports
                 if not target.id.startswith('_'):
-                    self.exports.add(target.id)
-                    
-        self.generic_visit(node)
-        
+                    self.exports[target.id] = None
+
     def _get_attribute_name(self, node):
         """Recursively build an attribute name."""
         if isinstance(node, ast.Name):
@@ -148,10 +183,10 @@ class DefinitionVisitor(ast.NodeVisitor):
 
 def parse_python_file(file_path: str) -> Dict[str, Any]:
     """Parse a Python file and extract imports, definitions, and exports.
-    
+
     Args:
         file_path: Path to the Python file
-        
+
     Returns:
         A dictionary with imports, definitions, and exports
     """
@@ -161,32 +196,24 @@ def parse_python_file(file_path: str) -> Dict[str, Any]:
     except Exception as e:
         logger.error(f"Failed to read file {file_path}: {e}")
         return {'imports': [], 'definitions': [], 'exports': []}
-    
+
     try:
         # Parse file
+        content = _HEADER_LINE_PATTERN.sub('# FORAI:', content)
         tree = ast.parse(content, filename=file_path)
-        
-        # Add parent reference to each node
-        for node in ast.walk(tree):
-            for child in ast.iter_child_nodes(node):
-                child.parent = node
-        
-        # Extract imports
-        import_visitor = ImportVisitor()
-        import_visitor.visit(tree)
-        
-        # Extract definitions and exports
-        definition_visitor = DefinitionVisitor()
-        definition_visitor.visit(tree)
-        
+
+        # Extract imports, definitions and exports
+        extractor = SymbolExtractor()
+        extractor.extract(tree)
+
         return {
-            'imports': import_visitor.imports,
-            'definitions': definition_visitor.definitions,
-            'exports': list(definition_visitor.exports)
+            'imports': extractor.imports,
+            'definitions': extractor.definitions,
+            'exports': list(extractor.exports)
         }
     except SyntaxError as e:
         logger.error(f"Syntax error in file {file_path}: {e}")
         return {'imports': [], 'definitions': [], 'exports': []}
     except Exception as e:
         logger.error(f"Failed to parse file {file_path}: {e}")
-        return {'imports': [], 'definitions': [], 'exports': []}
\ No newline at end of file
+        return {'imports': [], 'definitions': [], 'exports': []}
@@ -0,0 +1,66 @@
+import os
+import stat
+import logging
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Permission bits of new files. The umask is not applied: reading it means setting it,
+# which is not safe while other threads create files
+_NEW_FILE_MODE = 0o644
+
+
+@contextmanager
+def atomic_replace(file_path: str) -> Iterator[BinaryIO]:
+    """Replace a file atomically with content written to a binary stream.
+
+    The yielded stream is a temporary file in the same directory. When the block
+    exits normally it is flushed to disk and renamed over the target, so readers
+    never observe a partially written file and a crash leaves the previous version
+    intact. If the block raises, the temporary file is removed and the target is
+    left untouched. The permission bits of an existing file are preserved; new
+    files are readable by everyone and writable by the owner (0644).
+
+    Args:
+        file_path: Path to the file to replace
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(directory, exist_ok=True)
+
+    try:
+        mode = stat.S_IMODE(os.stat(file_path).st_mode)
+    except FileNotFoundError:
+        mode = _NEW_FILE_MODE
+
+    # Imported here, as read-only commands never write files
+    import tempfile
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(file_path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_text(file_path: str, content: str, encoding: str = 'utf-8') -> None:
+    """Atomically replace a file with the given text content.
+
+    See ``atomic_replace`` for the guarantees. Newlines in the content are written
+    unchanged.
+
+    Args:
+        file_path: Path to the file to write
+        content: The text to write
+        encoding: The text encoding to use
+    """
+    with atomic_replace(file_path) as f:
+        f.write(content.encode(encoding))
@@ -0,0 +1,93 @@
+import os
+import subprocess
+import logging
+from typing import List, Optional, Tuple
+
+from forai.utils.scanner import IgnoreMatcher
+
+logger = logging.getLogger(__name__)
+
+
+def _git(workspace_path: str, *args: str) -> str:
+    """Run a git command in a workspace and return its output.
+
+    Raises:
+        RuntimeError: If git is not installed or the command fails
+    """
+    try:
+        result = subprocess.run(['git', '-C', workspace_path, *args], capture_output=True, text=True)
+    except FileNotFoundError:
+        raise RuntimeError("git is not installed")
+    if result.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def get_changed_files(workspace_path: str, since: Optional[str] = None
+                      ) -> Tuple[List[str], List[Tuple[str, str]], List[str]]:
+    """Get the Python files in a workspace that changed since a git revision.
+
+    Changes are taken from ``git diff --name-status -M`` between the revision and the
+    working tree (so staged and unstaged changes count), plus untracked files that are
+    not ignored. Only ``.py`` files inside the workspace that the workspace scanner does
+    not ignore are reported; a rename from or to another file type (or an ignored path)
+    counts as a deletion or an addition.
+
+    Args:
+        workspace_path: Path to the workspace root directory, inside a git repository
+        since: The revision to compare against (defaults to HEAD)
+
+    Returns:
+        A (changed, renamed, deleted) tuple of absolute paths of added or modified files,
+        (old path, new path) pairs of renamed files and paths of deleted files
+
+    Raises:
+        RuntimeError: If the workspace is not in a git repository or git fails
+    """
+    workspace_path = os.path.abspath(workspace_path)
+    top_level = _git(workspace_path, 'rev-parse', '--show-toplevel').strip()
+    matcher = IgnoreMatcher(workspace_path)
+
+    def workspace_file(rel_path: str) -> Optional[str]:
+        file_path = os.path.normpath(os.path.join(top_level, rel_path))
+        if not file_path.endswith('.py') or matcher.is_ignored(file_path):
+            return None
+        return file_path
+
+    changed: List[str] = []
+    renamed: List[Tuple[str, str]] = []
+    deleted: List[str] = []
+
+    # With -z, every status is followed by one path, or two for renames and copies
+    fields = _git(workspace_path, 'diff', '--name-status', '-M', '-z', since or 'HEAD', '--', '.').split('\0')
+    i = 0
+    while i < len(fields) and fields[i]:
+        status = fields[i]
+        if status[0] in 'RC':
+            old_path, new_path = workspace_file(fields[i + 1]), workspace_file(fields[i + 2])
+            i += 3
+            if status[0] == 'R' and old_path and new_path:
+                renamed.append((old_path, new_path))
+                continue
+            if status[0] == 'R' and old_path:
+                deleted.append(old_path)
+            if new_path:
+                changed.append(new_path)
+            continue
+
+        file_path = workspace_file(fields[i + 1])
+        i += 2
+        if file_path is None:
+            continue
+        if status[0] == 'D':
+            deleted.append(file_path)
+        elif status[0] != 'U' or os.path.exists(file_path):
+            changed.append(file_path)
+
+    for rel_path in _git(workspace_path, 'ls-files', '--others', '--exclude-standard', '--full-name', '-z').split('\0'):
+        file_path = workspace_file(rel_path) if rel_path else None
+        if file_path is not None:
+            changed.append(file_path)
+
+    logger.debug(f"Changed since {since or 'HEAD'}: {len(changed)} changed, {len(renamed)} renamed, {len(deleted)} deleted")
+    return changed, renamed, deleted
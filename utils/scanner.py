@@ -0,0 +1,345 @@
+import os
+import re
+import fnmatch
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Pattern, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Directory names that are never scanned: version control metadata and the FORAI data directory
+ALWAYS_IGNORED_DIRECTORIES = ('.git', '.hg', '.svn', '.forai')
+
+# Directory names that are not scanned by default (fnmatch patterns). They are the
+# lowest-priority rules, so negated patterns in ignore files (e.g. ``!build/``) re-include them.
+DEFAULT_IGNORED_DIRECTORIES = (
+    '.venv', 'venv', '.tox', '.nox', '.mypy_cache', '.pytest_cache',
+    '__pycache__', 'node_modules', 'build', 'dist', '*.egg-info'
+)
+
+# Ignore files read in every directory, in increasing order of precedence
+IGNORE_FILES = ('.gitignore', '.foraiignore')
+
+
+class IgnoreRules:
+    """Patterns of one ignore file, using the .gitignore syntax.
+
+    Supported: comments, negation with ``!``, directory-only patterns ending in ``/``,
+    patterns anchored to the ignore file's directory (containing a ``/``), ``*``, ``?``,
+    character classes and ``**``.
+    """
+
+    def __init__(self, lines: Iterable[str]):
+        """Compile the patterns.
+
+        Args:
+            lines: The lines of the ignore file
+        """
+        self.rules: List[Tuple[Pattern, bool, bool]] = []
+        for line in lines:
+            line = line.rstrip('\n\r')
+            if line.endswith(' ') and not line.endswith('\\ '):
+                line = line.rstrip(' ')
+            if not line or line.startswith('#'):
+                continue
+
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            elif line.startswith('\\'):
+                line = line[1:]
+
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+
+            anchored = '/' in line
+            body = self._translate(line.lstrip('/'))
+            regex = '^' + body + '$' if anchored else '^(?:.*/)?' + body + '$'
+            self.rules.append((re.compile(regex), negate, dir_only))
+
+    @classmethod
+    def from_file(cls, file_path: str) -> Optional['IgnoreRules']:
+        """Load an ignore file.
+
+        Args:
+            file_path: Path to the ignore file
+
+        Returns:
+            The rules, or None if the file does not exist or has no patterns
+        """
+        try:
+            with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                rules = cls(f)
+        except OSError:
+            return None
+        return rules if rules.rules else None
+
+    @staticmethod
+    def _translate(pattern: str) -> str:
+        """Translate a .gitignore pattern to a regular expression."""
+        parts = []
+        i = 0
+        while i < len(pattern):
+            c = pattern[i]
+            if pattern.startswith('**/', i):
+                parts.append('(?:.*/)?')
+                i += 3
+            elif pattern.startswith('/**', i) and i + 3 == len(pattern):
+                parts.append('/.*')
+                i += 3
+            elif pattern.startswith('**', i):
+                parts.append('.*')
+                i += 2
+            elif c == '*':
+                parts.append('[^/]*')
+                i += 1
+            elif c == '?':
+                parts.append('[^/]')
+                i += 1
+            elif c == '[':
+                end = pattern.find(']', i + 2)
+                if end == -1:
+                    parts.append(re.escape(c))
+                    i += 1
+                else:
+                    body = pattern[i + 1:end]
+                    if body.startswith('!'):
+                        body = '^' + body[1:]
+                    parts.append('[' + body.replace('\\', '\\\\') + ']')
+                    i = end + 1
+            elif c == '\\' and i + 1 < len(pattern):
+                parts.append(re.escape(pattern[i + 1]))
+                i += 2
+            else:
+                parts.append(re.escape(c))
+                i += 1
+        return ''.join(parts)
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """Match a path relative to the ignore file's directory.
+
+        Args:
+            rel_path: The relative path, with ``/`` separators
+            is_dir: Whether the path is a directory
+
+        Returns:
+            True if the path is ignored, False if it is re-included by a negated pattern
+            and None if no pattern matches
+        """
+        result = None
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                result = not negate
+        return result
+
+
+class IgnoreMatcher:
+    """Decides which paths of a workspace are ignored.
+
+    Directories named in ``ALWAYS_IGNORED_DIRECTORIES`` are always ignored. Directories
+    named in ``ignored_directories`` are ignored unless an ignore file re-includes them.
+    Ignore files (``.gitignore`` and ``.foraiignore``) apply to their own directory and
+    everything below it; deeper files and ``.foraiignore`` take precedence. Ignore files
+    are read once per directory and cached.
+    """
+
+    def __init__(self, root: str, ignored_directories: Iterable[str] = DEFAULT_IGNORED_DIRECTORIES,
+                 use_ignore_files: bool = True):
+        """Initialize the matcher.
+
+        Args:
+            root: The workspace root directory
+            ignored_directories: Directory name patterns that are ignored unless an ignore
+                file re-includes them
+            use_ignore_files: Whether to read ``.gitignore`` and ``.foraiignore`` files
+        """
+        self.root = os.path.abspath(root)
+        patterns = list(ignored_directories)
+        self._ignored_names = re.compile('|'.join(fnmatch.translate(p) for p in patterns)) if patterns else None
+        self._always_ignored_names = re.compile('|'.join(fnmatch.translate(p) for p in ALWAYS_IGNORED_DIRECTORIES))
+        self.use_ignore_files = use_ignore_files
+        self._rules: Dict[str, List[Tuple[str, IgnoreRules]]] = {}
+
+    def rules_for(self, rel_dir: str) -> List[Tuple[str, IgnoreRules]]:
+        """Get the ignore rules that apply inside a directory.
+
+        Args:
+            rel_dir: The directory relative to the root ('' for the root), with ``/`` separators
+
+        Returns:
+            (directory, rules) pairs in increasing order of precedence
+        """
+        rules = self._rules.get(rel_dir)
+        if rules is not None:
+            return rules
+
+        if rel_dir:
+            parent = rel_dir.rpartition('/')[0]
+            rules = list(self.rules_for(parent))
+        else:
+            rules = []
+
+        if self.use_ignore_files:
+            directory = os.path.join(self.root, rel_dir)
+            for name in IGNORE_FILES:
+                file_rules = IgnoreRules.from_file(os.path.join(directory, name))
+                if file_rules is not None:
+                    rules.append((rel_dir, file_rules))
+
+        self._rules[rel_dir] = rules
+        return rules
+
+    def is_ignored_entry(self, rel_path: str, name: str, is_dir: bool,
+                         rules: List[Tuple[str, IgnoreRules]]) -> bool:
+        """Check a single entry whose parent directory is known not to be ignored.
+
+        Args:
+            rel_path: The path relative to the root, with ``/`` separators
+            name: The entry name
+            is_dir: Whether the entry is a directory
+            rules: The rules of the parent directory (see ``rules_for``)
+
+        Returns:
+            True if the entry is ignored
+        """
+        if is_dir and self._always_ignored_names.match(name):
+            return True
+
+        # The default directory names are the lowest-priority rule
+        ignored = is_dir and self._ignored_names is not None and self._ignored_names.match(name) is not None
+        for base, file_rules in rules:
+            result = file_rules.match(rel_path[len(base) + 1:] if base else rel_path, is_dir)
+            if result is not None:
+                ignored = result
+        return ignored
+
+    def is_ignored(self, path: str, is_dir: bool = False) -> bool:
+        """Check whether a path, or any directory containing it, is ignored.
+
+        Args:
+            path: The absolute path or a path relative to the root
+            is_dir: Whether the path is a directory
+
+        Returns:
+            True if the path is ignored; paths outside the root are always ignored
+        """
+        rel_path = os.path.relpath(os.path.join(self.root, path), self.root)
+        if rel_path == os.curdir:
+            return False
+        if rel_path == os.pardir or rel_path.startswith(os.pardir + os.sep):
+            return True
+
+        parts = rel_path.split(os.sep)
+        rel_dir = ''
+        for i, name in enumerate(parts):
+            entry_is_dir = is_dir if i == len(parts) - 1 else True
+            entry_path = rel_dir + '/' + name if rel_dir else name
+            if self.is_ignored_entry(entry_path, name, entry_is_dir, self.rules_for(rel_dir)):
+                return True
+            rel_dir = entry_path
+        return False
+
+
+def walk(root: str, matcher: Optional[IgnoreMatcher] = None,
+         follow_symlinks: bool = False) -> Iterator[Tuple[str, List[os.DirEntry]]]:
+    """Lazily walk the directories below a directory that are not ignored.
+
+    Ignored directories are pruned before they are entered. Entries come from
+    ``os.scandir``, so their type (and on some platforms their stat data) is known
+    without extra system calls. Symlinked directories are only followed if requested,
+    and then each directory is visited once.
+
+    Args:
+        root: The directory to walk
+        matcher: The ignore matcher, or None for the default one for ``root``
+        follow_symlinks: Whether to descend into symlinked directories
+
+    Yields:
+        (directory, files) pairs, where files are the ``os.DirEntry`` objects of the
+        non-directory entries that are not ignored, sorted by name
+    """
+    root = os.path.abspath(root)
+    if matcher is None:
+        matcher = IgnoreMatcher(root)
+
+    base = os.path.relpath(root, matcher.root).replace(os.sep, '/')
+    visited = set()
+    stack = [(root, '' if base == '.' else base)]
+    while stack:
+        directory, rel_dir = stack.pop()
+        if follow_symlinks:
+            try:
+                st = os.stat(directory)
+            except OSError:
+                continue
+            if (st.st_dev, st.st_ino) in visited:
+                continue
+            visited.add((st.st_dev, st.st_ino))
+
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as e:
+            logger.debug(f"Cannot scan {directory}: {e}")
+            continue
+
+        rules = matcher.rules_for(rel_dir)
+        subdirectories = []
+        files = []
+        for entry in entries:
+            rel_path = rel_dir + '/' + entry.name if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=follow_symlinks)
+            except OSError:
+                continue
+            if matcher.is_ignored_entry(rel_path, entry.name, is_dir, rules):
+                continue
+            if is_dir:
+                subdirectories.append((entry.path, rel_path))
+            else:
+                files.append(entry)
+
+        yield directory, files
+
+        # Visit subdirectories in sorted order
+        stack.extend(reversed(subdirectories))
+
+
+def scan_entries(root: str, extensions: Optional[Tuple[str, ...]] = ('.py',),
+                 matcher: Optional[IgnoreMatcher] = None, follow_symlinks: bool = False) -> Iterator[os.DirEntry]:
+    """Lazily yield the files below a directory that are not ignored.
+
+    Args:
+        root: The directory to scan
+        extensions: File name suffixes to include, or None for all files
+        matcher: The ignore matcher, or None for the default one for ``root``
+        follow_symlinks: Whether to descend into symlinked directories (see ``walk``)
+
+    Yields:
+        The ``os.DirEntry`` of every matching regular file (or symlink to one)
+    """
+    for _, files in walk(root, matcher, follow_symlinks):
+        for entry in files:
+            if extensions is not None and not entry.name.endswith(extensions):
+                continue
+            try:
+                if entry.is_file():
+                    yield entry
+            except OSError:
+                continue
+
+
+def scan_files(root: str, extensions: Optional[Tuple[str, ...]] = ('.py',),
+               matcher: Optional[IgnoreMatcher] = None, follow_symlinks: bool = False) -> Iterator[str]:
+    """Lazily yield the paths of the files below a directory that are not ignored.
+
+    See ``scan_entries`` for the arguments.
+
+    Yields:
+        The path of every matching file
+    """
+    for entry in scan_entries(root, extensions, matcher, follow_symlinks):
+        yield entry.path
@@ -3,14 +3,43 @@
 FORAI analyzer script for VSCode extension.
 
 This script is a wrapper around the forai CLI that can be called from the VSCode extension.
+With --socket it sends the request to a running `forai serve --socket PATH` process
+instead, which avoids starting Python and loading the registry for every call.
 """
 
 import argparse
 import sys
 import json
 import os
+import socket
 import subprocess
 
+def request_server(socket_path, method, params):
+    """Send a JSON-RPC request to a running FORAI server.
+    
+    Args:
+        socket_path: Path to the server's Unix socket
+        method: The method name
+        params: The method parameters
+        
+    Returns:
+        The result, in the same format as the CLI output
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        with sock.makefile('rwb') as stream:
+            request = {'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params}
+            stream.write(json.dumps(request).encode('utf-8') + b'\n')
+            stream.flush()
+            response = json.loads(stream.readline())
+            
+    if 'error' in response:
+        return {
+            'success': False,
+            'error': response['error']['message']
+        }
+    return response['result']
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(description='FORAI Analyzer Script')
@@ -21,10 +50,27 @@ def main():
     parser.add_argument('--old-path', help='Previous file path (for rename)')
     parser.add_argument('--new-path', help='New file path (for rename)')
     parser.add_argument('--update-deps', action='store_true', help='Update dependent files')
+    parser.add_argument('--socket', help='Unix socket of a running forai server to send the request to')
     
     args = parser.parse_args()
     
     try:
+        if args.socket and os.path.exists(args.socket):
+            if args.file == '--all':
+                method, params = 'update_all', {}
+            elif args.rename:
+                if not args.old_path or not args.new_path:
+                    raise ValueError("--old-path and --new-path required for rename operation")
+                    
+                method, params = 'rename', {'old_path': args.old_path, 'new_path': args.new_path}
+            elif args.update_deps:
+                method, params = 'update_deps', {'file': args.file}
+            else:
+                method, params = 'update', {'file': args.file}
+                
+            print(json.dumps(request_server(args.socket, method, params)))
+            return
+            
         # Build forai CLI command
         cmd = ['python', '-m', 'forai', '--workspace', args.workspace]
         
@@ -1,6 +1,88 @@
 import * as vscode from 'vscode';
 import * as child_process from 'child_process';
 import * as path from 'path';
+import * as readline from 'readline';
+
+/**
+ * Client for a long-lived `forai serve` process speaking line-delimited JSON-RPC on stdio.
+ * The process keeps the registry loaded between requests, so saves do not pay interpreter
+ * startup and a registry load each time.
+ */
+class ForaiServer {
+    private process: child_process.ChildProcessWithoutNullStreams;
+    private nextId = 1;
+    private pending = new Map<number, { resolve: (value: any) => void, reject: (reason: any) => void }>();
+    private stderr = '';
+    private resolveClosed!: () => void;
+    public exited = false;
+    public readonly closed = new Promise<void>((resolve) => { this.resolveClosed = resolve; });
+    
+    constructor(pythonPath: string, workspacePath: string, public readonly enableRuntime: boolean) {
+        const args = ['-m', 'forai', '--workspace', workspacePath];
+        if (enableRuntime) {
+            args.push('--runtime');
+        }
+        args.push('serve');
+        this.process = child_process.spawn(pythonPath, args);
+        
+        readline.createInterface({ input: this.process.stdout }).on('line', (line) => {
+            let response: any;
+            try {
+                response = JSON.parse(line);
+            } catch (e) {
+                return;
+            }
+            
+            const request = this.pending.get(response.id);
+            if (!request) {
+                return;
+            }
+            this.pending.delete(response.id);
+            if (response.error) {
+                request.resolve({ success: false, error: response.error.message });
+            } else {
+                request.resolve(response.result);
+            }
+        });
+        
+        this.process.stderr.on('data', (data) => {
+            // Keep the tail of the log for error messages
+            this.stderr = (this.stderr + data.toString()).slice(-4000);
+        });
+        
+        const onExit = (reason: string) => {
+            this.exited = true;
+            for (const request of this.pending.values()) {
+                request.reject(reason);
+            }
+            this.pending.clear();
+            this.resolveClosed();
+        };
+        this.process.on('close', () => onExit(this.stderr || 'FORAI server exited'));
+        this.process.on('error', (error) => onExit(`Failed to run FORAI server: ${error.message}`));
+    }
+    
+    request(method: string, params: any): Promise<any> {
+        return new Promise((resolve, reject) => {
+            if (this.exited) {
+                reject('FORAI server is not running');
+                return;
+            }
+            const id = this.nextId++;
+            this.pending.set(id, { resolve, reject });
+            this.process.stdin.write(JSON.stringify({ jsonrpc: '2.0', id, method, params }) + '\n');
+        });
+    }
+    
+    dispose() {
+        if (!this.exited) {
+            this.process.stdin.end();
+        }
+    }
+}
+
+const servers = new Map<string, ForaiServer>();
+const stoppingServers = new Map<string, Promise<void>>();
 
 export function activate(context: vscode.ExtensionContext) {
     // Register commands
@@ -40,7 +122,8 @@ export function activate(context: vscode.ExtensionContext) {
         updateHeaderCommand,
         updateAllHeadersCommand,
         onSaveListener,
-        onRenameListener
+        onRenameListener,
+        { dispose: stopServers }
     );
     
     // Helper functions
@@ -51,32 +134,15 @@ export function activate(context: vscode.ExtensionContext) {
             return;
         }
         
-        const config = vscode.workspace.getConfiguration('forai-header');
-        const enableRuntimeIntrospection = config.get<boolean>('enableRuntimeIntrospection', false);
-        
-        // Call Python CLI
+        // Update the file; dependent files are updated too if its imports changed
         try {
-            const result = await runForaiCli([
-                '--workspace', workspaceFolder.uri.fsPath,
-                enableRuntimeIntrospection ? '--runtime' : '',
-                'update',
-                document.uri.fsPath
-            ]);
+            const result = await runForai(workspaceFolder.uri.fsPath, 'update', { file: document.uri.fsPath });
             
             if (result.success) {
-                vscode.window.setStatusBarMessage('FORAI header updated', 3000);
-                
-                // If imports changed, update dependent files
                 if (result.imports_changed) {
-                    const depResult = await runForaiCli([
-                        '--workspace', workspaceFolder.uri.fsPath,
-                        'update-deps',
-                        document.uri.fsPath
-                    ]);
-                    
-                    if (depResult.success) {
-                        vscode.window.setStatusBarMessage('FORAI header updated in dependent files', 3000);
-                    }
+                    vscode.window.setStatusBarMessage('FORAI header updated in dependent files', 3000);
+                } else {
+                    vscode.window.setStatusBarMessage('FORAI header updated', 3000);
                 }
             } else {
                 vscode.window.showErrorMessage(`Failed to update FORAI header: ${result.error}`);
@@ -100,10 +166,7 @@ export function activate(context: vscode.ExtensionContext) {
             cancellable: true
         }, async (progress, token) => {
             try {
-                const result = await runForaiCli([
-                    '--workspace', workspaceFolder.uri.fsPath,
-                    'update-all'
-                ]);
+                const result = await runForai(workspaceFolder.uri.fsPath, 'update_all', {});
                 
                 if (result.success) {
                     vscode.window.showInformationMessage(`Updated FORAI headers for ${result.updated} of ${result.total} files.`);
@@ -123,12 +186,8 @@ export function activate(context: vscode.ExtensionContext) {
         }
         
         try {
-            const result = await runForaiCli([
-                '--workspace', workspaceFolder.uri.fsPath,
-                'rename',
-                oldPath,
-                newPath
-            ]);
+            const result = await runForai(workspaceFolder.uri.fsPath,
+                'rename', { old_path: oldPath, new_path: newPath });
             
             if (result.success) {
                 vscode.window.setStatusBarMessage('FORAI header updated for renamed file', 3000);
@@ -140,6 +199,57 @@ export function activate(context: vscode.ExtensionContext) {
         }
     }
     
+    async function runForai(workspacePath: string, method: string, params: any): Promise<any> {
+        const config = vscode.workspace.getConfiguration('forai-header');
+        const enableRuntime = config.get<boolean>('enableRuntimeIntrospection', false);
+        if (config.get<boolean>('useServer', true)) {
+            const server = await getServer(workspacePath, enableRuntime);
+            return server.request(method, params);
+        }
+        
+        // Fall back to one CLI process per request
+        const args = ['--workspace', workspacePath, enableRuntime ? '--runtime' : ''];
+        if (method === 'update') {
+            args.push('update', params.file);
+        } else if (method === 'update_all') {
+            args.push('update-all');
+        } else if (method === 'rename') {
+            args.push('rename', params.old_path, params.new_path);
+        }
+        return runForaiCli(args);
+    }
+    
+    async function getServer(workspacePath: string, enableRuntime: boolean): Promise<ForaiServer> {
+        // One server per workspace, so that only one process writes its registry and headers
+        for (;;) {
+            const stopping = stoppingServers.get(workspacePath);
+            if (stopping) {
+                await stopping;
+                if (stoppingServers.get(workspacePath) === stopping) {
+                    stoppingServers.delete(workspacePath);
+                }
+                continue;
+            }
+            
+            let server = servers.get(workspacePath);
+            if (server && !server.exited && server.enableRuntime !== enableRuntime) {
+                // The runtime setting changed: let the server finish its requests and exit
+                // before starting one with the new setting
+                servers.delete(workspacePath);
+                server.dispose();
+                stoppingServers.set(workspacePath, server.closed);
+                continue;
+            }
+            if (!server || server.exited) {
+                const pythonConfig = vscode.workspace.getConfiguration('python');
+                const pythonPath = pythonConfig.get<string>('defaultInterpreterPath', 'python');
+                server = new ForaiServer(pythonPath, workspacePath, enableRuntime);
+                servers.set(workspacePath, server);
+            }
+            return server;
+        }
+    }
+    
     async function runForaiCli(args: string[]): Promise<any> {
         return new Promise((resolve, reject) => {
             // Get Python path from settings
@@ -183,4 +293,13 @@ export function activate(context: vscode.ExtensionContext) {
     }
 }
 
-export function deactivate() {}
\ No newline at end of file
+function stopServers() {
+    for (const server of servers.values()) {
+        server.dispose();
+    }
+    servers.clear();
+}
+
+export function deactivate() {
+    stopServers();
+}
\ No newline at end of file
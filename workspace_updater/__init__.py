@@ -0,0 +1,3 @@
+from forai.workspace_updater.updater import WorkspaceUpdater, merge_static_and_runtime
+
+__all__ = ["WorkspaceUpdater", "merge_static_and_runtime"]
\ No newline at end of file
@@ -0,0 +1,615 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Any, Optional, Tuple
+
+from forai.symbol_registry import SymbolRegistry
+from forai.static_analyzer import StaticAnalyzer
+from forai.header_generator import HeaderGenerator
+from forai.dependency_tracker import DependencyTracker
+from forai.file_cache import FileCache
+from forai.utils.ast_utils import parse_python_file
+from forai.utils.scanner import scan_files
+
+if TYPE_CHECKING:
+    # Imported when runtime introspection is enabled
+    from forai.runtime_introspector import IntrospectionPool, RuntimeCache
+
+logger = logging.getLogger(__name__)
+
+# Provenance recorded on definitions, parents and imports added from runtime introspection
+RUNTIME_SOURCE = 'runtime'
+
+
+def _resolve_runtime_symbol(name: str, module: Optional[str], own_module: Optional[str],
+                            local_ids: Dict[str, str],
+                            registry: Optional[SymbolRegistry]) -> Optional[Dict[str, str]]:
+    """Resolve a class or function seen at runtime to a file_id/symbol_id reference.
+
+    Args:
+        name: The name of the class or function
+        module: The name of the module defining it
+        own_module: The name of the introspected module
+        local_ids: Symbol IDs of the introspected module's definitions by name
+        registry: The symbol registry used to resolve symbols of other modules, or None
+
+    Returns:
+        A dictionary with file_id (None for the introspected module) and symbol_id,
+        or None if it is not a workspace symbol
+    """
+    if module is None or module == own_module:
+        symbol_id = local_ids.get(name)
+        return {'file_id': None, 'symbol_id': symbol_id} if symbol_id else None
+    if registry is None or module == 'builtins':
+        return None
+    resolved = registry.resolve_import(module, name)
+    if resolved is None or not resolved.get('symbol_id'):
+        return None
+    return resolved
+
+
+def merge_static_and_runtime(static_data: Dict[str, Any], runtime_data: Dict[str, Any],
+                             registry: Optional[SymbolRegistry] = None) -> Dict[str, Any]:
+    """Merge static and runtime analysis results.
+
+    What only runtime introspection sees is folded into the static data:
+
+    - classes and functions created dynamically in the module are added to the
+      definitions (and the exports), with symbol IDs allocated in the registry;
+    - class bases are resolved to symbol IDs and added to the definitions' parents;
+    - classes and functions of other workspace modules exposed by the module (e.g.
+      through star imports or ``importlib``) are added to the imports.
+
+    Each addition carries ``source: 'runtime'`` (added parents are listed in the
+    definition's ``runtime_parents``). Lookups go through dictionaries, so merging
+    is linear in the number of symbols.
+
+    Args:
+        static_data: The static analysis data
+        runtime_data: The runtime introspection data
+        registry: The symbol registry used to allocate and resolve symbol IDs, or None
+            to only merge bases defined in the module itself
+
+    Returns:
+        The merged data; the static data is not modified
+    """
+    runtime_symbols = runtime_data.get('runtime_symbols', {})
+    if not runtime_symbols:
+        return dict(static_data)
+
+    merged = dict(static_data)
+    file_id = merged.get('file_id')
+    own_module = runtime_data.get('module')
+    definitions = [dict(defn) for defn in merged.get('definitions', [])]
+    exports = list(merged.get('exports', []))
+    imports = list(merged.get('imports', []))
+
+    by_name = {defn['name']: defn for defn in definitions if defn.get('name')}
+    local_ids = {name: defn['symbol_id'] for name, defn in by_name.items() if defn.get('symbol_id')}
+    exported = set(exports)
+    imported = {(imp.get('file_id'), imp.get('symbol_id')) for imp in imports}
+
+    # Dynamically created classes and functions, and re-exported ones
+    for name, info in runtime_symbols.items():
+        symbol_type = info.get('type')
+        if symbol_type not in ('class', 'function') or name in by_name:
+            continue
+        module = info.get('module')
+        if module is None or module == own_module:
+            if registry is None or not file_id:
+                continue
+            symbol_id = registry.get_symbol_id(file_id, name, symbol_type)
+            defn = {'symbol_id': symbol_id, 'name': name, 'type': symbol_type,
+                    'parents': [], 'source': RUNTIME_SOURCE}
+            definitions.append(defn)
+            by_name[name] = defn
+            local_ids[name] = symbol_id
+            if symbol_id not in exported:
+                exports.append(symbol_id)
+                exported.add(symbol_id)
+            continue
+
+        resolved = _resolve_runtime_symbol(name, module, own_module, local_ids, registry)
+        if resolved is not None and (resolved['file_id'], resolved['symbol_id']) not in imported:
+            imports.append({'file_id': resolved['file_id'], 'symbol_id': resolved['symbol_id'],
+                            'source': RUNTIME_SOURCE})
+            imported.add((resolved['file_id'], resolved['symbol_id']))
+
+    # Class bases
+    for name, info in runtime_symbols.items():
+        defn = by_name.get(name)
+        if defn is None or info.get('type') != 'class' or not info.get('bases'):
+            continue
+        base_modules = info.get('base_modules') or [None] * len(info['bases'])
+        parents = list(defn.get('parents', []))
+        known = set(parents)
+        added = []
+        for base, module in zip(info['bases'], base_modules):
+            resolved = _resolve_runtime_symbol(base, module, own_module, local_ids, registry)
+            if resolved is None or resolved['symbol_id'] in known:
+                continue
+            parents.append(resolved['symbol_id'])
+            known.add(resolved['symbol_id'])
+            added.append(resolved['symbol_id'])
+        if added:
+            defn['parents'] = parents
+            defn['runtime_parents'] = added
+            logger.debug(f"Runtime found additional parents for {name}: {added}")
+
+    merged['definitions'] = definitions
+    merged['exports'] = exports
+    merged['imports'] = imports
+    return merged
+
+
+class WorkspaceUpdater:
+    """Updates FORAI headers across a workspace.
+
+    A single analyzer, header generator and dependency tracker are shared by all
+    files handled by the updater instead of being created per file.
+    """
+
+    def __init__(self, registry: SymbolRegistry, enable_runtime: bool = False,
+                 runtime_pool: Optional['IntrospectionPool'] = None):
+        """Initialize the workspace updater.
+
+        Args:
+            registry: The symbol registry
+            enable_runtime: Whether to use runtime introspection
+            runtime_pool: The introspection worker pool to use with runtime introspection,
+                or None for a pool with the default limits
+        """
+        self.registry = registry
+        self.enable_runtime = enable_runtime
+        self.analyzer = StaticAnalyzer(registry)
+        self.header_generator = HeaderGenerator(registry)
+        self.dependency_tracker = DependencyTracker(registry)
+        self.runtime_introspector = None
+        if enable_runtime:
+            from forai.runtime_introspector import IntrospectionPool
+            self.runtime_introspector = runtime_pool or IntrospectionPool()
+
+    def close(self) -> None:
+        """Stop the runtime introspection workers, if any."""
+        if self.runtime_introspector is not None:
+            self.runtime_introspector.close()
+
+    def find_python_files(self) -> List[str]:
+        """Find all Python files in the workspace.
+
+        Directories such as .git, .forai, virtual environments and build output are
+        skipped, as are the paths matched by the workspace's .gitignore and .foraiignore
+        files (see ``forai.utils.scanner``).
+
+        Returns:
+            Absolute paths of the Python files, sorted so that IDs are allocated in a stable order
+        """
+        return sorted(scan_files(self.registry.workspace_path))
+
+    def build_file_data(self, file_path: str, parse_result: Optional[Dict[str, Any]] = None,
+                        runtime_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Analyze a file and add runtime information if enabled.
+
+        Args:
+            file_path: Path to the file
+            parse_result: A precomputed ``parse_python_file`` result, or None to parse the file
+            runtime_data: A precomputed introspection result, or None to introspect the file
+
+        Returns:
+            The file data used to generate the header
+        """
+        if parse_result is None:
+            file_data = self.analyzer.analyze_file(file_path)
+        else:
+            file_data = self.analyzer.analyze_parse_result(file_path, parse_result)
+
+        # Add runtime information if requested
+        if self.runtime_introspector is not None:
+            if runtime_data is None:
+                runtime_data = self.runtime_introspector.introspect(file_path)
+            file_data = merge_static_and_runtime(file_data, runtime_data, self.registry)
+
+        return file_data
+
+    def introspect_files(self, file_paths: List[str],
+                         cache: Optional['RuntimeCache'] = None) -> List[Dict[str, Any]]:
+        """Introspect modules, reusing cached results of modules whose sources did not change.
+
+        Args:
+            file_paths: Paths to the Python files
+            cache: The runtime cache to look results up in and record them to, or None
+
+        Returns:
+            The introspection results, in the order of the paths
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(file_paths)
+        if cache is not None:
+            results = [cache.lookup(file_path) for file_path in file_paths]
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        introspected = self.runtime_introspector.introspect_many([file_paths[i] for i in missing])
+        for i, result in zip(missing, introspected):
+            results[i] = result
+            if cache is not None:
+                cache.record(file_paths[i], result)
+        return results
+
+    def update_file(self, file_path: str) -> Dict[str, Any]:
+        """Update the FORAI header in a file.
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            A dictionary with the file_id, whether the imports changed (imports_changed)
+            and whether the file was rewritten (modified)
+        """
+        # Get previous header imports
+        previous_imports = set()
+        try:
+            previous_imports = set(self.dependency_tracker._get_header_imports(file_path))
+        except Exception as e:
+            logger.debug(f"Failed to get previous imports: {e}")
+
+        # Analyze file
+        file_data = self.build_file_data(file_path)
+
+        # Generate header
+        header = self.header_generator.generate_header(file_data)
+
+        # Update file
+        modified = self.header_generator.update_file_header(file_path, header)
+
+        # Check if imports changed
+        current_imports = self.dependency_tracker.header_imports(file_data)
+        self.dependency_tracker.set_file_imports(file_data['file_id'], current_imports)
+        self.registry.record_header(file_data)
+        self.dependency_tracker.save_index()
+
+        return {
+            'file_id': file_data['file_id'],
+            'imports_changed': previous_imports != current_imports,
+            'modified': modified
+        }
+
+    def update_files(self, file_paths: List[str], transitive: bool = False, use_cache: bool = True) -> Dict[str, Any]:
+        """Update the FORAI headers of a batch of changed files and of their dependents.
+
+        The batch is coalesced: each file is analyzed once, with IDs allocated for the
+        whole batch first as in ``update_all``. The dependents of all files whose imports
+        changed are then collected into one affected set, and each of them is
+        re-analyzed once. Files in the batch are never re-analyzed as dependents.
+
+        Args:
+            file_paths: Paths of the changed files; duplicates are ignored
+            transitive: Whether to also update dependents of dependents whose header changed
+            use_cache: Whether to use the ``.forai/cache.json`` file cache and the
+                ``.forai/runtime_cache.json`` runtime cache
+
+        Returns:
+            A dictionary with the number of updated files, the file IDs whose imports
+            changed (imports_changed), the number of modified files, including dependents,
+            and the paths of the modified files (written)
+        """
+        return self.apply_changes(changed=file_paths, transitive=transitive, use_cache=use_cache)
+
+    def apply_changes(self, changed: Iterable[str] = (), renamed: Iterable[Tuple[str, str]] = (),
+                      deleted: Iterable[str] = (), transitive: bool = False,
+                      use_cache: bool = True) -> Dict[str, Any]:
+        """Apply a batch of file system changes to the registry and the FORAI headers.
+
+        Renamed files keep their file ID and are re-analyzed at their new path. Deleted
+        files are removed from the registry. Changed and renamed files are updated as one
+        batch (see ``update_files``), and the dependents of renamed and deleted files and
+        of files whose imports changed are then updated once.
+
+        Args:
+            changed: Paths of created or modified files
+            renamed: (old path, new path) pairs of renamed files
+            deleted: Paths of deleted files
+            transitive: Whether to also update dependents of dependents whose header changed
+            use_cache: Whether to use the ``.forai/cache.json`` file cache and the
+                ``.forai/runtime_cache.json`` runtime cache
+
+        Returns:
+            A dictionary with the number of updated, renamed and removed files, the file IDs
+            whose imports changed (imports_changed), the number of modified files and the
+            paths of the modified files (written)
+        """
+        file_paths = {os.path.abspath(file_path) for file_path in changed}
+
+        # Renames keep the file ID, so headers referring to the file only change if its module path does
+        moved_ids = []
+        for old_path, new_path in renamed:
+            moved_ids.append(self.registry.update_file_path(os.path.abspath(old_path), os.path.abspath(new_path)))
+            file_paths.add(os.path.abspath(new_path))
+
+        removed_ids = []
+        for file_path in deleted:
+            rel_path = os.path.relpath(os.path.abspath(file_path), self.registry.workspace_path)
+            file_id = self.registry.registry['file_paths'].get(rel_path)
+            if file_id is not None:
+                self.registry.remove_file(file_id)
+                removed_ids.append(file_id)
+
+        file_paths = sorted(file_paths)
+        file_ids = [self.registry.get_file_id(file_path) for file_path in file_paths]
+
+        # The dependency index holds the imports of each header as last written
+        tracker = self.dependency_tracker
+        previous_imports = {file_id: tracker.get_file_imports(file_id) for file_id in file_ids}
+
+        written: List[str] = []
+        updated = 0
+        if file_paths:
+            result, written = self._update_all(file_paths, 1, None, use_cache)
+            updated = result['updated']
+
+        changed_ids = [file_id for file_id in file_ids if tracker.get_file_imports(file_id) != previous_imports[file_id]]
+        sources = changed_ids + moved_ids + removed_ids
+        if sources:
+            for file_id in self._update_dependents(sources, transitive, file_ids, use_cache):
+                file_info = self.registry.registry['files'].get(file_id)
+                if file_info:
+                    written.append(os.path.join(self.registry.workspace_path, file_info['path']))
+        if removed_ids:
+            tracker.remove_files(removed_ids)
+            tracker.save_index()
+
+        return {
+            'updated': updated,
+            'renamed': len(moved_ids),
+            'removed': len(removed_ids),
+            'imports_changed': changed_ids,
+            'modified': len(written),
+            'written': written
+        }
+
+    def update_dependents(self, file_id: str, transitive: bool = False, use_cache: bool = True) -> List[str]:
+        """Update headers in files that depend on a file.
+
+        Args:
+            file_id: The file ID of the changed file
+            transitive: Whether to also update dependents of dependents whose header changed
+            use_cache: Whether to use the ``.forai/runtime_cache.json`` runtime cache
+
+        Returns:
+            The file IDs of the dependent files whose header was modified
+        """
+        return self._update_dependents([file_id], transitive, (), use_cache)
+
+    def _update_dependents(self, file_ids: List[str], transitive: bool, skip_file_ids: Iterable[str],
+                           use_cache: bool) -> List[str]:
+        """Update the headers of the dependents of files, merging runtime information if enabled.
+
+        Returns:
+            The file IDs of the dependent files whose header was modified
+        """
+        runtime_cache = None
+        if self.runtime_introspector is not None and use_cache:
+            from forai.runtime_introspector import RuntimeCache
+            runtime_cache = RuntimeCache(self.registry.workspace_path)
+
+        def build_dependent_data(file_path: str) -> Dict[str, Any]:
+            runtime_data = None
+            if self.runtime_introspector is not None:
+                runtime_data = self.introspect_files([file_path], runtime_cache)[0]
+            return self.build_file_data(file_path, runtime_data=runtime_data)
+
+        modified = self.dependency_tracker.update_dependent_headers(
+            file_ids, self.analyzer, self.header_generator, build_dependent_data,
+            transitive=transitive, skip_file_ids=skip_file_ids)
+        if runtime_cache is not None:
+            runtime_cache.save()
+        return modified
+
+    def update_all(self, file_paths: Optional[List[str]] = None, jobs: int = 1,
+                   writers: Optional[int] = None, use_cache: bool = True,
+                   on_file: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Update the FORAI headers of many files.
+
+        Files are parsed in ``jobs`` worker processes. Symbol IDs are then allocated
+        in this process in sorted path order, so they do not depend on which worker
+        finishes first, and headers are written by a bounded pool of writer threads.
+
+        With the file cache enabled, files whose mtime and size (or content hash) match
+        the cache reuse their cached parse result, and their header is only rewritten
+        if it differs from the cached one. With runtime introspection, modules whose
+        source and imported sources are unchanged reuse their cached introspection
+        result (see ``RuntimeCache``).
+
+        Args:
+            file_paths: Files to update, or None for every Python file in the workspace
+            jobs: Number of worker processes used for parsing (1 parses in this process)
+            writers: Number of header writer threads (defaults to ``min(8, jobs * 2)``)
+            use_cache: Whether to use the ``.forai/cache.json`` file cache and the
+                ``.forai/runtime_cache.json`` runtime cache
+            on_file: Called with a record for each file as soon as its outcome is known:
+                file_path and file_id with modified, or file_path with error if it failed.
+                Calls are serialized but may come from writer threads.
+
+        Returns:
+            A dictionary with the updated, modified and total file counts, per-phase timings in
+            seconds and, if the caches are used, file cache and runtime cache hit and miss counts
+        """
+        return self._update_all(file_paths, jobs, writers, use_cache, on_file)[0]
+
+    def _update_all(self, file_paths: Optional[List[str]], jobs: int, writers: Optional[int],
+                    use_cache: bool, on_file: Optional[Callable[[Dict[str, Any]], None]] = None
+                    ) -> Tuple[Dict[str, Any], List[str]]:
+        """Update the FORAI headers of many files (see ``update_all``).
+
+        Returns:
+            The ``update_all`` result and the paths of the files that were modified
+        """
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+
+        # Scan
+        phase_start = time.perf_counter()
+        full_scan = file_paths is None
+        if file_paths is None:
+            file_paths = self.find_python_files()
+        else:
+            file_paths = sorted(file_paths)
+        timings['scan'] = time.perf_counter() - phase_start
+
+        # Parse, skipping files with a usable cache entry
+        phase_start = time.perf_counter()
+        cache = FileCache(self.registry.workspace_path) if use_cache else None
+        parse_results: List[Optional[Dict[str, Any]]] = [None] * len(file_paths)
+        cache_entries: List[Optional[Dict[str, Any]]] = [None] * len(file_paths)
+        to_parse = []
+        for i, file_path in enumerate(file_paths):
+            if cache is not None:
+                _, entry = cache.lookup(file_path)
+                if entry is not None:
+                    parse_results[i] = entry['parse']
+                    cache_entries[i] = entry
+                    continue
+            to_parse.append(i)
+
+        paths_to_parse = [file_paths[i] for i in to_parse]
+        if jobs > 1 and len(paths_to_parse) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            chunksize = max(1, len(paths_to_parse) // (jobs * 8))
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                parsed = list(executor.map(parse_python_file, paths_to_parse, chunksize=chunksize))
+        else:
+            parsed = [parse_python_file(file_path) for file_path in paths_to_parse]
+        for i, parse_result in zip(to_parse, parsed):
+            parse_results[i] = parse_result
+        timings['parse'] = time.perf_counter() - phase_start
+
+        # Introspect, with the modules of many files imported concurrently in worker subprocesses
+        runtime_results: List[Optional[Dict[str, Any]]] = [None] * len(file_paths)
+        runtime_cache = None
+        if self.runtime_introspector is not None:
+            from forai.runtime_introspector import RuntimeCache
+            phase_start = time.perf_counter()
+            runtime_cache = RuntimeCache(self.registry.workspace_path) if use_cache else None
+            runtime_results = self.introspect_files(file_paths, runtime_cache)
+            timings['introspect'] = time.perf_counter() - phase_start
+
+        # Analyze: allocate file and symbol IDs for every file first, in sorted order,
+        # so imports between the files resolve regardless of processing order
+        phase_start = time.perf_counter()
+        for file_path, parse_result, runtime_data in zip(file_paths, parse_results, runtime_results):
+            file_id = self.registry.get_file_id(file_path)
+            for defn in parse_result['definitions']:
+                self.registry.get_symbol_id(file_id, defn['name'], defn['type'])
+            if runtime_data:
+                static_names = {defn['name'] for defn in parse_result['definitions']}
+                own_module = runtime_data.get('module')
+                for name, info in runtime_data.get('runtime_symbols', {}).items():
+                    if (info.get('type') in ('class', 'function') and name not in static_names
+                            and info.get('module') in (None, own_module)):
+                        self.registry.get_symbol_id(file_id, name, info['type'])
+
+        updated = 0
+        headers = []
+        for i, (file_path, parse_result) in enumerate(zip(file_paths, parse_results)):
+            try:
+                file_data = self.build_file_data(file_path, parse_result, runtime_results[i])
+                header = self.header_generator.generate_header(file_data)
+            except Exception as e:
+                logger.error(f"Failed to update {file_path}: {e}")
+                if on_file is not None:
+                    on_file({'file_path': file_path, 'error': str(e)})
+                continue
+
+            updated += 1
+            self.dependency_tracker.set_file_imports(file_data['file_id'], self.dependency_tracker.header_imports(file_data))
+            self.registry.record_header(file_data)
+            entry = cache_entries[i]
+            if entry is not None and entry['header'] == header:
+                if on_file is not None:
+                    on_file({'file_path': file_path, 'file_id': file_data['file_id'], 'modified': False})
+                continue
+            headers.append((i, file_path, header))
+        timings['analyze'] = time.perf_counter() - phase_start
+
+        # Write
+        phase_start = time.perf_counter()
+        if writers is None:
+            writers = min(8, jobs * 2)
+        header_pairs = [(file_path, header) for _, file_path, header in headers]
+        on_written = None
+        if on_file is not None:
+            def on_written(file_path: str, modified: bool) -> None:
+                on_file({'file_path': file_path, 'file_id': self.registry.get_file_id(file_path),
+                         'modified': modified})
+        if writers > 1 and len(header_pairs) > 1:
+            written = self._write_headers_concurrently(header_pairs, writers, on_written)
+        else:
+            written = []
+            for file_path, header in header_pairs:
+                written.append(self.header_generator.update_file_header(file_path, header))
+                if on_written is not None:
+                    on_written(file_path, written[-1])
+
+        if cache is not None:
+            for i, file_path, header in headers:
+                cache.record(file_path, parse_results[i], header)
+            if full_scan:
+                cache.prune(file_paths)
+            cache.save()
+        if runtime_cache is not None:
+            if full_scan:
+                runtime_cache.prune(file_paths)
+            runtime_cache.save()
+
+        if full_scan:
+            self.dependency_tracker.retain_files(self.registry.get_file_id(file_path) for file_path in file_paths)
+        self.dependency_tracker.save_index()
+        timings['write'] = time.perf_counter() - phase_start
+
+        timings['total'] = time.perf_counter() - started
+
+        result = {
+            'updated': updated,
+            'modified': sum(written),
+            'total': len(file_paths),
+            'timings': {phase: round(seconds, 4) for phase, seconds in timings.items()}
+        }
+        if cache is not None:
+            result['cache'] = dict(cache.stats)
+        if runtime_cache is not None:
+            result['runtime_cache'] = dict(runtime_cache.stats)
+        return result, [file_path for (_, file_path, _), modified in zip(headers, written) if modified]
+
+    def _write_headers_concurrently(self, headers: List[Any], writers: int,
+                                    on_written: Optional[Callable[[str, bool], None]] = None) -> List[bool]:
+        """Write headers with a pool of writer threads, keeping a bounded number of writes in flight.
+
+        Args:
+            headers: (file_path, header) pairs
+            writers: Number of writer threads
+            on_written: Called with the file path and whether it was modified after each
+                write, one call at a time
+
+        Returns:
+            For each header, whether its file was modified
+        """
+        in_flight = threading.BoundedSemaphore(writers * 2)
+        report_lock = threading.Lock()
+
+        def write(file_path: str, header: str) -> bool:
+            try:
+                modified = self.header_generator.update_file_header(file_path, header)
+                if on_written is not None:
+                    with report_lock:
+                        on_written(file_path, modified)
+                return modified
+            finally:
+                in_flight.release()
+
+        futures = []
+        with ThreadPoolExecutor(max_workers=writers) as executor:
+            for file_path, header in headers:
+                in_flight.acquire()
+                futures.append(executor.submit(write, file_path, header))
+
+        return [future.result() for future in futures]